@@ -15,6 +15,7 @@ class PolarisConfig(AppConfig):
         from decimal import setcontext, DefaultContext
         from polaris import settings  # loads internal settings
         from polaris import cors  # loads CORS signals
+        from polaris import cache  # loads cache invalidation signals
         from polaris.sep24.utils import check_sep24_config
 
         # Set in-memory precision to match database-level precision
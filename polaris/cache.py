@@ -0,0 +1,110 @@
+"""
+Caching of responses that only change when the anchor's assets or static files do.
+
+Cached responses are stored in Django's ``default`` cache under a key containing
+the current version of the asset catalog, which changes whenever an ``Asset`` is
+saved or deleted. Configure a cache shared by all processes, such as Redis or
+Memcached, for a change to be visible to every process immediately. Otherwise,
+each process serves its own cached responses until they expire.
+"""
+import json
+import time
+from hashlib import sha256
+from typing import Callable, Optional
+from uuid import uuid4
+
+from django.core.cache import cache
+from django.db.models.signals import post_delete, post_save
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date
+from rest_framework.request import Request
+from rest_framework.response import Response
+from rest_framework.utils.encoders import JSONEncoder
+
+from polaris import settings
+from polaris.models import Asset
+
+ASSETS_VERSION_KEY = "polaris:assets_version"
+
+
+def uncacheable(func: Callable) -> Callable:
+    """
+    Marks an integration function or method whose return value depends on the
+    request, and therefore must be called for every request instead of having
+    its result cached. For example,
+    ::
+
+        from polaris.integrations import uncacheable
+
+        @uncacheable
+        def info_integration(request, asset, lang, exchange, *args, **kwargs):
+            ...
+    """
+    func.polaris_cacheable = False
+    return func
+
+
+def is_cacheable(func: Callable) -> bool:
+    return getattr(func, "polaris_cacheable", True)
+
+
+def get_assets_version() -> str:
+    return cache.get_or_set(ASSETS_VERSION_KEY, lambda: uuid4().hex, timeout=None)
+
+
+def invalidate_assets_version(**_kwargs):
+    cache.set(ASSETS_VERSION_KEY, uuid4().hex, timeout=None)
+
+
+def cached_response(
+    request: Request,
+    key: str,
+    get_response: Callable[[], Response],
+    timeout: Optional[int] = None,
+    last_modified: Optional[float] = None,
+) -> Response:
+    """
+    Returns the response of `get_response()` from the cache, calling it if the
+    response for `key` and the current asset catalog isn't cached. Only
+    successful responses are cached, for `timeout` seconds, which defaults to
+    ``INFO_CACHE_TIMEOUT``. A `timeout` of 0 disables caching.
+
+    The response has ``ETag`` and ``Last-Modified`` headers, and a
+    ``304 Not Modified`` response is returned if the request's ``If-None-Match``
+    or ``If-Modified-Since`` header matches them. ``Last-Modified`` is the
+    `last_modified` timestamp if provided, or the time the response was cached.
+    """
+    if timeout is None:
+        timeout = settings.INFO_CACHE_TIMEOUT
+    if not timeout:
+        return get_response()
+    key = f"polaris:{key}:{get_assets_version()}"
+    cached = cache.get(key)
+    if cached is None:
+        response = get_response()
+        if response.status_code != 200:
+            return response
+        digest = sha256(
+            json.dumps(response.data, cls=JSONEncoder, sort_keys=True).encode()
+        ).hexdigest()
+        cached = (
+            response.data,
+            response.content_type,
+            digest,
+            int(last_modified or time.time()),
+        )
+        cache.set(key, cached, timeout=timeout)
+    data, content_type, digest, modified = cached
+    response = Response(data, content_type=content_type)
+    # the representation depends on the renderer negotiated from the Accept header
+    response["ETag"] = f'"{digest}-{request.accepted_renderer.format}"'
+    response["Last-Modified"] = http_date(modified)
+    response["Cache-Control"] = "no-cache"
+    patch_vary_headers(response, ["Accept"])
+    return get_conditional_response(
+        request, etag=response["ETag"], last_modified=modified, response=response
+    )
+
+
+post_save.connect(invalidate_assets_version, sender=Asset)
+post_delete.connect(invalidate_assets_version, sender=Asset)
@@ -1,4 +1,5 @@
 import sys
+import inspect
 from typing import Callable
 
 from polaris.integrations.customers import (
@@ -9,7 +10,12 @@ from polaris.integrations.fees import calculate_fee, registered_fee_func
 from polaris.integrations.forms import TransactionForm, CreditCardForm
 from polaris.integrations.info import default_info_func, registered_info_func
 from polaris.integrations.quote import QuoteIntegration, registered_quote_integration
-from polaris.integrations.rails import RailsIntegration, registered_rails_integration
+from polaris.integrations.rails import (
+    RailsIntegration,
+    registered_rails_integration,
+    get_async_hook,
+    ASYNC_HOOKS,
+)
 from polaris.integrations.sep31 import (
     SEP31ReceiverIntegration,
     registered_sep31_receiver_integration,
@@ -26,6 +32,7 @@ from polaris.integrations.custody import (
     SelfCustodyIntegration,
     registered_custody_integration,
 )
+from polaris.cache import uncacheable
 
 
 def register_integrations(
@@ -83,11 +90,14 @@ def register_integrations(
     :param sep31_receiver: the ``SEP31ReceiverIntegration`` subclass instance
         to be used by Polaris
     :param rails: the ``RailsIntegration`` subclass instance to be used by
-        Polaris
+        Polaris. If it implements any of the optional ``async`` hooks, such as
+        ``apoll_pending_deposits()``, Polaris awaits them instead of calling their
+        synchronous counterparts.
     :param toml: a function that returns stellar.toml data as a dictionary
     :param fee: a function that returns the fee that would be charged
     :param sep6_info: a function that returns the /info `fields` or `types`
-        values for an Asset
+        values for an Asset. Its results are cached until an ``Asset`` changes,
+        unless it is decorated with :func:`~polaris.integrations.uncacheable`.
     :param customer: the ``CustomerIntegration`` subclass instance to be used
         by Polaris
     :param custody: the ``CustodyIntegration`` subclass instance to be used
@@ -96,7 +106,7 @@ def register_integrations(
         Polaris
     :raises ValueError: missing argument(s)
     :raises TypeError: arguments are not subclasses of DepositIntegration or
-        Withdrawal
+        Withdrawal, or an ``async`` hook of `rails` is not a coroutine function
     """
     this = sys.modules[__name__]
 
@@ -118,6 +128,12 @@ def register_integrations(
         raise TypeError("send must be a subclass of SEP31ReceiverIntegration")
     elif rails and not issubclass(rails.__class__, RailsIntegration):
         raise TypeError("rails must be a subclass of RailsIntegration")
+    elif rails and not all(
+        inspect.iscoroutinefunction(get_async_hook(rails, name))
+        for name in ASYNC_HOOKS
+        if get_async_hook(rails, name)
+    ):
+        raise TypeError("rails async hooks must be defined using 'async def'")
     elif custody and not issubclass(custody.__class__, CustodyIntegration):
         raise TypeError("custody must be a subclass of CustodyIntegration")
     elif quote and not issubclass(quote.__class__, QuoteIntegration):
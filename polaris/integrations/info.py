@@ -21,7 +21,12 @@ def default_info_func(
 
     Return a dictionary containing the `fields` and `types` key-value pairs
     described in the SEP-6 /info response for the asset passed. Raise a
-    ``ValueError()`` if `lang` is not supported. For example,
+    ``ValueError()`` if `lang` is not supported.
+
+    The response is cached until an ``Asset`` is saved or deleted, or for up to
+    ``INFO_CACHE_TIMEOUT`` seconds. If the values returned depend on `request`,
+    decorate this function with :func:`~polaris.integrations.uncacheable`. For
+    example,
     ::
 
         if asset.code == "USD":
@@ -1,4 +1,4 @@
-from typing import List, Dict
+from typing import List, Dict, Callable, Optional
 from django.db.models import QuerySet
 
 from polaris.models import Transaction
@@ -20,8 +20,10 @@ class RailsIntegration:
         Polaris will update the transactions returned to ``Transaction.STATUS.completed``.
 
         `transactions` is passed as a Django ``QuerySet`` in case there are many pending
-        transactions. You may want to query batches of ``Transaction`` objects to avoid
-        consuming large amounts of memory.
+        transactions. It contains at most ``--chunk-size`` transactions, and only those
+        due to be polled: transactions that are not returned are passed again after a
+        delay that grows with their age, so this function may be called several times
+        per run of ``poll_outgoing_transactions``.
 
         :param transactions: a ``QuerySet`` of ``Transaction`` objects
         """
@@ -81,6 +83,10 @@ class RailsIntegration:
         information specified in ``Transaction.required_info_update``. Once updated,
         this function will be called again with the updated transaction.
 
+        When ``execute_outgoing_transactions`` is run with ``--concurrency`` greater
+        than 1, this function is called from multiple threads at the same time, each
+        with a different transaction.
+
         :param transaction: the ``Transaction`` object associated with the payment
             this function should make
         """
@@ -129,6 +135,13 @@ class RailsIntegration:
                 pending_execution_attempt=False
             )
 
+        The QuerySet contains at most ``--chunk-size`` transactions, and only those
+        due to be polled. Transactions that are not returned are passed again after a
+        delay that grows with their age, and deposits older than ``--stale-after``
+        seconds are only polled every ``--stale-poll-interval`` seconds. This function
+        may therefore be called several times per run of ``process_pending_deposits``,
+        and is called with an empty QuerySet when no deposits are due.
+
         ``pending_user_transfer_start`` is the proper status for a
         transaction when the user must take some action to proceed. In this
         case, that action is sending the deposit funds.
@@ -165,5 +178,80 @@ class RailsIntegration:
         """
         raise NotImplementedError()
 
+    async def apoll_outgoing_transactions(
+        self, transactions: List[Transaction], *args: List, **kwargs: Dict
+    ) -> List[Transaction]:
+        """
+        An optional ``async`` counterpart to :meth:`poll_outgoing_transactions`.
+
+        If implemented, the ``poll_outgoing_transactions`` command awaits this
+        function instead of calling :meth:`poll_outgoing_transactions`, polling up
+        to ``--concurrency`` chunks at a time. `transactions` is a list rather than
+        a ``QuerySet`` so it can be used without making database queries.
+
+        Database queries made from this function must be wrapped with
+        ``asgiref.sync.sync_to_async()``.
+
+        :param transactions: a list of ``Transaction`` objects
+        """
+        raise NotImplementedError()
+
+    async def aexecute_outgoing_transaction(
+        self, transaction: Transaction, *args: List, **kwargs: Dict
+    ):
+        """
+        An optional ``async`` counterpart to :meth:`execute_outgoing_transaction`.
+
+        If implemented, the ``execute_outgoing_transactions`` command awaits this
+        function instead of calling :meth:`execute_outgoing_transaction`, executing
+        up to ``--concurrency`` transactions at a time on a single thread.
+
+        Database queries made from this function, including ``transaction.save()``,
+        must be wrapped with ``asgiref.sync.sync_to_async()``.
+
+        :param transaction: the ``Transaction`` object associated with the payment
+            this function should make
+        """
+        raise NotImplementedError()
+
+    async def apoll_pending_deposits(
+        self, pending_deposits: List[Transaction], *args: List, **kwargs: Dict
+    ) -> List[Transaction]:
+        """
+        An optional ``async`` counterpart to :meth:`poll_pending_deposits`.
+
+        If implemented, the ``process_pending_deposits`` command awaits this
+        function instead of calling :meth:`poll_pending_deposits`, polling up to
+        ``--concurrency`` chunks at a time. `pending_deposits` is a list rather
+        than a ``QuerySet`` so it can be used without making database queries.
+
+        Database queries made from this function, including ``transaction.save()``,
+        must be wrapped with ``asgiref.sync.sync_to_async()``.
+
+        :param pending_deposits: a list of pending ``Transaction`` objects
+        :return: a list of ``Transaction`` objects which correspond to
+            successful user deposits to the anchor's account.
+        """
+        raise NotImplementedError()
+
+
+ASYNC_HOOKS = {
+    "poll_outgoing_transactions": "apoll_outgoing_transactions",
+    "execute_outgoing_transaction": "aexecute_outgoing_transaction",
+    "poll_pending_deposits": "apoll_pending_deposits",
+}
+
+
+def get_async_hook(rails: RailsIntegration, name: str) -> Optional[Callable]:
+    """
+    Returns the bound ``async`` counterpart of the `name` method if `rails`
+    overrides it, otherwise ``None``.
+    """
+    async_name = ASYNC_HOOKS[name]
+    method = getattr(type(rails), async_name, None)
+    if method is None or method is getattr(RailsIntegration, async_name):
+        return None
+    return getattr(rails, async_name)
+
 
 registered_rails_integration = RailsIntegration()
@@ -27,6 +27,10 @@ class SEP31ReceiverIntegration:
         fields documented in the info response.
 
         Descriptions should be in the `lang` passed if supported.
+
+        The response is cached until an ``Asset`` is saved or deleted, or for up to
+        ``INFO_CACHE_TIMEOUT`` seconds. If the values returned depend on `request`,
+        decorate this method with :func:`~polaris.integrations.uncacheable`.
         ::
 
             return {
@@ -30,6 +30,11 @@ def get_stellar_toml(request: Request, *args: List, **kwargs: Dict):
 
     The contents of the dictionary returned will overwrite the default matching key values.
 
+    The rendered file is cached until an ``Asset`` is saved or deleted, or for up to
+    ``TOML_CACHE_TIMEOUT`` seconds. If the attributes returned depend on `request`,
+    decorate the replacement function with :func:`~polaris.integrations.uncacheable`
+    to render the file for every request.
+
     :return: a dictionary of SEP-1_ attributes
     """
     return {
@@ -1,25 +1,72 @@
 import sys
 import signal
+import threading
 import time
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from decimal import Decimal
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Iterable, List
 
 import django.db.transaction
+from django.db import connections
 from django.db.models import Q
 from django.core.management import BaseCommand
 
 from polaris import settings
-from polaris.integrations import registered_fee_func, calculate_fee
-from polaris.utils import getLogger, maybe_make_callback
+from polaris.integrations import registered_fee_func, calculate_fee, get_async_hook
+from polaris.utils import getLogger, maybe_make_callback, db_sync_to_async
 from polaris.models import Transaction
 from polaris.integrations import registered_rails_integration as rri
 
-
 logger = getLogger(__name__)
 DEFAULT_INTERVAL = 30
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_LEASE = 300
 TERMINATE = False
 
 
+class LeaseRenewer(threading.Thread):
+    """
+    Renews the leases of the transactions claimed by the process every third of
+    `lease` seconds until they are removed.
+    """
+
+    def __init__(self, lease: int):
+        super().__init__(daemon=True)
+        self.lease = lease
+        self.transaction_ids = set()
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+
+    def add(self, transactions: List[Transaction]):
+        with self._lock:
+            self.transaction_ids.update(t.id for t in transactions)
+
+    def remove(self, transaction: Transaction):
+        with self._lock:
+            self.transaction_ids.discard(transaction.id)
+
+    def stop(self):
+        self._stopped.set()
+        self.join()
+
+    def run(self):
+        try:
+            while not self._stopped.wait(self.lease / 3):
+                with self._lock:
+                    transaction_ids = list(self.transaction_ids)
+                if transaction_ids:
+                    Transaction.objects.filter(
+                        id__in=transaction_ids, pending_execution_attempt=True
+                    ).update(
+                        lease_expires_at=datetime.now(timezone.utc)
+                        + timedelta(seconds=self.lease)
+                    )
+        finally:
+            connections.close_all()
+
+
 class Command(BaseCommand):
     """
     This process periodically queries for transactions that are ready to be executed
@@ -31,6 +78,16 @@ class Command(BaseCommand):
     Anchors are expected to update the :attr:`~polaris.models.Transaction.status` to
     ``completed`` or ``pending_external`` if initiating the transfer was successful.
 
+    Ready transactions are claimed in chunks using ``SELECT ... FOR UPDATE SKIP
+    LOCKED`` where supported by the database, so multiple instances of this command
+    can execute transactions in parallel. Claims are leases that are renewed until
+    transactions are executed. If the process claiming a transaction dies, the
+    transaction can be claimed again once its lease expires.
+
+    If the registered :class:`~polaris.integrations.RailsIntegration` implements
+    :meth:`~polaris.integrations.RailsIntegration.aexecute_outgoing_transaction`, it
+    is awaited instead, for up to ``--concurrency`` transactions at a time.
+
     **Optional arguments:**
 
         -h, --help            show this help message and exit
@@ -39,6 +96,17 @@ class Command(BaseCommand):
         --interval INTERVAL, -i INTERVAL
                               The number of seconds to wait before restarting
                               command. Defaults to 30.
+        --concurrency CONCURRENCY, -c CONCURRENCY
+                              The number of threads calling
+                              execute_outgoing_transaction(), or the number of
+                              concurrent aexecute_outgoing_transaction() calls if
+                              implemented. Defaults to 1.
+        --chunk-size CHUNK_SIZE
+                              The maximum number of transactions claimed at a
+                              time. Defaults to 100.
+        --lease LEASE         The number of seconds a claimed transaction cannot
+                              be claimed by another process if not renewed.
+                              Defaults to 300.
     """
 
     def __init__(self, *args, **kwargs):
@@ -75,24 +143,126 @@ class Command(BaseCommand):
                 "Defaults to {}.".format(DEFAULT_INTERVAL)
             ),
         )
+        parser.add_argument(
+            "--concurrency",
+            "-c",
+            type=int,
+            help=(
+                "The number of threads calling execute_outgoing_transaction(), or "
+                "the number of concurrent aexecute_outgoing_transaction() calls if "
+                "implemented. Defaults to 1."
+            ),
+        )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help=(
+                "The maximum number of transactions claimed at a time. "
+                "Defaults to {}.".format(DEFAULT_CHUNK_SIZE)
+            ),
+        )
+        parser.add_argument(
+            "--lease",
+            type=int,
+            help=(
+                "The number of seconds a claimed transaction cannot be claimed by "
+                "another process if not renewed. Defaults to {}.".format(DEFAULT_LEASE)
+            ),
+        )
 
     def handle(self, *_args, **options):  # pragma: no cover
-        module = sys.modules[__name__]
+        kwargs = {
+            "concurrency": options.get("concurrency") or 1,
+            "chunk_size": options.get("chunk_size") or DEFAULT_CHUNK_SIZE,
+            "lease": options.get("lease") or DEFAULT_LEASE,
+        }
         if options.get("loop"):
-            while True:
-                if module.TERMINATE:
-                    break
-                self.execute_outgoing_transactions()
-                self.sleep(options.get("interval") or DEFAULT_INTERVAL)
+            from polaris.management.commands.polaris_worker import PolarisWorker
+
+            PolarisWorker(
+                {
+                    "execute_outgoing_transactions": options.get("interval")
+                    or DEFAULT_INTERVAL
+                },
+                task_options={"execute_outgoing_transactions": kwargs},
+            ).start()
         else:
-            self.execute_outgoing_transactions()
+            self.execute_outgoing_transactions(**kwargs)
 
     @staticmethod
-    def execute_outgoing_transactions():
+    def execute_outgoing_transactions(
+        concurrency: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        lease: int = DEFAULT_LEASE,
+    ):
         """
         Execute pending withdrawals.
+
+        Claims up to `chunk_size` ready transactions at a time and executes them
+        until no ready transactions remain, using `concurrency` threads if greater
+        than 1. Each transaction is executed at most once per call, so transactions
+        released after failing to execute are retried by the next call. If the anchor implements ``aexecute_outgoing_transaction()``, up to
+        `concurrency` calls are awaited at a time on a single thread instead. The
+        leases of claimed transactions are renewed by a :class:`LeaseRenewer` until
+        they are executed.
         """
         module = sys.modules[__name__]
+        num_completed = 0
+        attempted = set()
+        renewer = LeaseRenewer(lease)
+        renewer.start()
+        hook = get_async_hook(rri, "execute_outgoing_transaction")
+        pool = (
+            ThreadPoolExecutor(max_workers=concurrency)
+            if concurrency > 1 and not hook
+            else None
+        )
+
+        def execute(transaction: Transaction) -> bool:
+            try:
+                return Command.execute_transaction(transaction)
+            finally:
+                renewer.remove(transaction)
+                if pool:
+                    connections.close_all()
+
+        try:
+            while not module.TERMINATE:
+                transactions = Command.claim_transactions(chunk_size, lease, attempted)
+                if not transactions:
+                    break
+                attempted.update(t.id for t in transactions)
+                logger.info(f"Executing {len(transactions)} outgoing transactions")
+                renewer.add(transactions)
+                if hook:
+                    results = asyncio.run(
+                        Command.aexecute_transactions(
+                            transactions, hook, concurrency, renewer
+                        )
+                    )
+                else:
+                    results = (pool.map if pool else map)(execute, transactions)
+                num_completed += sum(results)
+                if len(transactions) < chunk_size:
+                    break
+        finally:
+            renewer.stop()
+            if pool:
+                pool.shutdown()
+
+        if num_completed:
+            logger.info(f"{num_completed} transfers have been completed")
+
+    @staticmethod
+    def claim_transactions(
+        chunk_size: int, lease: int, attempted: Iterable = ()
+    ) -> List[Transaction]:
+        """
+        Claims up to `chunk_size` transactions ready to be executed for `lease`
+        seconds, excluding the IDs in `attempted`. Transactions locked or claimed
+        by another process are skipped, unless the other process' lease has
+        expired.
+        """
         sep31_qparams = Q(
             protocol=Transaction.PROTOCOL.sep31,
             status=Transaction.STATUS.pending_receiver,
@@ -106,144 +276,215 @@ class Command(BaseCommand):
                 getattr(Transaction.KIND, "withdrawal-exchange"),
             ],
         )
+        now = datetime.now(timezone.utc)
         with django.db.transaction.atomic():
             transactions = list(
                 Transaction.objects.filter(
-                    sep6_24_qparams | sep31_qparams, pending_execution_attempt=False
-                ).select_for_update()
+                    sep6_24_qparams | sep31_qparams,
+                    Q(pending_execution_attempt=False) | Q(lease_expires_at__lt=now),
+                )
+                .exclude(id__in=attempted)
+                .select_for_update(skip_locked=True)
+                .order_by("started_at")[:chunk_size]
             )
-            ids = []
+            lease_expires_at = now + timedelta(seconds=lease)
             for t in transactions:
                 t.pending_execution_attempt = True
-                ids.append(t.id)
-            Transaction.objects.filter(id__in=ids).update(
-                pending_execution_attempt=True
+                t.lease_expires_at = lease_expires_at
+            Transaction.objects.filter(id__in=[t.id for t in transactions]).update(
+                pending_execution_attempt=True, lease_expires_at=lease_expires_at
             )
+        return transactions
 
-        if transactions:
-            logger.info(f"Executing {len(transactions)} outgoing transactions")
-        num_completed = 0
-        for i, transaction in enumerate(transactions):
-            if module.TERMINATE:
-                still_processing_transactions = transactions[i:]
-                Transaction.objects.filter(
-                    id__in=[t.id for t in still_processing_transactions]
-                ).update(pending_execution_attempt=False)
-                break
+    @staticmethod
+    def execute_transaction(transaction: Transaction) -> bool:
+        """
+        Calls :meth:`~polaris.integrations.RailsIntegration.execute_outgoing_transaction`
+        for a claimed transaction and validates the updates made to it. Returns
+        ``True`` if the transaction was completed.
+        """
+        module = sys.modules[__name__]
+        if module.TERMINATE:
+            Command.release_transaction(transaction)
+            return False
 
-            logger.info(f"Calling execute_outgoing_transaction() for {transaction.id}")
-            try:
-                rri.execute_outgoing_transaction(transaction)
-            except NotImplementedError:
-                logger.error(
-                    "RailsIntegration.execute_outgoing_transaction() is not implemented"
-                )
-                module.TERMINATE = True
-                break
-            except Exception:
-                transaction.pending_execution_attempt = False
-                transaction.save()
-                logger.exception(
-                    "execute_outgoing_transactions() threw an unexpected exception"
-                )
-                continue
-
-            transaction.refresh_from_db()
-            if (
-                transaction.protocol == Transaction.PROTOCOL.sep31
-                and transaction.status == Transaction.STATUS.pending_receiver
-            ) or (
-                transaction.protocol
-                in [Transaction.PROTOCOL.sep24, Transaction.PROTOCOL.sep6]
-                and transaction.status == transaction.STATUS.pending_anchor
-            ):
-                transaction.pending_execution_attempt = False
+        logger.info(f"Calling execute_outgoing_transaction() for {transaction.id}")
+        try:
+            rri.execute_outgoing_transaction(transaction)
+        except Exception as e:
+            Command.handle_execution_error(
+                transaction, e, "execute_outgoing_transaction"
+            )
+            return False
+        return Command.validate_executed_transaction(transaction)
+
+    @staticmethod
+    async def aexecute_transactions(
+        transactions: List[Transaction],
+        hook: Callable,
+        concurrency: int,
+        renewer: LeaseRenewer,
+    ) -> List[bool]:
+        """
+        Awaits `hook`, the anchor's
+        :meth:`~polaris.integrations.RailsIntegration.aexecute_outgoing_transaction`,
+        for up to `concurrency` of the claimed `transactions` at a time.
+        """
+        semaphore = asyncio.Semaphore(concurrency)
+
+        async def execute(transaction: Transaction) -> bool:
+            async with semaphore:
+                try:
+                    return await Command.aexecute_transaction(transaction, hook)
+                finally:
+                    renewer.remove(transaction)
+
+        return list(await asyncio.gather(*[execute(t) for t in transactions]))
+
+    @staticmethod
+    async def aexecute_transaction(transaction: Transaction, hook: Callable) -> bool:
+        """
+        The same as :meth:`execute_transaction`, but awaits `hook` instead of
+        calling :meth:`~polaris.integrations.RailsIntegration.execute_outgoing_transaction`.
+        """
+        module = sys.modules[__name__]
+        if module.TERMINATE:
+            await db_sync_to_async(Command.release_transaction)(transaction)
+            return False
+
+        logger.info(f"Calling aexecute_outgoing_transaction() for {transaction.id}")
+        try:
+            await hook(transaction)
+        except Exception as e:
+            await db_sync_to_async(Command.handle_execution_error)(
+                transaction, e, "aexecute_outgoing_transaction"
+            )
+            return False
+        return await db_sync_to_async(Command.validate_executed_transaction)(
+            transaction
+        )
+
+    @staticmethod
+    def release_transaction(transaction: Transaction):
+        Transaction.objects.filter(id=transaction.id).update(
+            pending_execution_attempt=False
+        )
+
+    @staticmethod
+    def handle_execution_error(
+        transaction: Transaction, exception: Exception, function_name: str
+    ):
+        module = sys.modules[__name__]
+        if isinstance(exception, NotImplementedError):
+            logger.error(f"RailsIntegration.{function_name}() is not implemented")
+            module.TERMINATE = True
+            return
+        transaction.pending_execution_attempt = False
+        transaction.save()
+        logger.error(
+            "execute_outgoing_transactions() threw an unexpected exception",
+            exc_info=exception,
+        )
+
+    @staticmethod
+    def validate_executed_transaction(transaction: Transaction) -> bool:
+        """
+        Validates the updates made to `transaction` by the integration function
+        and saves it. Returns ``True`` if the transaction was completed.
+        """
+        transaction.refresh_from_db()
+        if (
+            transaction.protocol == Transaction.PROTOCOL.sep31
+            and transaction.status == Transaction.STATUS.pending_receiver
+        ) or (
+            transaction.protocol
+            in [Transaction.PROTOCOL.sep24, Transaction.PROTOCOL.sep6]
+            and transaction.status == transaction.STATUS.pending_anchor
+        ):
+            transaction.pending_execution_attempt = False
+            if transaction.quote:
+                transaction.quote.save()
+            transaction.save()
+            logger.error(
+                f"Transaction {transaction.id} status must be "
+                f"updated after call to execute_outgoing_transaction()"
+            )
+            return False
+        elif transaction.status in [
+            Transaction.STATUS.pending_external,
+            Transaction.STATUS.completed,
+        ]:
+            if transaction.amount_fee is None or transaction.amount_out is None:
                 if transaction.quote:
+                    err_msg = (
+                        f"transaction {transaction.id} uses a quote but was returned "
+                        "from execute_outgoing_transaction() without amount_fee or amount_out "
+                        "assigned, skipping"
+                    )
+                    logger.error(err_msg)
+                    transaction.message = err_msg
+                    transaction.pending_execution_attempt = False
                     transaction.quote.save()
-                transaction.save()
-                logger.error(
-                    f"Transaction {transaction.id} status must be "
-                    f"updated after call to execute_outgoing_transaction()"
+                    transaction.save()
+                    return False
+                logger.warning(
+                    f"transaction {transaction.id} was returned from execute_outgoing_transaction() "
+                    "without Transaction.amount_fee or Transaction.amount_out assigned. Future Polaris "
+                    "releases will not calculate fees and delivered amounts."
                 )
-                continue
-            elif transaction.status in [
-                Transaction.STATUS.pending_external,
-                Transaction.STATUS.completed,
-            ]:
-                if transaction.amount_fee is None or transaction.amount_out is None:
-                    if transaction.quote:
-                        err_msg = (
-                            f"transaction {transaction.id} uses a quote but was returned "
-                            "from execute_outgoing_transaction() without amount_fee or amount_out "
-                            "assigned, skipping"
+            if transaction.amount_fee is None:
+                if not transaction.quote and registered_fee_func is calculate_fee:
+                    op = {
+                        Transaction.KIND.withdrawal: settings.OPERATION_WITHDRAWAL,
+                        getattr(
+                            Transaction.KIND, "withdrawal-exchange"
+                        ): settings.OPERATION_WITHDRAWAL,
+                        Transaction.KIND.send: settings.OPERATION_SEND,
+                    }[transaction.kind]
+                    try:
+                        transaction.amount_fee = calculate_fee(
+                            {
+                                "amount": transaction.amount_in,
+                                "operation": op,
+                                "asset_code": transaction.asset.code,
+                            }
                         )
-                        logger.error(err_msg)
-                        transaction.message = err_msg
+                    except ValueError:
                         transaction.pending_execution_attempt = False
-                        transaction.quote.save()
                         transaction.save()
-                        continue
-                    logger.warning(
-                        f"transaction {transaction.id} was returned from execute_outgoing_transaction() "
-                        "without Transaction.amount_fee or Transaction.amount_out assigned. Future Polaris "
-                        "releases will not calculate fees and delivered amounts."
-                    )
-                if transaction.amount_fee is None:
-                    if not transaction.quote and registered_fee_func is calculate_fee:
-                        op = {
-                            Transaction.KIND.withdrawal: settings.OPERATION_WITHDRAWAL,
-                            getattr(
-                                Transaction.KIND, "withdrawal-exchange"
-                            ): settings.OPERATION_WITHDRAWAL,
-                            Transaction.KIND.send: settings.OPERATION_SEND,
-                        }[transaction.kind]
-                        try:
-                            transaction.amount_fee = calculate_fee(
-                                {
-                                    "amount": transaction.amount_in,
-                                    "operation": op,
-                                    "asset_code": transaction.asset.code,
-                                }
-                            )
-                        except ValueError:
-                            transaction.pending_execution_attempt = False
-                            transaction.save()
-                            logger.exception("Unable to calculate fee")
-                            continue
-                    else:
-                        transaction.amount_fee = Decimal(0)
-                if not transaction.quote:
-                    transaction.amount_out = round(
-                        transaction.amount_in - transaction.amount_fee,
-                        transaction.asset.significant_decimals,
-                    )
-                # Anchors can mark transactions as pending_external if the transfer
-                # cannot be completed immediately due to external processing.
-                # poll_outgoing_transactions will check on these transfers and mark them
-                # as complete when the funds have been received by the user.
-                if transaction.status == Transaction.STATUS.completed:
-                    num_completed += 1
-                    transaction.completed_at = datetime.now(timezone.utc)
-            elif transaction.status not in [
-                Transaction.STATUS.error,
-                Transaction.STATUS.pending_transaction_info_update,
-                Transaction.STATUS.pending_customer_info_update,
-            ]:
-                transaction.pending_execution_attempt = False
-                if transaction.quote:
-                    transaction.save()
-                transaction.save()
-                logger.error(
-                    f"Transaction {transaction.id} was moved to invalid status"
-                    f" {transaction.status}"
+                        logger.exception("Unable to calculate fee")
+                        return False
+                else:
+                    transaction.amount_fee = Decimal(0)
+            if not transaction.quote:
+                transaction.amount_out = round(
+                    transaction.amount_in - transaction.amount_fee,
+                    transaction.asset.significant_decimals,
                 )
-                continue
-
+            # Anchors can mark transactions as pending_external if the transfer
+            # cannot be completed immediately due to external processing.
+            # poll_outgoing_transactions will check on these transfers and mark them
+            # as complete when the funds have been received by the user.
+            if transaction.status == Transaction.STATUS.completed:
+                transaction.completed_at = datetime.now(timezone.utc)
+        elif transaction.status not in [
+            Transaction.STATUS.error,
+            Transaction.STATUS.pending_transaction_info_update,
+            Transaction.STATUS.pending_customer_info_update,
+        ]:
             transaction.pending_execution_attempt = False
             if transaction.quote:
-                transaction.quote.save()
+                transaction.save()
             transaction.save()
-            maybe_make_callback(transaction)
+            logger.error(
+                f"Transaction {transaction.id} was moved to invalid status"
+                f" {transaction.status}"
+            )
+            return False
 
-        if num_completed:
-            logger.info(f"{num_completed} transfers have been completed")
+        transaction.pending_execution_attempt = False
+        if transaction.quote:
+            transaction.quote.save()
+        transaction.save()
+        maybe_make_callback(transaction)
+        return transaction.status == Transaction.STATUS.completed
@@ -0,0 +1,274 @@
+import signal
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from typing import Callable, Dict, Optional
+
+from django.core.management import BaseCommand, CommandError
+from django.db import close_old_connections
+from stellar_sdk import ServerAsync
+from stellar_sdk.client.aiohttp_client import AiohttpClient
+
+from polaris import settings
+from polaris.models import PolarisHeartbeat
+from polaris.utils import getLogger, db_sync_to_async, shutdown_db_executor
+from polaris.management.commands import (
+    execute_outgoing_transactions,
+    poll_outgoing_transactions,
+    process_pending_deposits,
+    watch_transactions,
+)
+
+logger = getLogger(__name__)
+SYNC_TASKS = {
+    "execute_outgoing_transactions": execute_outgoing_transactions,
+    "poll_outgoing_transactions": poll_outgoing_transactions,
+}
+TASKS = [
+    "process_pending_deposits",
+    "watch_transactions",
+    "execute_outgoing_transactions",
+    "poll_outgoing_transactions",
+]
+DEFAULT_INTERVALS = {
+    "process_pending_deposits": process_pending_deposits.DEFAULT_INTERVAL,
+    "watch_transactions": None,
+    "execute_outgoing_transactions": execute_outgoing_transactions.DEFAULT_INTERVAL,
+    "poll_outgoing_transactions": poll_outgoing_transactions.DEFAULT_INTERVAL,
+}
+
+
+class PolarisWorker:
+    """
+    Runs Polaris' background processes as tasks of a single event loop.
+
+    `intervals` maps the name of each process to run, one of ``TASKS``, to the
+    number of seconds to wait between runs. ``watch_transactions`` streams
+    continuously and ignores its interval. `task_options` maps process names to
+    keyword arguments passed to the function running them.
+
+    Tasks making requests to Horizon share one ``ServerAsync``, and database
+    queries share the thread pool of :func:`~polaris.utils.db_sync_to_async`. The
+    synchronous ``execute_outgoing_transactions`` and ``poll_outgoing_transactions``
+    processes each run on a thread of their own, and a stop requested by
+    :meth:`stop` or a signal lets them finish the transaction in progress before
+    exiting.
+    """
+
+    def __init__(
+        self,
+        intervals: Dict[str, Optional[int]],
+        task_options: Optional[Dict[str, Dict]] = None,
+    ):
+        unknown = set(intervals) - set(TASKS)
+        if unknown:
+            raise ValueError(f"unknown tasks: {', '.join(sorted(unknown))}")
+        self.intervals = intervals
+        self.task_options = task_options or {}
+        self.executor = ThreadPoolExecutor(
+            max_workers=max(1, len(set(intervals) & set(SYNC_TASKS))),
+            thread_name_prefix="polaris-worker",
+        )
+        self.deposits_lock_acquired = False
+        self._stopping: Optional[asyncio.Event] = None
+
+    def start(self):  # pragma: no cover
+        asyncio.run(self.run())
+
+    def stop(self):
+        """
+        Stops every task. Synchronous processes stop after the transaction they
+        are processing.
+        """
+        logger.info("stopping polaris worker...")
+        for name, module in SYNC_TASKS.items():
+            if name in self.intervals:
+                module.TERMINATE = True
+        if self._stopping:
+            self._stopping.set()
+
+    async def run(self, install_signal_handlers: bool = True):
+        """
+        Runs the tasks until :meth:`stop` is called or one of them raises an
+        exception, in which case the remaining tasks are stopped and the exception
+        is re-raised.
+        """
+        loop = asyncio.get_running_loop()
+        self._stopping = asyncio.Event()
+        if install_signal_handlers:  # pragma: no cover
+            for sig in [signal.SIGINT, signal.SIGTERM]:
+                loop.add_signal_handler(sig, self.stop)
+        try:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                await self._run_tasks(server)
+        finally:
+            if self.deposits_lock_acquired:
+                await db_sync_to_async(
+                    PolarisHeartbeat.objects.filter(
+                        key=process_pending_deposits.PROCESS_PENDING_DEPOSITS_LOCK_KEY
+                    ).delete
+                )()
+                self.deposits_lock_acquired = False
+            await loop.run_in_executor(None, self.executor.shutdown)
+            await loop.run_in_executor(None, shutdown_db_executor)
+            if install_signal_handlers:  # pragma: no cover
+                for sig in [signal.SIGINT, signal.SIGTERM]:
+                    loop.remove_signal_handler(sig)
+
+    async def _run_tasks(self, server: ServerAsync):
+        tasks = [
+            asyncio.create_task(getattr(self, f"run_{name}")(server), name=name)
+            for name in self.intervals
+        ]
+        stopping = asyncio.create_task(self._stopping.wait())
+        await asyncio.wait([stopping, *tasks], return_when=asyncio.FIRST_COMPLETED)
+        stopping.cancel()
+        for task in tasks:
+            task.cancel()
+        results = await asyncio.gather(*tasks, return_exceptions=True)
+        for task, result in zip(tasks, results):
+            if isinstance(result, Exception):
+                logger.error(
+                    f"{task.get_name()} raised an unexpected exception",
+                    exc_info=result,
+                )
+                raise result
+        logger.info("all tasks have been stopped")
+
+    async def run_sync(self, func: Callable, *args, **kwargs):
+        """
+        Calls `func`, a synchronous process, on a thread of its own. Database
+        connections that are unusable or past their maximum age are closed after
+        each call.
+        """
+
+        def call():
+            try:
+                return func(*args, **kwargs)
+            finally:
+                close_old_connections()
+
+        return await asyncio.get_running_loop().run_in_executor(self.executor, call)
+
+    async def run_periodically(self, func: Callable, interval: int):
+        """
+        Calls `func` with :meth:`run_sync` every `interval` seconds until the worker
+        is stopped.
+        """
+        while not self._stopping.is_set():
+            await self.run_sync(func)
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=interval)
+            except asyncio.TimeoutError:
+                pass
+
+    async def run_process_pending_deposits(self, server: ServerAsync):
+        interval = self.intervals["process_pending_deposits"]
+        heartbeat_interval = process_pending_deposits.DEFAULT_HEARTBEAT
+        key = process_pending_deposits.PROCESS_PENDING_DEPOSITS_LOCK_KEY
+        while not await db_sync_to_async(
+            process_pending_deposits.ProcessPendingDeposits.try_acquire_lock
+        )(key, heartbeat_interval):
+            logger.debug(
+                f"unable to acquire lock on key: {key}, "
+                f"retrying in {heartbeat_interval} seconds..."
+            )
+            await asyncio.sleep(heartbeat_interval)
+        self.deposits_lock_acquired = True
+        await process_pending_deposits.ProcessPendingDeposits.run_tasks(
+            interval,
+            heartbeat_interval,
+            server=server,
+            **self.task_options.get("process_pending_deposits", {}),
+        )
+
+    async def run_watch_transactions(self, server: ServerAsync):
+        await watch_transactions.Command().watch_transactions(server=server)
+
+    async def run_execute_outgoing_transactions(self, _server: ServerAsync):
+        await self.run_periodically(
+            partial(
+                execute_outgoing_transactions.Command.execute_outgoing_transactions,
+                **self.task_options.get("execute_outgoing_transactions", {}),
+            ),
+            self.intervals["execute_outgoing_transactions"],
+        )
+
+    async def run_poll_outgoing_transactions(self, _server: ServerAsync):
+        await self.run_periodically(
+            partial(
+                poll_outgoing_transactions.Command.poll_outgoing_transactions,
+                **self.task_options.get("poll_outgoing_transactions", {}),
+            ),
+            self.intervals["poll_outgoing_transactions"],
+        )
+
+
+class Command(BaseCommand):
+    """
+    Runs any subset of the ``process_pending_deposits``, ``watch_transactions``,
+    ``execute_outgoing_transactions``, and ``poll_outgoing_transactions`` processes
+    in a single process and event loop.
+
+    Compared to running each command separately, the processes share one Django
+    application, one connection pool to Horizon, and a pool of
+    ``DB_THREAD_POOL_SIZE`` threads for database queries. SIGINT and SIGTERM stop
+    every process gracefully.
+
+    The processes run with their default options. ``execute_outgoing_transactions``
+    and ``poll_outgoing_transactions`` run as if the ``--loop`` option was used.
+
+    **Optional arguments:**
+
+        -h, --help            show this help message and exit
+        --tasks TASK [TASK ...]
+                              The processes to run. Defaults to all of them.
+        --deposits-interval DEPOSITS_INTERVAL
+                              The number of seconds to wait between runs of the
+                              process_pending_deposits tasks. Defaults to 10.
+        --execute-interval EXECUTE_INTERVAL
+                              The number of seconds to wait between runs of
+                              execute_outgoing_transactions. Defaults to 30.
+        --poll-interval POLL_INTERVAL
+                              The number of seconds to wait between runs of
+                              poll_outgoing_transactions. Defaults to 30.
+    """
+
+    def add_arguments(self, parser):  # pragma: no cover
+        parser.add_argument(
+            "--tasks",
+            nargs="+",
+            choices=TASKS,
+            help="The processes to run. Defaults to all of them.",
+        )
+        for option, task in [
+            ("--deposits-interval", "process_pending_deposits"),
+            ("--execute-interval", "execute_outgoing_transactions"),
+            ("--poll-interval", "poll_outgoing_transactions"),
+        ]:
+            parser.add_argument(
+                option,
+                type=int,
+                help=(
+                    f"The number of seconds to wait between runs of {task}. "
+                    f"Defaults to {DEFAULT_INTERVALS[task]}."
+                ),
+            )
+
+    def handle(self, *_args, **options):  # pragma: no cover
+        intervals = {
+            "process_pending_deposits": options.get("deposits_interval"),
+            "watch_transactions": None,
+            "execute_outgoing_transactions": options.get("execute_interval"),
+            "poll_outgoing_transactions": options.get("poll_interval"),
+        }
+        intervals = {
+            task: intervals[task] or DEFAULT_INTERVALS[task]
+            for task in options.get("tasks") or TASKS
+        }
+        try:
+            PolarisWorker(intervals).start()
+        except ValueError as e:
+            raise CommandError(str(e))
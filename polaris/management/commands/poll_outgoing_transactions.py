@@ -1,17 +1,30 @@
 import sys
 import signal
 import time
+import asyncio
 from datetime import datetime, timezone
+from typing import Callable, Dict, Iterator, List, Optional, Set, Tuple
+
 
 from django.core.management import BaseCommand
+from django.db.models import Q
 
-from polaris.utils import getLogger, maybe_make_callback
+from polaris.utils import (
+    db_sync_to_async,
+    getLogger,
+    gather_chunks,
+    iter_chunks,
+    maybe_make_callback,
+    schedule_next_polls,
+)
 from polaris.models import Transaction
-from polaris.integrations import registered_rails_integration as rri
-
+from polaris.integrations import registered_rails_integration as rri, get_async_hook
 
 logger = getLogger(__name__)
 DEFAULT_INTERVAL = 30
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_BACKOFF_FACTOR = 0.1
+DEFAULT_MAX_POLL_INTERVAL = 86400
 TERMINATE = False
 
 
@@ -24,6 +37,18 @@ class Command(BaseCommand):
     :attr:`~polaris.models.Transaction.status` to ``completed`` if the funds have been
     confirmed to be delivered.
 
+    Only transactions due to be polled are passed, in chunks of at most
+    ``--chunk-size`` transactions. Transactions that are not completed are polled
+    again after a delay proportional to the time they have been polled for, so
+    transfers that take days are polled less frequently than recent ones. The delay
+    is the time since the transaction was first polled in its current status
+    multiplied by ``--backoff-factor``, bounded by ``--interval`` and
+    ``--max-poll-interval``.
+
+    If the registered :class:`~polaris.integrations.RailsIntegration` implements
+    :meth:`~polaris.integrations.RailsIntegration.apoll_outgoing_transactions`, it
+    is awaited instead, for up to ``--concurrency`` chunks at a time.
+
     **Optional arguments:**
 
         -h, --help            show this help message and exit
@@ -32,6 +57,21 @@ class Command(BaseCommand):
         --interval INTERVAL, -i INTERVAL
                               The number of seconds to wait before restarting
                               command. Defaults to 30.
+        --chunk-size CHUNK_SIZE
+                              The maximum number of transactions passed to
+                              poll_outgoing_transactions() at a time. Defaults to
+                              100.
+        --backoff-factor BACKOFF_FACTOR
+                              The fraction of the time since a transaction was
+                              first polled to wait before polling it again.
+                              Defaults to 0.1.
+        --max-poll-interval MAX_POLL_INTERVAL
+                              The maximum number of seconds to wait before polling
+                              a transaction again. Defaults to 86400.
+        --concurrency CONCURRENCY, -c CONCURRENCY
+                              The number of chunks passed to
+                              apoll_outgoing_transactions() at a time, if
+                              implemented. Defaults to 1.
     """
 
     def __init__(self, *args, **kwargs):
@@ -68,38 +108,160 @@ class Command(BaseCommand):
                 "Defaults to {}.".format(DEFAULT_INTERVAL)
             ),
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help=(
+                "The maximum number of transactions passed to "
+                "poll_outgoing_transactions() at a time. "
+                "Defaults to {}.".format(DEFAULT_CHUNK_SIZE)
+            ),
+        )
+        parser.add_argument(
+            "--backoff-factor",
+            type=float,
+            help=(
+                "The fraction of the time since a transaction was first polled to "
+                "wait before polling it again. Defaults to {}.".format(
+                    DEFAULT_BACKOFF_FACTOR
+                )
+            ),
+        )
+        parser.add_argument(
+            "--max-poll-interval",
+            type=int,
+            help=(
+                "The maximum number of seconds to wait before polling a transaction "
+                "again. Defaults to {}.".format(DEFAULT_MAX_POLL_INTERVAL)
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            "-c",
+            type=int,
+            help=(
+                "The number of chunks passed to apoll_outgoing_transactions() at "
+                "a time, if implemented. Defaults to 1."
+            ),
+        )
 
     def handle(self, *_args, **options):  # pragma: no cover
-        module = sys.modules[__name__]
+        kwargs = {
+            "chunk_size": options.get("chunk_size") or DEFAULT_CHUNK_SIZE,
+            "min_poll_interval": options.get("interval") or DEFAULT_INTERVAL,
+            "max_poll_interval": (
+                options.get("max_poll_interval") or DEFAULT_MAX_POLL_INTERVAL
+            ),
+            "backoff_factor": options.get("backoff_factor") or DEFAULT_BACKOFF_FACTOR,
+            "concurrency": options.get("concurrency") or 1,
+        }
         if options.get("loop"):
-            while True:
-                if module.TERMINATE:
-                    break
-                self.poll_outgoing_transactions()
-                self.sleep(options.get("interval") or DEFAULT_INTERVAL)
+            from polaris.management.commands.polaris_worker import PolarisWorker
+
+            PolarisWorker(
+                {
+                    "poll_outgoing_transactions": options.get("interval")
+                    or DEFAULT_INTERVAL
+                },
+                task_options={"poll_outgoing_transactions": kwargs},
+            ).start()
         else:
-            self.poll_outgoing_transactions()
+            self.poll_outgoing_transactions(**kwargs)
 
     @staticmethod
-    def poll_outgoing_transactions():
-        transactions = Transaction.objects.filter(
-            kind__in=[
-                Transaction.KIND.withdrawal,
-                getattr(Transaction.KIND, "withdrawal-exchange"),
-                Transaction.KIND.send,
-            ],
-            status=Transaction.STATUS.pending_external,
+    def poll_outgoing_transactions(
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_poll_interval: int = DEFAULT_INTERVAL,
+        max_poll_interval: int = DEFAULT_MAX_POLL_INTERVAL,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        concurrency: int = 1,
+    ):
+        now = datetime.now(timezone.utc)
+        rows = (
+            Transaction.objects.filter(
+                Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now),
+                kind__in=[
+                    Transaction.KIND.withdrawal,
+                    getattr(Transaction.KIND, "withdrawal-exchange"),
+                    Transaction.KIND.send,
+                ],
+                status=Transaction.STATUS.pending_external,
+            )
+            .values_list("id", "status")
+            .iterator(chunk_size=chunk_size)
         )
-        try:
-            complete_transactions = rri.poll_outgoing_transactions(transactions)
-        except NotImplementedError:
-            module = sys.modules[__name__]
-            module.TERMINATE = True
-            return
-        except Exception:
-            logger.exception("An exception was raised by poll_pending_transfers()")
+        backoff = {
+            "min_poll_interval": min_poll_interval,
+            "max_poll_interval": max_poll_interval,
+            "backoff_factor": backoff_factor,
+        }
+        hook = get_async_hook(rri, "poll_outgoing_transactions")
+        if hook:
+            asyncio.run(
+                Command.apoll_outgoing_transactions(
+                    hook, rows, chunk_size, concurrency, backoff
+                )
+            )
             return
+        for chunk in iter_chunks(rows, chunk_size):
+            transactions = Transaction.objects.filter(id__in=[row[0] for row in chunk])
+            try:
+                complete_transactions = rri.poll_outgoing_transactions(transactions)
+            except NotImplementedError:
+                module = sys.modules[__name__]
+                module.TERMINATE = True
+                break
+            except Exception:
+                logger.exception("An exception was raised by poll_pending_transfers()")
+                break
+            if Command.complete_chunk(chunk, complete_transactions, backoff) is None:
+                break
+
+    @staticmethod
+    async def apoll_outgoing_transactions(
+        hook: Callable,
+        rows: Iterator[Tuple],
+        chunk_size: int,
+        concurrency: int,
+        backoff: Dict,
+    ):
+        """
+        Awaits `hook`, the anchor's
+        :meth:`~polaris.integrations.RailsIntegration.apoll_outgoing_transactions`,
+        for up to `concurrency` chunks of `rows` at a time.
+        """
+
+        async def poll(chunk: List[Tuple]) -> Optional[Set]:
+            transactions = await db_sync_to_async(list)(
+                Transaction.objects.filter(id__in=[row[0] for row in chunk])
+            )
+            try:
+                complete_transactions = await hook(transactions)
+            except NotImplementedError:
+                module = sys.modules[__name__]
+                module.TERMINATE = True
+                return None
+            except Exception:
+                logger.exception(
+                    "An exception was raised by apoll_outgoing_transactions()"
+                )
+                return None
+            return await db_sync_to_async(Command.complete_chunk)(
+                chunk, complete_transactions, backoff
+            )
+
+        await gather_chunks(rows, chunk_size, concurrency, poll)
 
+    @staticmethod
+    def complete_chunk(
+        chunk: List[Tuple], complete_transactions: List[Transaction], backoff: Dict
+    ) -> Optional[Set]:
+        """
+        Updates the `complete_transactions` returned for `chunk` to ``completed``
+        and schedules the next poll of the rest. Returns the IDs of the completed
+        transactions, or ``None`` if the integration function returned an invalid
+        value.
+        """
         if not (
             isinstance(complete_transactions, list)
             and all(isinstance(t, Transaction) for t in complete_transactions)
@@ -107,9 +269,9 @@ class Command(BaseCommand):
             logger.exception(
                 "invalid return type, expected a list of Transaction objects"
             )
-            return
+            return None
 
-        ids = [t.id for t in complete_transactions]
+        ids = {t.id for t in complete_transactions}
         if ids:
             num_completed = Transaction.objects.filter(id__in=ids).update(
                 status=Transaction.STATUS.completed,
@@ -118,3 +280,5 @@ class Command(BaseCommand):
             logger.info(f"{num_completed} pending transfers have been completed")
         for t in complete_transactions:
             maybe_make_callback(t)
+        schedule_next_polls([row for row in chunk if row[0] not in ids], **backoff)
+        return ids
@@ -1,14 +1,14 @@
-import signal
 import time
 import datetime
 import asyncio
 from decimal import Decimal
 from enum import Enum
-from typing import List, Optional, Dict, Union
-from collections import defaultdict
+from typing import Callable, Iterator, List, NamedTuple, Optional, Dict, Tuple, Union
+from uuid import UUID
+from collections import Counter, defaultdict, deque
 
 import django.db.transaction
-from django.core.management import BaseCommand
+from django.core.management import BaseCommand, CommandError
 from django.db.models import Q
 from stellar_sdk import (
     Keypair,
@@ -20,14 +20,17 @@ from stellar_sdk import (
 )
 from stellar_sdk.client.aiohttp_client import AiohttpClient
 from stellar_sdk.exceptions import ConnectionError
-from asgiref.sync import sync_to_async
 
 from polaris import settings
 from polaris.utils import (
+    db_sync_to_async,
+    gather_chunks,
     is_pending_trust,
+    iter_chunks,
     maybe_make_callback,
     maybe_make_callback_async,
     get_account_obj_async,
+    schedule_next_polls,
 )
 from polaris.integrations import (
     registered_deposit_integration as rdi,
@@ -35,6 +38,7 @@ from polaris.integrations import (
     registered_custody_integration as rci,
     registered_fee_func,
     calculate_fee,
+    get_async_hook,
 )
 
 from polaris.exceptions import (
@@ -43,7 +47,7 @@ from polaris.exceptions import (
     TransactionSubmissionFailed,
 )
 
-from polaris.models import Transaction, PolarisHeartbeat
+from polaris.models import Asset, Transaction, PolarisHeartbeat
 from polaris.utils import getLogger
 
 logger = getLogger(__name__)
@@ -58,23 +62,204 @@ SUBMIT_TRANSACTION_QUEUE = "SUBMIT_TRANSACTION_QUEUE"
 
 DEFAULT_HEARTBEAT = 5
 DEFAULT_INTERVAL = 10
+DEFAULT_CHUNK_SIZE = 100
+DEFAULT_BACKOFF_FACTOR = 0.1
+DEFAULT_MAX_POLL_INTERVAL = 3600
+DEFAULT_STALE_POLL_INTERVAL = 86400
 
 RECOVER_LOCK_LOWER_BOUND = 30
 PROCESS_PENDING_DEPOSITS_LOCK_KEY = "PROCESS_PENDING_DEPOSITS_LOCK"
 
+# priority classes of SUBMIT_TRANSACTION_QUEUE entries
+PRIORITY_FIRST_ATTEMPT = "first_attempt"
+PRIORITY_RETRY = "retry"
+
+
+class QueuedTransaction(NamedTuple):
+    """
+    An entry of a :class:`PolarisQueueAdapter` queue. The ``Transaction`` itself
+    is loaded from the database when the entry is consumed.
+    """
+
+    id: UUID
+    # the distribution account that will submit the transaction, if known
+    source_account: Optional[str]
+    queued_at: Optional[datetime.datetime]
+    # PRIORITY_FIRST_ATTEMPT, or PRIORITY_RETRY for re-queued transactions
+    priority_class: str = PRIORITY_FIRST_ATTEMPT
+
+
+class QueueWaitStats:
+    """
+    The time entries of a priority class waited in a queue before being consumed.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def record(self, wait: float):
+        self.count += 1
+        self.total += wait
+        self.max = max(self.max, wait)
+
+    def __repr__(self):
+        return (
+            f"QueueWaitStats(count={self.count}, mean={self.mean:.3f}, "
+            f"max={self.max:.3f})"
+        )
+
+
+class SubmissionScheduler:
+    """
+    A queue of :class:`QueuedTransaction` entries that, instead of being strictly
+    first-in first-out, shares submissions fairly between source accounts.
+
+    Entries of a higher priority class, in the order of `priorities`, are always
+    consumed first. If `priorities` is ``None``, every class has the same priority.
+    Among the source accounts with entries of the same priority, entries are
+    consumed using smooth weighted round-robin, each account getting a share
+    of submissions proportional to its weight in `weights`, 1 by default. Entries
+    of the same account are consumed in the order they were queued.
+
+    If `max_in_flight_per_account` is set, entries of an account that has that
+    many entries consumed but not yet passed to :meth:`task_done` are skipped
+    until one is.
+    """
+
+    def __init__(
+        self,
+        weights: Optional[Dict[str, int]] = None,
+        priorities: Optional[List[str]] = None,
+        max_in_flight_per_account: Optional[int] = None,
+    ):
+        self.weights = weights or {}
+        self.priorities = priorities
+        self.max_in_flight_per_account = max_in_flight_per_account
+        self.pending: Dict[int, Dict[Optional[str], deque]] = defaultdict(dict)
+        self.current_weights: Dict[Optional[str], int] = defaultdict(int)
+        self.in_flight: Counter = Counter()
+        self.wait_stats: Dict[str, QueueWaitStats] = defaultdict(QueueWaitStats)
+        self._size = 0
+        self._changed = asyncio.Event()
+
+    def rank(self, priority_class: str) -> int:
+        if self.priorities is None or priority_class not in self.priorities:
+            return len(self.priorities or [])
+        return self.priorities.index(priority_class)
+
+    def put_nowait(self, entry: QueuedTransaction):
+        accounts = self.pending[self.rank(entry.priority_class)]
+        accounts.setdefault(entry.source_account, deque()).append(entry)
+        self._size += 1
+        self._changed.set()
+
+    def get_nowait(self) -> QueuedTransaction:
+        """
+        Returns the next entry, or raises ``asyncio.QueueEmpty`` if no entry can
+        be consumed.
+        """
+        for rank in sorted(self.pending):
+            accounts = self.pending[rank]
+            eligible = [
+                account for account in accounts if not self.at_capacity(account)
+            ]
+            if not eligible:
+                continue
+            total_weight = 0
+            for account in eligible:
+                weight = self.weights.get(account, 1)
+                self.current_weights[account] += weight
+                total_weight += weight
+            account = max(eligible, key=lambda a: self.current_weights[a])
+            self.current_weights[account] -= total_weight
+            entry = accounts[account].popleft()
+            if not accounts[account]:
+                del accounts[account]
+                if not any(account in other for other in self.pending.values()):
+                    # an account idle for a while shouldn't catch up on the others
+                    del self.current_weights[account]
+            if not accounts:
+                del self.pending[rank]
+            self._size -= 1
+            if account is not None:
+                self.in_flight[account] += 1
+            if entry.queued_at:
+                self.wait_stats[entry.priority_class].record(
+                    (
+                        datetime.datetime.now(datetime.timezone.utc) - entry.queued_at
+                    ).total_seconds()
+                )
+            return entry
+        raise asyncio.QueueEmpty()
+
+    async def get(self) -> QueuedTransaction:
+        """
+        Returns the next entry, waiting for one to be queued or for an account to
+        be under its in-flight cap if necessary.
+        """
+        while True:
+            try:
+                return self.get_nowait()
+            except asyncio.QueueEmpty:
+                self._changed.clear()
+                await self._changed.wait()
+
+    def task_done(self, source_account: Optional[str]):
+        """
+        Indicates that an entry of `source_account` has been processed.
+        """
+        if self.in_flight[source_account] > 0:
+            self.in_flight[source_account] -= 1
+            self._changed.set()
+
+    def at_capacity(self, source_account: Optional[str]) -> bool:
+        return (
+            source_account is not None
+            and self.max_in_flight_per_account is not None
+            and self.in_flight[source_account] >= self.max_in_flight_per_account
+        )
+
+    def empty(self) -> bool:
+        return self._size == 0
+
+    def qsize(self) -> int:
+        return self._size
+
 
 class PolarisQueueAdapter:
-    def __init__(self, queues):
-        self.queues: Dict[str, asyncio.Queue] = {}
+    """
+    The in-memory queues of transactions to be processed.
+
+    Each queue is a :class:`SubmissionScheduler` created with `weights`,
+    `priorities`, and `max_in_flight_per_account`.
+    """
+
+    def __init__(
+        self,
+        queues,
+        weights: Optional[Dict[str, int]] = None,
+        priorities: Optional[List[str]] = None,
+        max_in_flight_per_account: Optional[int] = None,
+    ):
+        self.queues: Dict[str, SubmissionScheduler] = {}
         for queue in queues:
-            self.queues[queue] = asyncio.Queue()
+            self.queues[queue] = SubmissionScheduler(
+                weights, priorities, max_in_flight_per_account
+            )
+        self.source_accounts: Dict[int, Optional[str]] = {}
 
     def populate_queues(self):
         """
         populate_queues gets called to read from the database and populate the in-memory queues
         """
         logger.debug("initializing queues from database...")
-        ready_transactions = (
+        ready_transactions = list(
             Transaction.objects.filter(
                 queue=SUBMIT_TRANSACTION_QUEUE,
                 submission_status__in=[
@@ -88,45 +273,146 @@ class PolarisQueueAdapter:
                 queued_at__isnull=False,
             )
             .order_by("queued_at")
-            .select_related("asset")
+            .values_list("id", "asset_id", "queued_at", "submission_status")
+        )
+        assets = Asset.objects.in_bulk(
+            {asset_id for _, asset_id, _, _ in ready_transactions}
         )
 
         logger.debug(
             f"found {len(ready_transactions)} transactions to queue for submit_transaction_task"
         )
-        for transaction in ready_transactions:
-            self.queue_transaction(
-                "populate_queues", SUBMIT_TRANSACTION_QUEUE, transaction
+        for transaction_id, asset_id, queued_at, status in ready_transactions:
+            # 'processing' transactions were being submitted when Polaris stopped
+            self.queue_entry(
+                "populate_queues",
+                SUBMIT_TRANSACTION_QUEUE,
+                QueuedTransaction(
+                    transaction_id,
+                    self.get_source_account(assets[asset_id]),
+                    queued_at,
+                    (
+                        PRIORITY_RETRY
+                        if status == Transaction.SUBMISSION_STATUS.processing
+                        else PRIORITY_FIRST_ATTEMPT
+                    ),
+                ),
             )
 
-    def queue_transaction(self, source_task_name, queue_name, transaction):
+    def get_source_account(self, asset: Asset) -> Optional[str]:
+        """
+        Returns the distribution account of `asset`, or ``None`` if the registered
+        CustodyIntegration does not implement ``get_distribution_account()``.
+        """
+        if asset.id not in self.source_accounts:
+            try:
+                self.source_accounts[asset.id] = rci.get_distribution_account(
+                    asset=asset
+                )
+            except NotImplementedError:
+                self.source_accounts[asset.id] = None
+        return self.source_accounts[asset.id]
+
+    def queue_transaction(
+        self,
+        source_task_name,
+        queue_name,
+        transaction,
+        priority_class=PRIORITY_FIRST_ATTEMPT,
+    ):
         """
         Put the given transaction into a queue
         @param: source_task_name - the task that queued this transaction
         @param: queue_name - name of the queue to put the Transaction in
         @param: transaction - the Transaction to put in the queue
+        @param: priority_class - PRIORITY_FIRST_ATTEMPT or PRIORITY_RETRY
         """
+        self.queue_entry(
+            source_task_name,
+            queue_name,
+            QueuedTransaction(
+                transaction.id,
+                self.get_source_account(transaction.asset),
+                transaction.queued_at,
+                priority_class,
+            ),
+        )
+
+    def queue_entry(self, source_task_name, queue_name, entry: QueuedTransaction):
         logger.debug(
-            f"{source_task_name} - putting transaction {transaction.id} into {queue_name}"
+            f"{source_task_name} - putting transaction {entry.id} into {queue_name}"
         )
-        self.queues[queue_name].put_nowait(transaction)
+        self.queues[queue_name].put_nowait(entry)
 
     async def get_transaction(self, source_task_name, queue_name) -> Transaction:
         """
         Consume a transaction from a queue
         @param: source_task_name - the task that is requesting a Transaction
         @param: queue_name - name of the queue to consume the Transaction from
+
+        The transaction is loaded from the database. Entries whose transaction has
+        since been removed from the queue are skipped.
         """
         logger.debug(f"{source_task_name} requesting task from queue: {queue_name}")
-        transaction = await self.queues[queue_name].get()
-        logger.debug(f"{source_task_name} got transaction: {transaction}")
+        while True:
+            entry = await self.queues[queue_name].get()
+            transaction = await db_sync_to_async(self.load_transaction)(
+                queue_name, entry
+            )
+            if transaction:
+                break
+            logger.debug(
+                f"{source_task_name} skipping transaction {entry.id}, "
+                f"no longer in {queue_name}"
+            )
+            self.queues[queue_name].task_done(entry.source_account)
+        logger.debug(
+            f"{source_task_name} got transaction: {transaction}, "
+            f"{entry.priority_class} wait: "
+            f"{self.queues[queue_name].wait_stats[entry.priority_class]}"
+        )
         return transaction
 
+    def transaction_done(self, queue_name, transaction: Transaction):
+        """
+        Indicates that a transaction returned by :meth:`get_transaction` has been
+        processed, allowing another transaction of the same source account to be
+        consumed if the queue caps in-flight transactions per account.
+        """
+        self.queues[queue_name].task_done(self.get_source_account(transaction.asset))
+
+    def queue_wait_stats(self, queue_name) -> Dict[str, QueueWaitStats]:
+        """
+        Returns the time transactions of each priority class waited in the queue.
+        """
+        return dict(self.queues[queue_name].wait_stats)
+
+    @staticmethod
+    def load_transaction(
+        queue_name: str, entry: QueuedTransaction
+    ) -> Optional[Transaction]:
+        return (
+            Transaction.objects.filter(
+                id=entry.id,
+                queue=queue_name,
+                submission_status__in=[
+                    Transaction.SUBMISSION_STATUS.ready,
+                    Transaction.SUBMISSION_STATUS.processing,
+                ],
+            )
+            .select_related("asset", "quote")
+            .first()
+        )
+
 
 class ProcessPendingDeposits:
     @classmethod
     async def check_rails_task(
-        cls, queues: PolarisQueueAdapter, interval
+        cls,
+        queues: PolarisQueueAdapter,
+        interval,
+        poll_options: Optional[Dict] = None,
+        server: Optional[ServerAsync] = None,
     ):  # pragma: no cover
         """
         Periodically poll for deposit transactions that are ready to be processed
@@ -134,28 +420,51 @@ class ProcessPendingDeposits:
         """
         logger.debug("check_rails_task started...")
         while True:
-            await cls.check_rails_for_ready_transactions(queues)
+            await cls.check_rails_for_ready_transactions(
+                queues, server=server, **(poll_options or {})
+            )
             await asyncio.sleep(interval)
 
     @classmethod
-    async def check_rails_for_ready_transactions(cls, queues: PolarisQueueAdapter):
-        ready_transactions = await sync_to_async(cls.get_ready_deposits)()
+    async def check_rails_for_ready_transactions(
+        cls,
+        queues: PolarisQueueAdapter,
+        concurrency: int = 1,
+        server: Optional[ServerAsync] = None,
+        **poll_options,
+    ):
+        hook = get_async_hook(rri, "poll_pending_deposits")
+        if hook:
+            ready_transactions = await cls.aget_ready_deposits(
+                hook, concurrency, **poll_options
+            )
+        else:
+            ready_transactions = await db_sync_to_async(cls.get_ready_deposits)(
+                **poll_options
+            )
         if not rci.account_creation_supported:
-            Transaction.objects.filter(
-                id__in=[t.id for t in ready_transactions]
-            ).update(
+            await db_sync_to_async(
+                Transaction.objects.filter(
+                    id__in=[t.id for t in ready_transactions]
+                ).update
+            )(
                 # TODO
                 # we don't have an external status that indicates the user or wallet
                 # needs to fund the account. Placing in pending_user for now.
                 status=Transaction.STATUS.pending_user,
                 submission_status=Transaction.SUBMISSION_STATUS.pending_funding,
+                next_poll_at=None,
+                poll_started_at=None,
             )
             return
-        await cls.check_accounts(queues, ready_transactions)
+        await cls.check_accounts(queues, ready_transactions, server)
 
     @classmethod
     async def check_accounts_task(
-        cls, queues: PolarisQueueAdapter, interval: int
+        cls,
+        queues: PolarisQueueAdapter,
+        interval: int,
+        server: Optional[ServerAsync] = None,
     ):  # pragma: no cover
         """
         Periodically polls accounts to determine if they exist on the Stellar
@@ -168,39 +477,48 @@ class ProcessPendingDeposits:
         """
         logger.debug("check_accounts_task started...")
         while True:
-            transactions = await sync_to_async(cls.get_unfunded_account_transactions)()
-            await cls.check_accounts(queues, transactions)
+            transactions = await db_sync_to_async(
+                cls.get_unfunded_account_transactions
+            )()
+            await cls.check_accounts(queues, transactions, server)
             await asyncio.sleep(interval)
 
     @classmethod
     async def check_accounts(
-        cls, queues: PolarisQueueAdapter, transactions: List[Transaction]
+        cls,
+        queues: PolarisQueueAdapter,
+        transactions: List[Transaction],
+        server: Optional[ServerAsync] = None,
     ):
-        async with ServerAsync(settings.HORIZON_URI, client=AiohttpClient()) as server:
-            for transaction in transactions:
-                try:
-                    _, account_json = await get_account_obj_async(
-                        Keypair.from_public_key(transaction.to_address), server
-                    )
-                except RuntimeError:
-                    # account not found, submitting the transaction will take care of account creation
-                    await sync_to_async(cls.save_as_ready_for_submission)(transaction)
-                    queues.queue_transaction(
-                        "check_accounts_task", SUBMIT_TRANSACTION_QUEUE, transaction
-                    )
-                    continue
-                except ConnectionError:
-                    continue
-                if (
-                    not is_pending_trust(transaction, account_json)
-                    or transaction.claimable_balance_supported
-                ):
-                    await sync_to_async(cls.save_as_ready_for_submission)(transaction)
-                    queues.queue_transaction(
-                        "check_accounts_task", SUBMIT_TRANSACTION_QUEUE, transaction
-                    )
-                else:
-                    await sync_to_async(cls.save_as_pending_trust)(transaction)
+        if server is None:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                return await cls.check_accounts(queues, transactions, server)
+        for transaction in transactions:
+            try:
+                _, account_json = await get_account_obj_async(
+                    Keypair.from_public_key(transaction.to_address), server
+                )
+            except RuntimeError:
+                # account not found, submitting the transaction will take care of account creation
+                await db_sync_to_async(cls.save_as_ready_for_submission)(transaction)
+                queues.queue_transaction(
+                    "check_accounts_task", SUBMIT_TRANSACTION_QUEUE, transaction
+                )
+                continue
+            except ConnectionError:
+                continue
+            if (
+                not is_pending_trust(transaction, account_json)
+                or transaction.claimable_balance_supported
+            ):
+                await db_sync_to_async(cls.save_as_ready_for_submission)(transaction)
+                queues.queue_transaction(
+                    "check_accounts_task", SUBMIT_TRANSACTION_QUEUE, transaction
+                )
+            else:
+                await db_sync_to_async(cls.save_as_pending_trust)(transaction)
 
     @staticmethod
     def get_unfunded_account_transactions():
@@ -234,16 +552,19 @@ class ProcessPendingDeposits:
 
     @classmethod
     async def process_unblocked_transactions(cls, queues: PolarisQueueAdapter):
-        unblocked_transactions = await sync_to_async(cls.get_unblocked_transactions)()
+        unblocked_transactions = await db_sync_to_async(
+            cls.get_unblocked_transactions
+        )()
         for transaction in unblocked_transactions:
             logger.info(
                 f"check_unblocked_transactions_task - saving transaction {transaction.id} as 'ready'"
             )
-            await sync_to_async(cls.save_as_ready_for_submission)(transaction)
+            await db_sync_to_async(cls.save_as_ready_for_submission)(transaction)
             queues.queue_transaction(
                 "check_unblocked_transactions_task",
                 SUBMIT_TRANSACTION_QUEUE,
                 transaction,
+                PRIORITY_RETRY,
             )
 
     @staticmethod
@@ -257,7 +578,10 @@ class ProcessPendingDeposits:
 
     @classmethod
     async def check_trustlines_task(
-        cls, queues: PolarisQueueAdapter, interval: int
+        cls,
+        queues: PolarisQueueAdapter,
+        interval: int,
+        server: Optional[ServerAsync] = None,
     ):  # pragma: no cover
         """
         For all transactions that are pending_trust, load the destination
@@ -265,15 +589,19 @@ class ProcessPendingDeposits:
         established. If a trustline for the requested asset is found, a the
         transaction is queued for submission.
         """
+        if server is None:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                return await cls.check_trustlines_task(queues, interval, server)
         logger.debug("check_trustlines_task started...")
-        async with ServerAsync(settings.HORIZON_URI, client=AiohttpClient()) as server:
-            while True:
-                await cls.check_trustlines(queues, server)
-                await asyncio.sleep(interval)
+        while True:
+            await cls.check_trustlines(queues, server)
+            await asyncio.sleep(interval)
 
     @classmethod
     async def check_trustlines(cls, queues: PolarisQueueAdapter, server: ServerAsync):
-        pending_trust_transactions: List[Transaction] = await sync_to_async(
+        pending_trust_transactions: List[Transaction] = await db_sync_to_async(
             ProcessPendingDeposits.get_pending_trust_transactions
         )()
         for transaction in pending_trust_transactions:
@@ -308,22 +636,35 @@ class ProcessPendingDeposits:
                 )
                 transaction.envelope_xdr = None
                 transaction.stellar_transaction_id = None
-            await sync_to_async(cls.save_as_ready_for_submission)(transaction)
+            await db_sync_to_async(cls.save_as_ready_for_submission)(transaction)
             queues.queue_transaction(
-                "check_trustlines_task", SUBMIT_TRANSACTION_QUEUE, transaction
+                "check_trustlines_task",
+                SUBMIT_TRANSACTION_QUEUE,
+                transaction,
+                PRIORITY_RETRY,
             )
 
     @classmethod
     async def submit_transaction_task(
-        cls, queues: PolarisQueueAdapter, locks: Dict
+        cls,
+        queues: PolarisQueueAdapter,
+        locks: Dict,
+        server: Optional[ServerAsync] = None,
     ):  # pragma: no cover
+        if server is None:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                return await cls.submit_transaction_task(queues, locks, server)
         logger.debug("submit_transaction_task - running...")
-        async with ServerAsync(settings.HORIZON_URI, client=AiohttpClient()) as server:
-            while True:
-                transaction = await queues.get_transaction(
-                    "submit_transaction_task", SUBMIT_TRANSACTION_QUEUE
-                )
+        while True:
+            transaction = await queues.get_transaction(
+                "submit_transaction_task", SUBMIT_TRANSACTION_QUEUE
+            )
+            try:
                 await cls.submit_transaction(transaction, server, locks, queues)
+            finally:
+                queues.transaction_done(SUBMIT_TRANSACTION_QUEUE, transaction)
 
     @classmethod
     async def submit_transaction(
@@ -342,22 +683,30 @@ class ProcessPendingDeposits:
             try:
                 await ProcessPendingDeposits.submit(transaction, server, locks, queues)
             except TransactionSubmissionPending as e:
-                await sync_to_async(cls.handle_submission_exception)(transaction, e)
+                await db_sync_to_async(cls.handle_submission_exception)(transaction, e)
                 attempt += 1
                 continue
             except (TransactionSubmissionBlocked, TransactionSubmissionFailed) as e:
-                await sync_to_async(cls.handle_submission_exception)(transaction, e)
+                await db_sync_to_async(cls.handle_submission_exception)(transaction, e)
             except Exception as e:
                 logger.exception("submit() threw an unexpected exception")
                 message = getattr(e, "message", str(e))
-                await sync_to_async(ProcessPendingDeposits.handle_error)(
+                await db_sync_to_async(ProcessPendingDeposits.handle_error)(
                     transaction, f"{e.__class__.__name__}: {message}"
                 )
                 await maybe_make_callback_async(transaction)
             break
 
     @classmethod
-    def get_ready_deposits(cls) -> List[Transaction]:
+    def get_ready_deposits(
+        cls,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_poll_interval: int = DEFAULT_INTERVAL,
+        max_poll_interval: int = DEFAULT_MAX_POLL_INTERVAL,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        stale_after: Optional[int] = None,
+        stale_poll_interval: int = DEFAULT_STALE_POLL_INTERVAL,
+    ) -> List[Transaction]:
         """
         Polaris' API server processes deposit request and places the associated Transaction
         object in the `pending_user_transfer_start` status when all information necessary to
@@ -369,20 +718,128 @@ class ProcessPendingDeposits:
         transactions that are now available in their off-chain account and therefore ready
         for submission to the Stellar Network. Finally, this function performs various
         validations to ensure the transaction is truly ready and returns them.
+
+        Only deposits due to be polled are queried, using a server-side cursor, and
+        they are passed to the integration function in chunks of `chunk_size`.
+        Deposits that are not returned are scheduled to be polled again using
+        :func:`~polaris.utils.next_poll_delay`.
+        """
+        rows = cls.get_due_deposit_rows(chunk_size)
+        backoff = {
+            "min_poll_interval": min_poll_interval,
+            "max_poll_interval": max_poll_interval,
+            "backoff_factor": backoff_factor,
+            "stale_after": stale_after,
+            "stale_poll_interval": stale_poll_interval,
+        }
+        ready_transactions = []
+        polled = False
+        for chunk in iter_chunks(rows, chunk_size):
+            ready_transactions.extend(cls.poll_chunk(chunk, **backoff))
+            polled = True
+        if not polled:
+            # the integration function is called every tick, as anchors may
+            # rely on it running periodically even when no deposits are due
+            ready_transactions.extend(cls.poll_chunk([], **backoff))
+        return ready_transactions
+
+    @classmethod
+    async def aget_ready_deposits(
+        cls,
+        hook: Callable,
+        concurrency: int = 1,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        min_poll_interval: int = DEFAULT_INTERVAL,
+        max_poll_interval: int = DEFAULT_MAX_POLL_INTERVAL,
+        backoff_factor: float = DEFAULT_BACKOFF_FACTOR,
+        stale_after: Optional[int] = None,
+        stale_poll_interval: int = DEFAULT_STALE_POLL_INTERVAL,
+    ) -> List[Transaction]:
+        """
+        The same as :meth:`get_ready_deposits`, but awaits `hook`, the anchor's
+        ``apoll_pending_deposits()``, for up to `concurrency` chunks at a time.
+        """
+        rows = cls.get_due_deposit_rows(chunk_size)
+        backoff = {
+            "min_poll_interval": min_poll_interval,
+            "max_poll_interval": max_poll_interval,
+            "backoff_factor": backoff_factor,
+            "stale_after": stale_after,
+            "stale_poll_interval": stale_poll_interval,
+        }
+
+        async def poll(chunk: List) -> List[Transaction]:
+            pending_deposits = await db_sync_to_async(list)(
+                Transaction.objects.filter(
+                    id__in=[row[0] for row in chunk]
+                ).select_related("asset", "quote")
+            )
+            ready_transactions = await hook(pending_deposits)
+            return await db_sync_to_async(cls.process_polled_chunk)(
+                chunk, ready_transactions, **backoff
+            )
+
+        results = await gather_chunks(rows, chunk_size, concurrency, poll)
+        if not results:
+            results = [await poll([])]
+        return [t for ready_transactions in results for t in ready_transactions]
+
+    @staticmethod
+    def get_due_deposit_rows(chunk_size: int) -> Iterator[Tuple]:
+        """
+        Returns an iterator over the ``(id, status)`` rows of the deposits due to be
+        polled, read from a server-side cursor in chunks of `chunk_size`.
+        """
+        now = datetime.datetime.now(datetime.timezone.utc)
+        return (
+            Transaction.objects.filter(
+                Q(next_poll_at__isnull=True) | Q(next_poll_at__lte=now),
+                status__in=[
+                    Transaction.STATUS.pending_user_transfer_start,
+                    Transaction.STATUS.pending_external,
+                ],
+                kind__in=[
+                    Transaction.KIND.deposit,
+                    getattr(Transaction.KIND, "deposit-exchange"),
+                ],
+            )
+            .values_list("id", "status")
+            .iterator(chunk_size=chunk_size)
+        )
+
+    @classmethod
+    def poll_chunk(cls, chunk: List, **backoff) -> List[Transaction]:
+        """
+        Passes the deposits of the ``(id, status)`` rows in `chunk` to
+        DepositIntegration.poll_pending_deposits() and returns the verified ready
+        transactions.
         """
         pending_deposits = Transaction.objects.filter(
-            status__in=[
-                Transaction.STATUS.pending_user_transfer_start,
-                Transaction.STATUS.pending_external,
-            ],
-            kind__in=[
-                Transaction.KIND.deposit,
-                getattr(Transaction.KIND, "deposit-exchange"),
-            ],
+            id__in=[row[0] for row in chunk]
         ).select_related("asset", "quote")
 
         ready_transactions = rri.poll_pending_deposits(pending_deposits)
 
+        return cls.process_polled_chunk(chunk, ready_transactions, **backoff)
+
+    @classmethod
+    def process_polled_chunk(
+        cls, chunk: List, ready_transactions: List[Transaction], **backoff
+    ) -> List[Transaction]:
+        """
+        Schedules the next poll of the transactions in `chunk` not returned by the
+        integration function and returns the verified `ready_transactions`.
+        """
+        ready_ids = {t.id for t in ready_transactions}
+        schedule_next_polls(
+            [row for row in chunk if row[0] not in ready_ids], **backoff
+        )
+        return cls.verify_ready_deposits(ready_transactions)
+
+    @classmethod
+    def verify_ready_deposits(
+        cls, ready_transactions: List[Transaction]
+    ) -> List[Transaction]:
         verified_ready_transactions = []
         for transaction in ready_transactions:
             if transaction.amount_fee is None or transaction.amount_out is None:
@@ -512,11 +969,11 @@ class ProcessPendingDeposits:
         logger.info(f"initiating submission for {transaction.id}")
         transaction.status = Transaction.STATUS.pending_anchor
         transaction.submission_status = Transaction.SUBMISSION_STATUS.processing
-        await sync_to_async(transaction.save)()
+        await db_sync_to_async(transaction.save)()
         await maybe_make_callback_async(transaction)
 
         try:
-            distribution_account = await sync_to_async(rci.get_distribution_account)(
+            distribution_account = await db_sync_to_async(rci.get_distribution_account)(
                 asset=transaction.asset
             )
         except NotImplementedError:
@@ -545,9 +1002,9 @@ class ProcessPendingDeposits:
                     f"destination account: {transaction.to_address} not found, creating account..."
                 )
                 transaction_type = TransactionType.CREATE_ACCOUNT
-                transaction_hash = await sync_to_async(rci.create_destination_account)(
-                    transaction=transaction
-                )
+                transaction_hash = await db_sync_to_async(
+                    rci.create_destination_account
+                )(transaction=transaction)
             else:
                 has_trustline = not is_pending_trust(
                     transaction, destination_account_json
@@ -555,7 +1012,7 @@ class ProcessPendingDeposits:
                 if not has_trustline and not transaction.claimable_balance_supported:
                     transaction.queue = None
                     transaction.queued_at = None
-                    await sync_to_async(cls.save_as_pending_trust)(transaction)
+                    await db_sync_to_async(cls.save_as_pending_trust)(transaction)
                     if (
                         distribution_account in locks["source_accounts"]
                         and locks["source_accounts"][distribution_account].locked()
@@ -581,12 +1038,12 @@ class ProcessPendingDeposits:
                     for op in signed_transaction.operations:
                         if isinstance(op, CreateAccount):
                             transaction.envelope_xdr = None
-                            await sync_to_async(transaction.save)()
+                            await db_sync_to_async(transaction.save)()
 
                 transaction_type = TransactionType.DEPOSIT
-                transaction_hash = await sync_to_async(rci.submit_deposit_transaction)(
-                    transaction=transaction, has_trustline=has_trustline
-                )
+                transaction_hash = await db_sync_to_async(
+                    rci.submit_deposit_transaction
+                )(transaction=transaction, has_trustline=has_trustline)
         finally:
             if (
                 distribution_account in locks["source_accounts"]
@@ -603,7 +1060,7 @@ class ProcessPendingDeposits:
         )
 
         if not transaction_json.get("successful"):
-            await sync_to_async(cls.handle_error)(
+            await db_sync_to_async(cls.handle_error)(
                 transaction,
                 "transaction submission failed unexpectedly: "
                 f"{transaction_json['result_xdr']}",
@@ -655,13 +1112,13 @@ class ProcessPendingDeposits:
                 Decimal(transaction.amount_in) - Decimal(transaction.amount_fee),
                 transaction.asset.significant_decimals,
             )
-        await sync_to_async(transaction.save)()
+        await db_sync_to_async(transaction.save)()
         logger.info(f"transaction {transaction.id} completed.")
         await maybe_make_callback_async(transaction)
 
-        await sync_to_async(transaction.refresh_from_db)()
+        await db_sync_to_async(transaction.refresh_from_db)()
         try:
-            await sync_to_async(rdi.after_deposit)(transaction=transaction)
+            await db_sync_to_async(rdi.after_deposit)(transaction=transaction)
         except NotImplementedError:
             pass
         except Exception:
@@ -677,15 +1134,18 @@ class ProcessPendingDeposits:
             f"account: {transaction.to_address} successfully created for transaction: {transaction.id}"
         )
         if transaction.claimable_balance_supported:
-            await sync_to_async(cls.save_as_ready_for_submission)(transaction)
+            await db_sync_to_async(cls.save_as_ready_for_submission)(transaction)
             queues.queue_transaction(
-                "submit_transaction_task", SUBMIT_TRANSACTION_QUEUE, transaction
+                "submit_transaction_task",
+                SUBMIT_TRANSACTION_QUEUE,
+                transaction,
+                PRIORITY_RETRY,
             )
         else:
             transaction.queue = None
             transaction.queued_at = None
             transaction.status_message = None
-            await sync_to_async(cls.save_as_pending_trust)(transaction)
+            await db_sync_to_async(cls.save_as_pending_trust)(transaction)
 
     @staticmethod
     def save_as_pending_trust(transaction: Transaction):
@@ -764,7 +1224,7 @@ class ProcessPendingDeposits:
         """
         logger.debug("heartbeat_task started...")
         while True:
-            await sync_to_async(ProcessPendingDeposits.update_heartbeat)(key)
+            await db_sync_to_async(ProcessPendingDeposits.update_heartbeat)(key)
             await asyncio.sleep(heartbeat_interval)
 
     @classmethod
@@ -782,38 +1242,8 @@ class ProcessPendingDeposits:
             logger.debug(
                 f"attempting to acquire lock on key: {key}, attempt #{attempt}..."
             )
-            with django.db.transaction.atomic():
-                heartbeat, created = PolarisHeartbeat.objects.get_or_create(key=key)
-                if created:
-                    # if the heartbeat key was created, update the last_heartbeat field to the current time
-                    heartbeat.last_heartbeat = datetime.datetime.now(
-                        datetime.timezone.utc
-                    )
-                    heartbeat.save()
-                    logger.debug(
-                        f"lock on key: {PROCESS_PENDING_DEPOSITS_LOCK_KEY} created"
-                    )
-                    return
-                # the heartbeat key already exists (previous process did not shutdown gracefully), attempt
-                # to acquire the lock based on time elapsed since the last heartbeat
-                delta = (
-                    datetime.datetime.now(datetime.timezone.utc)
-                    - heartbeat.last_heartbeat
-                )
-                logger.debug(f"last heartbeat was {delta.total_seconds()} seconds ago")
-                # the delta should be 5x the typical interval with a lower bound of 30 seconds
-                if delta > max(
-                    datetime.timedelta(seconds=heartbeat_interval * 5),
-                    datetime.timedelta(seconds=RECOVER_LOCK_LOWER_BOUND),
-                ):
-                    heartbeat.last_heartbeat = datetime.datetime.now(
-                        datetime.timezone.utc
-                    )
-                    heartbeat.save()
-                    logger.debug(
-                        f"lock on key: {PROCESS_PENDING_DEPOSITS_LOCK_KEY} acquired"
-                    )
-                    return
+            if cls.try_acquire_lock(key, heartbeat_interval):
+                return
             logger.debug(
                 f"unable to acquire lock on key: {key}, retrying in {heartbeat_interval} seconds..."
             )
@@ -821,65 +1251,98 @@ class ProcessPendingDeposits:
             time.sleep(heartbeat_interval)
 
     @classmethod
-    async def process_pending_deposits(  # pragma: no cover
-        cls, task_interval: int, heartbeat_interval: int
+    def try_acquire_lock(cls, key: str, heartbeat_interval: Union[int, float]) -> bool:
+        """
+        Makes a single attempt at acquiring the lock described in
+        :meth:`acquire_lock`. Returns ``True`` if the lock was acquired.
+        """
+        with django.db.transaction.atomic():
+            heartbeat, created = PolarisHeartbeat.objects.get_or_create(key=key)
+            if created:
+                # if the heartbeat key was created, update the last_heartbeat field to the current time
+                heartbeat.last_heartbeat = datetime.datetime.now(datetime.timezone.utc)
+                heartbeat.save()
+                logger.debug(
+                    f"lock on key: {PROCESS_PENDING_DEPOSITS_LOCK_KEY} created"
+                )
+                return True
+            # the heartbeat key already exists (previous process did not shutdown gracefully), attempt
+            # to acquire the lock based on time elapsed since the last heartbeat
+            delta = (
+                datetime.datetime.now(datetime.timezone.utc) - heartbeat.last_heartbeat
+            )
+            logger.debug(f"last heartbeat was {delta.total_seconds()} seconds ago")
+            # the delta should be 5x the typical interval with a lower bound of 30 seconds
+            if delta > max(
+                datetime.timedelta(seconds=heartbeat_interval * 5),
+                datetime.timedelta(seconds=RECOVER_LOCK_LOWER_BOUND),
+            ):
+                heartbeat.last_heartbeat = datetime.datetime.now(datetime.timezone.utc)
+                heartbeat.save()
+                logger.debug(
+                    f"lock on key: {PROCESS_PENDING_DEPOSITS_LOCK_KEY} acquired"
+                )
+                return True
+        return False
+
+    @classmethod
+    async def run_tasks(
+        cls,
+        task_interval: int,
+        heartbeat_interval: int,
+        poll_options: Optional[Dict] = None,
+        server: Optional[ServerAsync] = None,
+        queue_options: Optional[Dict] = None,
+        submit_concurrency: int = 1,
     ):
-        current_task = asyncio.current_task()
-        signal.signal(
-            signal.SIGINT,
-            lambda signum, frame: asyncio.create_task(
-                cls.exit_gracefully(signum, frame, current_task)
-            ),
-        )
-        signal.signal(
-            signal.SIGTERM,
-            lambda signum, frame: asyncio.create_task(
-                cls.exit_gracefully(signum, frame, current_task)
-            ),
-        )
+        """
+        Runs the tasks processing deposits until cancelled. The lock on
+        ``PROCESS_PENDING_DEPOSITS_LOCK_KEY`` must already be acquired.
 
-        queues = PolarisQueueAdapter([SUBMIT_TRANSACTION_QUEUE])
-        await sync_to_async(queues.populate_queues)()
+        The tasks making requests to Horizon share `server`, which is created and
+        closed by this function if not provided. `queue_options` are passed to
+        :class:`PolarisQueueAdapter`, and `submit_concurrency` submission tasks
+        consume its queue.
+        """
+        if server is None:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                return await cls.run_tasks(
+                    task_interval,
+                    heartbeat_interval,
+                    poll_options,
+                    server,
+                    queue_options,
+                    submit_concurrency,
+                )
+
+        queues = PolarisQueueAdapter(
+            [SUBMIT_TRANSACTION_QUEUE], **(queue_options or {})
+        )
+        await db_sync_to_async(queues.populate_queues)()
 
         locks = {
             "source_accounts": defaultdict(asyncio.Lock),
             "destination_accounts": defaultdict(asyncio.Lock),
         }
-        try:
-            await asyncio.gather(
-                ProcessPendingDeposits.heartbeat_task(
-                    PROCESS_PENDING_DEPOSITS_LOCK_KEY, heartbeat_interval
-                ),
-                ProcessPendingDeposits.check_rails_task(queues, task_interval),
-                ProcessPendingDeposits.check_accounts_task(queues, task_interval),
-                ProcessPendingDeposits.check_trustlines_task(queues, task_interval),
-                ProcessPendingDeposits.check_unblocked_transactions_task(
-                    queues, task_interval
-                ),
-                ProcessPendingDeposits.submit_transaction_task(queues, locks),
-            )
-        except asyncio.CancelledError:
-            logger.debug("caught root task CancelledError...")
-
-    @classmethod
-    async def exit_gracefully(cls, signal_name, frame, root_task):  # pragma: no cover
-        logger.info(f"caught signal {signal_name}, cleaning up before exiting...")
-        await sync_to_async(
-            PolarisHeartbeat.objects.filter(
-                key=PROCESS_PENDING_DEPOSITS_LOCK_KEY
-            ).delete
-        )()
-        logger.debug(f"deleted heartbeat key: {PROCESS_PENDING_DEPOSITS_LOCK_KEY}...")
-        current_task = asyncio.current_task()
-        tasks = [
-            task
-            for task in asyncio.all_tasks()
-            if task not in [current_task, root_task]
-        ]
-        for t in tasks:
-            t.cancel()
-        await asyncio.gather(*tasks, return_exceptions=True)
-        logger.debug("all tasks have been canceled...")
+        await asyncio.gather(
+            ProcessPendingDeposits.heartbeat_task(
+                PROCESS_PENDING_DEPOSITS_LOCK_KEY, heartbeat_interval
+            ),
+            ProcessPendingDeposits.check_rails_task(
+                queues, task_interval, poll_options, server
+            ),
+            ProcessPendingDeposits.check_accounts_task(queues, task_interval, server),
+            ProcessPendingDeposits.check_trustlines_task(queues, task_interval, server),
+            ProcessPendingDeposits.check_unblocked_transactions_task(
+                queues, task_interval
+            ),
+            *[
+                ProcessPendingDeposits.submit_transaction_task(queues, locks, server)
+                for _ in range(submit_concurrency)
+            ],
+        )
 
 
 class Command(BaseCommand):
@@ -897,7 +1360,9 @@ class Command(BaseCommand):
         transaction is in one of the secenarios outlined below, and if not, submits the
         return transactions them to the Stellar network. See the
         :meth:`~polaris.integrations.RailsIntegration.poll_pending_deposits()` integration
-        function for more details.
+        function for more details. If the anchor implements
+        :meth:`~polaris.integrations.RailsIntegration.apoll_pending_deposits`, it is
+        awaited instead, for up to ``--concurrency`` chunks at a time.
 
     A transaction’s destination account does not have a trustline to the requested asset.
         Polaris checks if the trustline has been established. If it has, and the transaction’s
@@ -919,6 +1384,42 @@ class Command(BaseCommand):
         --interval INTERVAL, -i INTERVAL
                               The number of seconds to wait before restarting
                               command. Defaults to 10.
+        --chunk-size CHUNK_SIZE
+                              The maximum number of transactions passed to
+                              poll_pending_deposits() at a time. Defaults to 100.
+        --backoff-factor BACKOFF_FACTOR
+                              The fraction of the time since a deposit was first
+                              polled to wait before polling it again. Defaults to
+                              0.1.
+        --max-poll-interval MAX_POLL_INTERVAL
+                              The maximum number of seconds to wait before polling
+                              a deposit again. Defaults to 3600.
+        --stale-after STALE_AFTER
+                              The number of seconds a deposit is polled for before
+                              being polled every STALE_POLL_INTERVAL seconds.
+                              Disabled by default.
+        --stale-poll-interval STALE_POLL_INTERVAL
+                              The number of seconds to wait before polling a
+                              stale deposit again. Defaults to 86400.
+        --concurrency CONCURRENCY, -c CONCURRENCY
+                              The number of chunks passed to
+                              apoll_pending_deposits() at a time, if implemented.
+                              Defaults to 1.
+        --submit-concurrency SUBMIT_CONCURRENCY
+                              The number of deposits submitted to the Stellar
+                              network at a time. Defaults to 1.
+        --account-weight ACCOUNT=WEIGHT
+                              The share of submissions given to a distribution
+                              account relative to others, which have a weight of
+                              1. WEIGHT must be an integer of at least 1. Can be
+                              used multiple times.
+        --max-in-flight-per-account MAX_IN_FLIGHT_PER_ACCOUNT
+                              The maximum number of deposits of a distribution
+                              account being submitted at a time. Unlimited by
+                              default.
+        --prioritize-retries  Submit deposits queued again, after a trustline was
+                              established or a blocked submission was unblocked,
+                              before deposits submitted for the first time.
     """
 
     def add_arguments(self, parser):  # pragma: no cover
@@ -929,6 +1430,93 @@ class Command(BaseCommand):
             help="The number of seconds to wait before each internal periodic task executes."
             "Defaults to {}.".format(1),
         )
+        parser.add_argument(
+            "--chunk-size",
+            type=int,
+            help=(
+                "The maximum number of transactions passed to "
+                "poll_pending_deposits() at a time. "
+                "Defaults to {}.".format(DEFAULT_CHUNK_SIZE)
+            ),
+        )
+        parser.add_argument(
+            "--backoff-factor",
+            type=float,
+            help=(
+                "The fraction of the time since a deposit was first polled to wait "
+                "before polling it again. Defaults to {}.".format(
+                    DEFAULT_BACKOFF_FACTOR
+                )
+            ),
+        )
+        parser.add_argument(
+            "--max-poll-interval",
+            type=int,
+            help=(
+                "The maximum number of seconds to wait before polling a deposit "
+                "again. Defaults to {}.".format(DEFAULT_MAX_POLL_INTERVAL)
+            ),
+        )
+        parser.add_argument(
+            "--stale-after",
+            type=int,
+            help=(
+                "The number of seconds a deposit is polled for before being polled "
+                "every --stale-poll-interval seconds. Disabled by default."
+            ),
+        )
+        parser.add_argument(
+            "--stale-poll-interval",
+            type=int,
+            help=(
+                "The number of seconds to wait before polling a stale deposit "
+                "again. Defaults to {}.".format(DEFAULT_STALE_POLL_INTERVAL)
+            ),
+        )
+        parser.add_argument(
+            "--concurrency",
+            "-c",
+            type=int,
+            help=(
+                "The number of chunks passed to apoll_pending_deposits() at a "
+                "time, if implemented. Defaults to 1."
+            ),
+        )
+        parser.add_argument(
+            "--submit-concurrency",
+            type=int,
+            help=(
+                "The number of deposits submitted to the Stellar network at a time. "
+                "Defaults to 1."
+            ),
+        )
+        parser.add_argument(
+            "--account-weight",
+            action="append",
+            metavar="ACCOUNT=WEIGHT",
+            help=(
+                "The share of submissions given to a distribution account relative "
+                "to others, which have a weight of 1. WEIGHT must be an integer of "
+                "at least 1. Can be used multiple times."
+            ),
+        )
+        parser.add_argument(
+            "--max-in-flight-per-account",
+            type=int,
+            help=(
+                "The maximum number of deposits of a distribution account being "
+                "submitted at a time. Unlimited by default."
+            ),
+        )
+        parser.add_argument(
+            "--prioritize-retries",
+            action="store_true",
+            help=(
+                "Submit deposits queued again, after a trustline was established "
+                "or a blocked submission was unblocked, before deposits submitted "
+                "for the first time."
+            ),
+        )
 
     def handle(self, *_args, **options):  # pragma: no cover
         """
@@ -936,10 +1524,52 @@ class Command(BaseCommand):
         See diagram at polaris/docs/deployment
         """
         interval = options.get("interval") or DEFAULT_INTERVAL
-        ProcessPendingDeposits.acquire_lock(
-            PROCESS_PENDING_DEPOSITS_LOCK_KEY, DEFAULT_HEARTBEAT
-        )
-        asyncio.run(
-            ProcessPendingDeposits.process_pending_deposits(interval, DEFAULT_HEARTBEAT)
-        )
+        poll_options = {
+            "chunk_size": options.get("chunk_size") or DEFAULT_CHUNK_SIZE,
+            "min_poll_interval": interval,
+            "max_poll_interval": (
+                options.get("max_poll_interval") or DEFAULT_MAX_POLL_INTERVAL
+            ),
+            "backoff_factor": options.get("backoff_factor") or DEFAULT_BACKOFF_FACTOR,
+            "stale_after": options.get("stale_after"),
+            "stale_poll_interval": (
+                options.get("stale_poll_interval") or DEFAULT_STALE_POLL_INTERVAL
+            ),
+            "concurrency": options.get("concurrency") or 1,
+        }
+        weights = {}
+        for account_weight in options.get("account_weight") or []:
+            account, _, weight = account_weight.partition("=")
+            try:
+                weights[account] = int(weight)
+            except ValueError:
+                weights[account] = 0
+            if weights[account] < 1:
+                # a weight below 1 would starve the account or let it take over
+                # the submission queue
+                raise CommandError(
+                    f"invalid --account-weight {account_weight}, expected "
+                    "ACCOUNT=WEIGHT with a WEIGHT of at least 1"
+                )
+        queue_options = {
+            "weights": weights,
+            "priorities": (
+                [PRIORITY_RETRY, PRIORITY_FIRST_ATTEMPT]
+                if options.get("prioritize_retries")
+                else None
+            ),
+            "max_in_flight_per_account": options.get("max_in_flight_per_account"),
+        }
+        from polaris.management.commands.polaris_worker import PolarisWorker
+
+        PolarisWorker(
+            {"process_pending_deposits": interval},
+            task_options={
+                "process_pending_deposits": {
+                    "poll_options": poll_options,
+                    "queue_options": queue_options,
+                    "submit_concurrency": options.get("submit_concurrency") or 1,
+                }
+            },
+        ).start()
         logger.info("exiting after cleanup")
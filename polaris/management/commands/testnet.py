@@ -16,7 +16,7 @@ from stellar_sdk.exceptions import (
 )
 
 from polaris import settings
-from polaris.models import Transaction, Asset
+from polaris.models import Transaction, Asset, StreamCursor
 
 logger = getLogger(__name__)
 
@@ -44,11 +44,12 @@ class Command(BaseCommand):
         :mod:`~polaris.management.commands.watch_transactions` streams transactions to
         and from each anchored asset’s distribution account. Specifically, it streams
         transactions starting with the most recently completed transaction’s
-        :attr:`~polaris.models.Transaction.paging_token` on startup. When the testnet
-        resets, the :attr:`~polaris.models.Transaction.paging_token` used for transactions
-        prior to the reset are no longer valid. To fix this, Polaris updates the
-        :attr:`~polaris.models.Transaction.paging_token` of the most recently completed
-        transaction for each anchored asset to "now".
+        the cursor it last saved for each account, or the most recently completed
+        transaction’s :attr:`~polaris.models.Transaction.paging_token` if none was
+        saved. When the testnet resets, the paging tokens used for transactions prior
+        to the reset are no longer valid. To fix this, Polaris deletes the saved
+        cursors and updates the :attr:`~polaris.models.Transaction.paging_token` of
+        the most recently completed transaction for each anchored asset to "now".
 
     **Positional arguments:**
 
@@ -217,10 +218,12 @@ class Command(BaseCommand):
         - re-issuing every Asset object in the DB
         - moves all `pending_trust` Transactions to `error`
         - setting the most-recently streamed Transaction object's
-            `paging_token` attribute to None. This signals to
-            watch_transactions to stream using the `"now"` keyword.
+            `paging_token` attribute to None and deleting the stream cursors
+            saved by watch_transactions. This signals to watch_transactions to
+            stream using the `"now"` keyword.
         """
         print("\nResetting each asset's most recent paging token")
+        StreamCursor.objects.all().delete()
         for asset in Asset.objects.filter(distribution_seed__isnull=False):
             transaction = (
                 Transaction.objects.filter(
@@ -1,42 +1,280 @@
 """This module defines custom management commands for the app admin."""
+
 import asyncio
-from asgiref.sync import sync_to_async
-from typing import Dict, Optional, Union, List, Tuple
+import time
+from collections import defaultdict
+from typing import Dict, Iterator, Optional, List, Tuple, Set
 from decimal import Decimal
 
 from django.core.management.base import BaseCommand
-from django.db.models import Q
-from stellar_sdk import FeeBumpTransactionEnvelope
+from django.db.models import Q, QuerySet
+from django.utils import timezone
 from stellar_sdk.exceptions import NotFoundError
-from stellar_sdk.transaction import Transaction as HorizonTransaction
-from stellar_sdk.transaction_envelope import TransactionEnvelope
+from stellar_sdk.strkey import StrKey
 from stellar_sdk.utils import from_xdr_amount
 from stellar_sdk.xdr import (
-    PaymentResult,
-    PathPaymentStrictSendResult,
-    PathPaymentStrictReceiveResult,
-    OperationResult,
+    Asset as XdrAsset,
+    AssetType,
+    CryptoKeyType,
+    EnvelopeType,
+    MuxedAccount,
+    OperationType,
+    TransactionEnvelope,
     TransactionResult,
 )
-from stellar_sdk.operation import (
-    Operation,
-    Payment,
-    PathPaymentStrictReceive,
-    PathPaymentStrictSend,
-)
 from stellar_sdk.server_async import ServerAsync
 from stellar_sdk.client.aiohttp_client import AiohttpClient
 
 from polaris import settings
-from polaris.models import Asset, Transaction
-from polaris.utils import getLogger, maybe_make_callback_async
+from polaris.models import Asset, Transaction, StreamCursor
+from polaris.utils import getLogger, maybe_make_callback_async, db_sync_to_async
 from polaris.integrations import registered_custody_integration as rci
 
 logger = getLogger(__name__)
-PaymentOpResult = Union[
-    PaymentResult, PathPaymentStrictSendResult, PathPaymentStrictReceiveResult
-]
-PaymentOp = Union[Payment, PathPaymentStrictReceive, PathPaymentStrictSend]
+# (destination, (asset code, asset issuer), amount, source)
+PaymentValues = Tuple[str, Tuple[str, Optional[str]], str, str]
+MEMO_INDEX_REFRESH_INTERVAL = 5
+MEMO_INDEX_RELOAD_INTERVAL = 60
+CURSOR_CHECKPOINT_EVENTS = 100
+CURSOR_CHECKPOINT_INTERVAL = 5
+CATCH_UP_PAGE_SIZE = 200
+MATCHER_CONCURRENCY = 10
+PIPELINE_QUEUE_SIZE = 1000
+RESPONSE_KEYS = ["id", "envelope_xdr", "memo", "result_xdr"]
+
+
+def pending_payment_filters() -> Q:
+    """
+    Returns the query filters matching transactions awaiting an incoming
+    Stellar payment.
+    """
+    # Query filters for SEP6 and 24
+    withdraw_filters = Q(
+        status=Transaction.STATUS.pending_user_transfer_start,
+        kind__in=[
+            Transaction.KIND.withdrawal,
+            getattr(Transaction.KIND, "withdrawal-exchange"),
+        ],
+    )
+    # Query filters for SEP31
+    send_filters = Q(
+        status=Transaction.STATUS.pending_sender,
+        kind=Transaction.KIND.send,
+    )
+    return withdraw_filters | send_filters
+
+
+def _account_id(account: MuxedAccount) -> str:
+    if account.type == CryptoKeyType.KEY_TYPE_ED25519:
+        return StrKey.encode_ed25519_public_key(account.ed25519.uint256)
+    return StrKey.encode_ed25519_public_key(account.med25519.ed25519.uint256)
+
+
+def _address(account: MuxedAccount) -> str:
+    if account.type == CryptoKeyType.KEY_TYPE_ED25519:
+        return StrKey.encode_ed25519_public_key(account.ed25519.uint256)
+    return StrKey.encode_muxed_account(account)
+
+
+def _asset(asset: XdrAsset) -> Tuple[str, Optional[str]]:
+    if asset.type == AssetType.ASSET_TYPE_NATIVE:
+        return "XLM", None
+    elif asset.type == AssetType.ASSET_TYPE_CREDIT_ALPHANUM4:
+        code = asset.alpha_num4.asset_code.asset_code4
+        issuer = asset.alpha_num4.issuer
+    else:
+        code = asset.alpha_num12.asset_code.asset_code12
+        issuer = asset.alpha_num12.issuer
+    return (
+        code.decode().rstrip("\x00"),
+        StrKey.encode_ed25519_public_key(issuer.account_id.ed25519.uint256),
+    )
+
+
+def iter_payments(envelope_xdr: str, result_xdr: str) -> Iterator[PaymentValues]:
+    """
+    Decodes the envelope and result XDR of a successful Stellar transaction and
+    yields ``(destination, (code, issuer), amount, source)`` for each of its
+    payment, path payment strict send, and path payment strict receive operations.
+
+    The XDR is read once and the values are taken directly from the decoded XDR
+    structures, without building ``stellar_sdk`` transaction or operation objects.
+    """
+    envelope = TransactionEnvelope.from_xdr(envelope_xdr)
+    result = TransactionResult.from_xdr(result_xdr).result
+    if envelope.type == EnvelopeType.ENVELOPE_TYPE_TX_FEE_BUMP:
+        tx = envelope.fee_bump.tx.inner_tx.v1.tx
+        results = result.inner_result_pair.result.result.results
+    elif envelope.type == EnvelopeType.ENVELOPE_TYPE_TX:
+        tx = envelope.v1.tx
+        results = result.results
+    else:
+        tx = envelope.v0.tx
+        results = result.results
+
+    tx_source = None
+    for op, op_result in zip(tx.operations, results):
+        body = op.body
+        if body.type == OperationType.PAYMENT:
+            destination = body.payment_op.destination
+            asset = body.payment_op.asset
+            amount = body.payment_op.amount.int64
+        elif body.type == OperationType.PATH_PAYMENT_STRICT_SEND:
+            destination = body.path_payment_strict_send_op.destination
+            asset = body.path_payment_strict_send_op.dest_asset
+            # since the dest amount is not specified in a strict-send op,
+            # we need to get the dest amount from the operation's result
+            send_result = op_result.tr.path_payment_strict_send_result
+            amount = send_result.success.last.amount.int64
+        elif body.type == OperationType.PATH_PAYMENT_STRICT_RECEIVE:
+            destination = body.path_payment_strict_receive_op.destination
+            asset = body.path_payment_strict_receive_op.dest_asset
+            amount = body.path_payment_strict_receive_op.dest_amount.int64
+        else:
+            continue
+
+        if op.source_account:
+            source = _address(op.source_account)
+        else:
+            if tx_source is None:
+                if envelope.type == EnvelopeType.ENVELOPE_TYPE_TX_V0:
+                    tx_source = StrKey.encode_ed25519_public_key(
+                        tx.source_account_ed25519.uint256
+                    )
+                else:
+                    tx_source = _address(tx.source_account)
+            source = tx_source
+        yield _account_id(destination), _asset(asset), from_xdr_amount(amount), source
+
+
+class PendingMemoIndex:
+    """
+    An in-memory index mapping the memo of every transaction awaiting a payment
+    to `account` to the IDs of the transactions using it.
+
+    :meth:`reload` loads the index from the database. :meth:`update` applies
+    cheaper incremental refreshes, which only fetch transactions started since
+    the previous refresh, every `refresh_interval` seconds and reloads the index
+    every `reload_interval` seconds.
+
+    Incremental refreshes cannot detect transactions that begin waiting for a
+    payment some time after they were started, such as SEP-24 withdrawals once
+    the interactive flow is completed. Responses that miss the index are kept
+    until the next reload so they can be matched against the transactions it
+    picks up.
+    """
+
+    def __init__(
+        self,
+        account: str,
+        refresh_interval: float = MEMO_INDEX_REFRESH_INTERVAL,
+        reload_interval: float = MEMO_INDEX_RELOAD_INTERVAL,
+    ):
+        self.account = account
+        self.refresh_interval = refresh_interval
+        self.reload_interval = reload_interval
+        self.memos: Dict[str, Set[str]] = defaultdict(set)
+        self.missed: List[Dict] = []
+        self.rechecking: List[Dict] = []
+        self.hits = 0
+        self.misses = 0
+        self._started_since = None
+        self._refreshed_at = 0.0
+        self._reloaded_at = 0.0
+
+    def _queryset(self) -> QuerySet:
+        return Transaction.objects.filter(
+            pending_payment_filters(),
+            receiving_anchor_account=self.account,
+            memo__isnull=False,
+        )
+
+    def _add(self, rows: List[Tuple]):
+        for transaction_id, memo in rows:
+            self.memos[memo].add(str(transaction_id))
+
+    async def reload(self):
+        # Capture the refresh boundary before querying so transactions started
+        # while the query runs are fetched again by the next refresh.
+        started_since = timezone.now()
+        rows = await db_sync_to_async(list)(self._queryset().values_list("id", "memo"))
+        self.memos = defaultdict(set)
+        self._add(rows)
+        self._started_since = started_since
+        self._refreshed_at = self._reloaded_at = time.monotonic()
+        logger.debug(
+            f"loaded {len(rows)} pending transactions for {self.account} "
+            f"into memo index"
+        )
+
+    async def refresh(self):
+        started_since = timezone.now()
+        rows = await db_sync_to_async(list)(
+            self._queryset()
+            .filter(started_at__gte=self._started_since)
+            .values_list("id", "memo")
+        )
+        self._add(rows)
+        self._started_since = started_since
+        self._refreshed_at = time.monotonic()
+
+    async def update(self) -> List[Dict]:
+        """
+        Refreshes or reloads the index if either is due, and returns the
+        previously missed responses that now match the index.
+        """
+        elapsed = time.monotonic()
+        reloaded = elapsed - self._reloaded_at >= self.reload_interval
+        if reloaded:
+            await self.reload()
+        elif elapsed - self._refreshed_at >= self.refresh_interval:
+            await self.refresh()
+        else:
+            return []
+        matched = [r for r in self.missed if r["memo"] in self.memos]
+        if reloaded:
+            # Every transaction awaiting a payment when the missed responses
+            # were received is now in the index, so they can be dropped.
+            self.missed = []
+        elif matched:
+            self.missed = [r for r in self.missed if r["memo"] not in self.memos]
+        self.rechecking.extend(matched)
+        return matched
+
+    def resolve(self, response: Dict):
+        """
+        Stops holding a missed response returned by :meth:`update`.
+        """
+        self.rechecking = [r for r in self.rechecking if r is not response]
+
+    def resume_cursor(self, paging_token: str) -> str:
+        """
+        Returns the cursor a restarted stream should use to receive the responses
+        after `paging_token` as well as the missed responses still held by the
+        index.
+        """
+        held = self.missed[:1] + self.rechecking
+        if not held:
+            return paging_token
+        # Horizon returns the records with a paging token greater than the cursor
+        oldest = min(int(r["paging_token"]) for r in held) - 1
+        return str(min(int(paging_token), oldest))
+
+    def match(self, response: Dict) -> bool:
+        """
+        Returns ``True`` if `response` uses a memo of a transaction in the index.
+        Successful responses with a memo that miss the index are kept until the
+        next reload.
+        """
+        memo = response.get("memo")
+        if not (response.get("successful") and memo):
+            return False
+        if memo in self.memos:
+            self.hits += 1
+            return True
+        self.misses += 1
+        self.missed.append(response)
+        return False
 
 
 class Command(BaseCommand):
@@ -47,11 +285,20 @@ class Command(BaseCommand):
     Note that this command assumes Stellar payments are made to one distribution
     account address per asset. Some third party custody service providers may not
     use this scheme, in which case the custody integration class should provide
-    an alternative command for detecting incoming Stellar payments.
+    an alternative command for detecting incoming Stellar payments. Assets may share
+    a distribution account, in which case a single stream is opened for the account.
+
+    Memos of the transactions awaiting a payment to each account are kept in memory
+    and refreshed periodically. For every response from the server using one of
+    these memos, attempts to find a matching transaction in the database and updates
+    the transaction's status to ``pending_anchor`` or ``pending_receiver`` depending
+    on the protocol. Up to 10 responses are matched concurrently, so a slow callback
+    to a wallet does not delay processing of the responses that follow.
 
-    For every response from the server, attempts to find a matching transaction in
-    the database and updates the transaction's status to ``pending_anchor`` or
-    ``pending_receiver`` depending on the protocol.
+    The paging token of the last response processed for each account is saved
+    periodically, and streams resume from it when the command is restarted. Before
+    streaming, transactions made while the command was not running are fetched and
+    matched in pages of 200.
 
     Then, the :mod:`~polaris.management.commands.execute_outgoing_transactions` process
     will query for transactions in those statuses and provide the anchor an integration
@@ -62,9 +309,18 @@ class Command(BaseCommand):
         -h, --help            show this help message and exit
     """
 
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.stream_count = 0
+        self.events_processed: Dict[str, int] = defaultdict(int)
+        self.memo_indexes: Dict[str, PendingMemoIndex] = {}
+        self.catch_up_rates: Dict[str, float] = {}
+
     def handle(self, *_args, **_options):  # pragma: no cover
+        from polaris.management.commands.polaris_worker import PolarisWorker
+
         try:
-            asyncio.run(self.watch_transactions())
+            PolarisWorker({"watch_transactions": None}).start()
         except Exception as e:
             # This is very likely a bug, so re-raise the error and crash.
             # Heroku will restart the process unless it is repeatedly crashing,
@@ -72,50 +328,240 @@ class Command(BaseCommand):
             logger.exception("watch_transactions() threw an unexpected exception")
             raise e
 
-    async def watch_transactions(self):  # pragma: no cover
-        assets = await sync_to_async(list)(Asset.objects.all())
+    async def watch_transactions(self, server: Optional[ServerAsync] = None):
+        """
+        Streams transactions for every distribution account until cancelled. The
+        streams share `server` if provided.
+        """
+        assets = await db_sync_to_async(list)(Asset.objects.all())
+        # Assets commonly share a distribution account. Opening one stream per
+        # asset would process every payment to the account once per asset, so
+        # streams are opened once per unique account. process_response() matches
+        # transactions of any asset received by the account.
+        accounts = []
+        for asset in assets:
+            account = rci.get_distribution_account(asset=asset)
+            if account not in accounts:
+                accounts.append(account)
+        self.stream_count = len(accounts)
+        logger.info(
+            f"streaming transactions for {self.stream_count} distribution accounts "
+            f"used by {len(assets)} assets"
+        )
         await asyncio.gather(
-            *[
-                self._for_account(rci.get_distribution_account(asset=asset))
-                for asset in assets
-            ]
+            *[self._for_account(account, server=server) for account in accounts]
         )
 
-    async def _for_account(self, account: str):
+    async def _for_account(self, account: str, server: Optional[ServerAsync] = None):
         """
         Stream transactions for the server Stellar address.
         """
-        async with ServerAsync(settings.HORIZON_URI, client=AiohttpClient()) as server:
+        if server is None:
+            async with ServerAsync(
+                settings.HORIZON_URI, client=AiohttpClient()
+            ) as server:
+                return await self._for_account(account, server)
+        try:
+            # Ensure the distribution account actually exists
+            await server.load_account(account)
+        except NotFoundError:
+            # This exception will crash the process, but the anchor needs
+            # to provide valid accounts to watch.
+            raise RuntimeError("Stellar distribution account does not exist in horizon")
+
+        cursor = await self._catch_up(server, account, await self._get_cursor(account))
+        logger.info(f"starting transaction stream for {account} with cursor {cursor}")
+        # Most transactions involving the account are not payments for a
+        # pending transaction, so only responses using a memo present in the
+        # index are matched against the database.
+        memo_index = PendingMemoIndex(account)
+        await memo_index.reload()
+        self.memo_indexes[account] = memo_index
+
+        endpoint = server.transactions().for_account(account).cursor(cursor)
+        await self._process_stream(endpoint, account, memo_index)
+
+    async def _process_stream(
+        self, endpoint, account: str, memo_index: PendingMemoIndex
+    ):
+        """
+        Processes the responses streamed from `endpoint` using four stages:
+
+        - a reader, which consumes the stream and starts a matcher for each
+          response hitting `memo_index`
+        - a refresher, which updates `memo_index` every ``refresh_interval``
+          seconds and starts a matcher for each missed response now hitting it
+        - up to ``MATCHER_CONCURRENCY`` matchers, each running
+          :meth:`process_response` for one response
+        - a committer, which waits for responses to be processed in the order
+          they were streamed and advances the account's cursor past them
+
+        A slow callback made by a matcher therefore delays the cursor, not the
+        ingestion of the stream. Responses using the same memo are processed one
+        at a time and in order, so concurrent matchers cannot match a response
+        with a transaction already matched by another.
+        """
+        queue = asyncio.Queue(maxsize=PIPELINE_QUEUE_SIZE)
+        matchers = asyncio.Semaphore(MATCHER_CONCURRENCY)
+        memo_locks: Dict[str, asyncio.Lock] = {}
+        memo_lock_users: Dict[str, int] = defaultdict(int)
+
+        async def match(response: Dict):
+            memo = response["memo"]
+            lock = memo_locks.setdefault(memo, asyncio.Lock())
+            memo_lock_users[memo] += 1
             try:
-                # Ensure the distribution account actually exists
-                await server.load_account(account)
-            except NotFoundError:
-                # This exception will crash the process, but the anchor needs
-                # to provide valid accounts to watch.
-                raise RuntimeError(
-                    "Stellar distribution account does not exist in horizon"
-                )
+                async with lock:
+                    await self.process_response(response, account)
+            finally:
+                memo_lock_users[memo] -= 1
+                if not memo_lock_users[memo]:
+                    del memo_locks[memo], memo_lock_users[memo]
+                matchers.release()
 
-            last_completed_transaction = await sync_to_async(
-                Transaction.objects.filter(
-                    Q(kind=Transaction.KIND.withdrawal) | Q(kind=Transaction.KIND.send),
-                    receiving_anchor_account=account,
-                    status=Transaction.STATUS.completed,
-                )
-                .order_by("-completed_at")
-                .first
-            )()
+        async def start_matcher(response: Dict) -> asyncio.Task:
+            await matchers.acquire()
+            return asyncio.create_task(match(response))
 
-            cursor = "0"
-            if last_completed_transaction and last_completed_transaction.paging_token:
-                cursor = last_completed_transaction.paging_token
+        stream_ended = asyncio.Event()
 
-            logger.info(
-                f"starting transaction stream for {account} with cursor {cursor}"
-            )
-            endpoint = server.transactions().for_account(account).cursor(cursor)
+        async def read():
             async for response in endpoint.stream():
-                await self.process_response(response, account)
+                task = None
+                if memo_index.match(response):
+                    task = await start_matcher(response)
+                await queue.put((response, task, False))
+            stream_ended.set()
+            await refresher
+            await queue.put(None)
+
+        async def refresh():
+            # Runs on a timer rather than when responses are streamed, so a
+            # missed payment to an account receiving no further transactions is
+            # still matched once its transaction is picked up by the index.
+            while True:
+                try:
+                    await asyncio.wait_for(
+                        stream_ended.wait(), memo_index.refresh_interval
+                    )
+                    return
+                except asyncio.TimeoutError:
+                    pass
+                for missed_response in await memo_index.update():
+                    task = await start_matcher(missed_response)
+                    await queue.put((missed_response, task, True))
+
+        async def commit():
+            # The cursor is checkpointed every CURSOR_CHECKPOINT_EVENTS responses or
+            # CURSOR_CHECKPOINT_INTERVAL seconds rather than after every response.
+            # Responses processed after the last checkpoint are streamed again
+            # following a crash, which is harmless since matched transactions are
+            # no longer awaiting a payment.
+            paging_token, unsaved = None, 0
+            checkpointed_at = time.monotonic()
+            try:
+                while True:
+                    item = await queue.get()
+                    if item is None:
+                        break
+                    response, task, rechecked = item
+                    if task:
+                        await task
+                    if rechecked:
+                        # the cursor is already past missed responses
+                        memo_index.resolve(response)
+                        continue
+                    self.events_processed[account] += 1
+                    paging_token = response["paging_token"]
+                    unsaved += 1
+                    if (
+                        unsaved >= CURSOR_CHECKPOINT_EVENTS
+                        or time.monotonic() - checkpointed_at
+                        >= CURSOR_CHECKPOINT_INTERVAL
+                    ):
+                        await self._save_cursor(
+                            account, memo_index.resume_cursor(paging_token)
+                        )
+                        unsaved, checkpointed_at = 0, time.monotonic()
+            finally:
+                if unsaved:
+                    await self._save_cursor(
+                        account, memo_index.resume_cursor(paging_token)
+                    )
+
+        refresher = asyncio.create_task(refresh())
+        reader = asyncio.create_task(read())
+        committer = asyncio.create_task(commit())
+        tasks = [refresher, reader, committer]
+        try:
+            done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_EXCEPTION)
+            for task in done:
+                task.result()
+        finally:
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _catch_up(self, server: ServerAsync, account: str, cursor: str) -> str:
+        """
+        Pages through the transactions made since `cursor`, matching each page
+        with pending transactions using a single query, until reaching the most
+        recent transaction. Returns the cursor to start streaming from.
+        """
+        events = 0
+        start = time.monotonic()
+        while True:
+            page = await (
+                server.transactions()
+                .for_account(account)
+                .cursor(cursor)
+                .limit(CATCH_UP_PAGE_SIZE)
+                .call()
+            )
+            records = page["_embedded"]["records"]
+            if records:
+                await self.process_page(records, account)
+                events += len(records)
+                cursor = records[-1]["paging_token"]
+                await self._save_cursor(account, cursor)
+            if len(records) < CATCH_UP_PAGE_SIZE:
+                break
+        elapsed = time.monotonic() - start
+        self.catch_up_rates[account] = events / elapsed if elapsed else 0.0
+        logger.info(
+            f"caught up on {events} transactions for {account} in {elapsed:.2f}s "
+            f"({self.catch_up_rates[account]:.1f} events/s)"
+        )
+        return cursor
+
+    @classmethod
+    async def _get_cursor(cls, account: str) -> str:
+        stream_cursor = await db_sync_to_async(
+            StreamCursor.objects.filter(account=account).first
+        )()
+        if stream_cursor:
+            return stream_cursor.paging_token
+
+        # Streams started before cursors were persisted resume from the last
+        # payment matched with a transaction.
+        last_completed_transaction = await db_sync_to_async(
+            Transaction.objects.filter(
+                Q(kind=Transaction.KIND.withdrawal) | Q(kind=Transaction.KIND.send),
+                receiving_anchor_account=account,
+                status=Transaction.STATUS.completed,
+            )
+            .order_by("-completed_at")
+            .first
+        )()
+        if last_completed_transaction and last_completed_transaction.paging_token:
+            return last_completed_transaction.paging_token
+        return "0"
+
+    @classmethod
+    async def _save_cursor(cls, account: str, paging_token: str):
+        await db_sync_to_async(StreamCursor.objects.update_or_create)(
+            account=account, defaults={"paging_token": paging_token}
+        )
 
     @classmethod
     async def process_response(cls, response, account):
@@ -126,31 +572,13 @@ class Command(BaseCommand):
         if not response.get("successful"):
             return
 
-        try:
-            _ = response["id"]
-            envelope_xdr = response["envelope_xdr"]
-            memo = response["memo"]
-            result_xdr = response["result_xdr"]
-        except KeyError:
+        if not all(key in response for key in RESPONSE_KEYS):
             return
+        memo = response["memo"]
 
-        # Query filters for SEP6 and 24
-
-        withdraw_filters = Q(
-            status=Transaction.STATUS.pending_user_transfer_start,
-            kind__in=[
-                Transaction.KIND.withdrawal,
-                getattr(Transaction.KIND, "withdrawal-exchange"),
-            ],
-        )
-        # Query filters for SEP31
-        send_filters = Q(
-            status=Transaction.STATUS.pending_sender,
-            kind=Transaction.KIND.send,
-        )
-        transactions = await sync_to_async(list)(
+        transactions = await db_sync_to_async(list)(
             Transaction.objects.filter(
-                withdraw_filters | send_filters,
+                pending_payment_filters(),
                 memo=memo,
                 receiving_anchor_account=account,
             )
@@ -172,33 +600,105 @@ class Command(BaseCommand):
         logger.info(
             f"Matched transaction object {transaction.id} for stellar transaction {response['id']}"
         )
+        if not cls._apply_payment(response, transaction):
+            return
+        await db_sync_to_async(transaction.save)()
+        await maybe_make_callback_async(transaction)
+        return None
 
-        try:
-            horizon_tx = TransactionEnvelope.from_xdr(
-                envelope_xdr,
-                network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
-            ).transaction
-            op_results = TransactionResult.from_xdr(result_xdr).result.results
-        except ValueError:
-            horizon_tx = FeeBumpTransactionEnvelope.from_xdr(
-                envelope_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
-            ).transaction.inner_transaction_envelope.transaction
-            op_results = TransactionResult.from_xdr(
-                result_xdr
-            ).result.inner_result_pair.result.result.results
-
-        payment_data = await cls._find_matching_payment_data(
-            response, horizon_tx, op_results, transaction
-        )
-        if not payment_data:
-            logger.warning(f"Transaction matching memo {memo} has no payment operation")
+    @classmethod
+    async def process_page(cls, records: List[Dict], account: str):
+        """
+        Matches a page of transaction records with pending transactions using a
+        single query and saves the matched transactions using a single update.
+
+        Records are matched in order with the same results as passing each one
+        to :meth:`process_response`.
+        """
+        responses = []
+        for response in records:
+            if not response.get("successful"):
+                continue
+            if not all(key in response for key in RESPONSE_KEYS):
+                continue
+            responses.append(response)
+        if not responses:
+            return
+
+        candidates = defaultdict(list)
+        for transaction in await db_sync_to_async(list)(
+            Transaction.objects.filter(
+                pending_payment_filters(),
+                memo__in={r["memo"] for r in responses},
+                receiving_anchor_account=account,
+            ).select_related("asset")
+        ):
+            candidates[transaction.memo].append(transaction)
+
+        matched = []
+        for response in responses:
+            transactions = candidates.get(response["memo"])
+            if not transactions:
+                continue
+            if len(transactions) > 1:
+                logger.error(
+                    f"multiple Transaction objects returned for memo: {response['memo']}"
+                )
+            transaction = transactions[0]
+            logger.info(
+                f"Matched transaction object {transaction.id} for stellar transaction {response['id']}"
+            )
+            if cls._apply_payment(response, transaction):
+                # the transaction is no longer pending, so the next record using
+                # the same memo is matched with the next transaction
+                transactions.pop(0)
+                matched.append(transaction)
+        if not matched:
             return
 
+        await db_sync_to_async(Transaction.objects.bulk_update)(
+            matched,
+            [
+                "stellar_transaction_id",
+                "from_address",
+                "paging_token",
+                "amount_in",
+                "status",
+            ],
+        )
+        for transaction in matched:
+            await maybe_make_callback_async(transaction)
+
+    @classmethod
+    def _apply_payment(cls, response: Dict, transaction: Transaction) -> bool:
+        """
+        Updates `transaction` with the payment made to it in `response` without
+        saving it. Returns ``False`` if `response` doesn't contain a payment
+        for `transaction`.
+        """
+        want_asset = (transaction.asset.code, transaction.asset.issuer)
+        for destination, asset, amount, source in iter_payments(
+            response["envelope_xdr"], response["result_xdr"]
+        ):
+            if (
+                destination == transaction.receiving_anchor_account
+                and asset == want_asset
+            ):
+                break
+        else:
+            logger.warning(
+                f"Transaction matching memo {response['memo']} has no payment operation"
+            )
+            return False
+
+        cls._update_transaction_info(
+            transaction, response["id"], response["paging_token"], source
+        )
         # Transaction.amount_in is overwritten with the actual amount sent in the stellar
         # transaction. This allows anchors to validate the actual amount sent in
         # execute_outgoing_transactions() and handle invalid amounts appropriately.
         transaction.amount_in = round(
-            Decimal(payment_data["amount"]),
+            Decimal(amount),
             transaction.asset.significant_decimals,
         )
 
@@ -207,124 +707,15 @@ class Command(BaseCommand):
         if transaction.protocol == Transaction.PROTOCOL.sep31:
             # SEP-31 uses 'pending_receiver' status
             transaction.status = Transaction.STATUS.pending_receiver
-            await sync_to_async(transaction.save)()
         else:
             # SEP-6 and 24 uses 'pending_anchor' status
             transaction.status = Transaction.STATUS.pending_anchor
-            await sync_to_async(transaction.save)()
-        await maybe_make_callback_async(transaction)
-        return None
+        return True
 
     @classmethod
-    async def _find_matching_payment_data(
-        cls,
-        response: Dict,
-        horizon_tx: HorizonTransaction,
-        result_ops: List[OperationResult],
-        transaction: Transaction,
-    ) -> Optional[Dict]:
-        matching_payment_data = None
-        ops = horizon_tx.operations
-        for idx, op_result in enumerate(result_ops):
-            op, op_result = cls._cast_operation_and_result(ops[idx], op_result)
-            if not op_result:  # not a payment op
-                continue
-            maybe_payment_data = cls._check_for_payment_match(
-                op, op_result, transaction.asset, transaction
-            )
-            if maybe_payment_data:
-                if ops[idx].source:
-                    source = ops[idx].source.account_muxed or ops[idx].source.account_id
-                else:
-                    source = (
-                        horizon_tx.source.account_muxed or horizon_tx.source.account_id
-                    )
-                await cls._update_transaction_info(
-                    transaction, response["id"], response["paging_token"], source
-                )
-                matching_payment_data = maybe_payment_data
-                break
-
-        return matching_payment_data
-
-    @classmethod
-    async def _update_transaction_info(
+    def _update_transaction_info(
         cls, transaction: Transaction, stellar_txid: str, paging_token: str, source: str
     ):
         transaction.stellar_transaction_id = stellar_txid
         transaction.from_address = source
         transaction.paging_token = paging_token
-        await sync_to_async(transaction.save)()
-
-    @classmethod
-    def _check_for_payment_match(
-        cls,
-        operation: PaymentOp,
-        op_result: PaymentOpResult,
-        want_asset: Asset,
-        transaction: Transaction,
-    ) -> Optional[Dict]:
-        payment_data = cls._get_payment_values(operation, op_result)
-        if (
-            payment_data["destination"] == transaction.receiving_anchor_account
-            and payment_data["code"] == want_asset.code
-            and payment_data["issuer"] == want_asset.issuer
-        ):
-            return payment_data
-        else:
-            return None
-
-    @classmethod
-    def _cast_operation_and_result(
-        cls, operation: Operation, op_result: OperationResult
-    ) -> Tuple[Optional[PaymentOp], Optional[PaymentOpResult]]:
-        op_xdr_obj = operation.to_xdr_object()
-        if isinstance(operation, Payment):
-            return (
-                Payment.from_xdr_object(op_xdr_obj),
-                op_result.tr.payment_result,
-            )
-        elif isinstance(operation, PathPaymentStrictSend):
-            return (
-                PathPaymentStrictSend.from_xdr_object(op_xdr_obj),
-                op_result.tr.path_payment_strict_send_result,
-            )
-        elif isinstance(operation, PathPaymentStrictReceive):
-            return (
-                PathPaymentStrictReceive.from_xdr_object(op_xdr_obj),
-                op_result.tr.path_payment_strict_receive_result,
-            )
-        else:
-            return None, None
-
-    @classmethod
-    def _get_payment_values(
-        cls, operation: PaymentOp, op_result: PaymentOpResult
-    ) -> Dict:
-        values = {
-            "destination": operation.destination.account_id,
-            "amount": None,
-            "code": None,
-            "issuer": None,
-        }
-        if isinstance(operation, Payment):
-            values["amount"] = str(operation.amount)
-            values["code"] = operation.asset.code
-            values["issuer"] = operation.asset.issuer
-        elif isinstance(operation, PathPaymentStrictSend):
-            # since the dest amount is not specified in a strict-send op,
-            # we need to get the dest amount from the operation's result
-            #
-            # this method of fetching amounts gives the "raw" amount, so
-            # we need to divide by Operation._ONE: 10000000
-            # (Stellar uses 7 decimals places of precision)
-            values["amount"] = from_xdr_amount(op_result.success.last.amount.int64)
-            values["code"] = operation.dest_asset.code
-            values["issuer"] = operation.dest_asset.issuer
-        elif isinstance(operation, PathPaymentStrictReceive):
-            values["amount"] = str(operation.dest_amount)
-            values["code"] = operation.dest_asset.code
-            values["issuer"] = operation.dest_asset.issuer
-        else:
-            raise ValueError("Unexpected operation, expected payment or path payment")
-        return values
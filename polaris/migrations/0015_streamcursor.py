@@ -0,0 +1,29 @@
+# Generated by Django 5.1.6 on 2026-10-18 21:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polaris", "0014_auto_20220211_0624"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="StreamCursor",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("account", models.CharField(max_length=69, unique=True)),
+                ("paging_token", models.TextField()),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+        ),
+    ]
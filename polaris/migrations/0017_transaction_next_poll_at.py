@@ -0,0 +1,17 @@
+# Generated by Django 5.1.6 on 2026-10-18 22:14
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polaris", "0016_transaction_lease_expires_at"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="next_poll_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
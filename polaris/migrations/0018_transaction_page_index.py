@@ -0,0 +1,27 @@
+# Generated by Django 5.1.6 on 2026-10-18 23:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polaris", "0017_transaction_next_poll_at"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="transaction",
+            index=models.Index(
+                fields=[
+                    "stellar_account",
+                    "muxed_account",
+                    "account_memo",
+                    "protocol",
+                    "asset",
+                    "-started_at",
+                    "-id",
+                ],
+                name="polaris_transactions_page_idx",
+            ),
+        ),
+    ]
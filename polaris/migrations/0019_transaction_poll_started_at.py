@@ -0,0 +1,30 @@
+# Generated by Django 5.1.6 on 2026-10-19 09:12
+
+from django.db import migrations, models
+
+
+def match_started_at(apps, _schema_editor):
+    # transactions already being polled keep backing off from their start
+    Transaction = apps.get_model("polaris", "Transaction")
+    Transaction.objects.filter(next_poll_at__isnull=False).update(
+        poll_started_at=models.F("started_at")
+    )
+
+
+def nop(*_):
+    pass
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("polaris", "0018_transaction_page_index"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transaction",
+            name="poll_started_at",
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(match_started_at, nop),
+    ]
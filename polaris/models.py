@@ -58,6 +58,21 @@ class PolarisHeartbeat(models.Model):
     objects = models.Manager()
 
 
+class StreamCursor(models.Model):
+    """
+    The paging token of the last Horizon transaction record processed by the
+    watch_transactions.py stream for an account. The stream resumes from this
+    cursor when restarted, and periodically checkpoints its progress by updating
+    it - see watch_transactions.py
+    """
+
+    account = models.CharField(max_length=69, unique=True)
+    paging_token = models.TextField()
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = models.Manager()
+
+
 class PolarisChoices(Choices):
     """A subclass to change the verbose default string representation"""
 
@@ -768,6 +783,30 @@ class Transaction(models.Model):
     process_pending_deposits and execute_outgoing_transactions.
     """
 
+    lease_expires_at = models.DateTimeField(null=True, blank=True)
+    """
+    An internal column used by execute_outgoing_transactions. When
+    ``pending_execution_attempt`` is set and this time has passed, the process that
+    claimed the transaction is assumed to have died and another process can claim it.
+    """
+
+    next_poll_at = models.DateTimeField(null=True, blank=True)
+    """
+    An internal column used by poll_outgoing_transactions and
+    process_pending_deposits. Transactions are not passed to
+    :meth:`~polaris.integrations.RailsIntegration.poll_outgoing_transactions` or
+    :meth:`~polaris.integrations.RailsIntegration.poll_pending_deposits` again until
+    this time has passed.
+    """
+
+    poll_started_at = models.DateTimeField(null=True, blank=True)
+    """
+    An internal column used by poll_outgoing_transactions and
+    process_pending_deposits. The time the transaction was first polled in its
+    current status, from which the delay before polling it again is computed.
+    Cleared along with :attr:`next_poll_at` when the transaction's status changes.
+    """
+
     client_domain = models.TextField(null=True, blank=True)
     """
     The hostname of the client application that requested this transaction on behalf of
@@ -796,9 +835,47 @@ class Transaction(models.Model):
             return None
         return Keypair.from_secret(str(self.channel_seed)).public_key
 
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._loaded_status = instance.__dict__.get("status")
+        return instance
+
+    def save(self, *args, **kwargs):
+        loaded_status = getattr(self, "_loaded_status", None)
+        if loaded_status is not None and self.status != loaded_status:
+            # the transaction is polled again from its new status without waiting
+            # for the delay computed for its previous status
+            self.next_poll_at = None
+            self.poll_started_at = None
+            update_fields = kwargs.get("update_fields")
+            if update_fields is not None:
+                kwargs["update_fields"] = {
+                    *update_fields,
+                    "next_poll_at",
+                    "poll_started_at",
+                }
+        super().save(*args, **kwargs)
+        self._loaded_status = self.status
+
     class Meta:
         ordering = ("-started_at",)
         app_label = "polaris"
+        indexes = [
+            # supports the keyset pagination of the /transactions endpoints
+            models.Index(
+                fields=[
+                    "stellar_account",
+                    "muxed_account",
+                    "account_memo",
+                    "protocol",
+                    "asset",
+                    "-started_at",
+                    "-id",
+                ],
+                name="polaris_transactions_page_idx",
+            )
+        ]
 
 
 class Quote(models.Model):
@@ -17,6 +17,7 @@ from rest_framework.renderers import BaseRenderer
 from rest_framework.decorators import api_view, renderer_classes
 
 from polaris import settings
+from polaris.cache import cached_response, is_cacheable
 from polaris.utils import getLogger
 from polaris.integrations import (
     registered_toml_func,
@@ -55,9 +56,34 @@ def generate_toml(request: Request) -> Response:
         if not static_toml:
             static_toml = finders.find("polaris/stellar.toml")
         if static_toml:
-            with open(static_toml) as f:
-                return Response(f.read(), content_type="text/plain")
-
+            try:
+                stat = os.stat(static_toml)
+            except OSError:
+                return read_static_toml(static_toml)
+            return cached_response(
+                request,
+                f"sep1_toml:{os.path.basename(static_toml)}:{stat.st_mtime_ns}",
+                lambda: read_static_toml(static_toml),
+                timeout=settings.TOML_CACHE_TIMEOUT,
+                last_modified=stat.st_mtime,
+            )
+
+    if not is_cacheable(registered_toml_func):
+        return render_toml(request)
+    return cached_response(
+        request,
+        "sep1_toml",
+        lambda: render_toml(request),
+        timeout=settings.TOML_CACHE_TIMEOUT,
+    )
+
+
+def read_static_toml(path: str) -> Response:
+    with open(path) as f:
+        return Response(f.read(), content_type="text/plain")
+
+
+def render_toml(request: Request) -> Response:
     # The anchor uses the registered TOML function, replaced or not
     toml_dict = {
         "NETWORK_PASSPHRASE": settings.STELLAR_NETWORK_PASSPHRASE,
@@ -0,0 +1,358 @@
+"""
+In-memory caches of the remote data SEP-10 authentication depends on.
+"""
+import asyncio
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import CancelledError, Future
+from hashlib import sha256
+from typing import (
+    Any,
+    Awaitable,
+    Callable,
+    Dict,
+    Hashable,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+)
+
+from polaris.sep10.token import SEP10Token
+from polaris.utils import getLogger
+
+logger = getLogger(__name__)
+HIT, FETCH, REFRESH, WAIT = range(4)
+
+
+class CacheEntry(NamedTuple):
+    value: Any
+    # time.monotonic() value of when the value started being fetched
+    fetched_at: float
+    # the exception raised when fetching the value, if cached
+    error: Optional[BaseException] = None
+
+
+class SingleFlightCache:
+    """
+    A bounded, thread-safe cache of values fetched from remote sources.
+
+    Values are fresh for `ttl` seconds after being fetched. A value older than
+    that is fetched again by the first request for it, while concurrent requests
+    are served the stale value if it is less than `max_staleness` seconds old,
+    or wait for the fetch to complete otherwise. Only one fetch per key is made
+    at a time.
+
+    If `refresh_in_background` is true, the first request for a stale value
+    less than `max_staleness` seconds old is also served the stale value, and
+    the value is fetched on a separate thread instead.
+
+    Exceptions raised when fetching a value are raised to every request waiting
+    for it. Instances of `cached_errors` are cached for `negative_ttl` seconds
+    and raised again to the requests made in that time, other exceptions are
+    not cached. At most `max_size` values are kept, the least recently fetched
+    values being evicted first.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        ttl: float,
+        max_staleness: float = 0,
+        max_size: int = 10000,
+        negative_ttl: float = 0,
+        cached_errors: Tuple[Type[BaseException], ...] = (),
+        refresh_in_background: bool = False,
+    ):
+        self.name = name
+        self.ttl = ttl
+        self.max_staleness = max(ttl, max_staleness)
+        self.max_size = max_size
+        self.negative_ttl = negative_ttl
+        self.cached_errors = cached_errors
+        self.refresh_in_background = refresh_in_background
+        self.entries: Dict[Hashable, CacheEntry] = {}
+        self.fetches: Dict[Hashable, Future] = {}
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._tasks: Set[asyncio.Task] = set()
+
+    def get(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Any],
+        min_fetched_at: Optional[float] = None,
+    ) -> Any:
+        """
+        Returns the value cached for `key`, calling `fetch()` to get it if it isn't
+        cached or is too old.
+
+        If `min_fetched_at` is provided, the cached value is only returned if it
+        was fetched after that ``time.monotonic()`` value, regardless of `ttl`.
+        This allows callers to fetch a value again if the cached one turned out to
+        be outdated, unless another request already did since.
+        """
+        if not self.ttl:
+            return fetch()
+        while True:
+            action, value, now = self._lookup(key, min_fetched_at)
+            if action == HIT:
+                return self._result(value)
+            elif action == FETCH:
+                return self._fetch(key, fetch, value, now)
+            elif action == REFRESH:
+                entry, future = value
+                threading.Thread(
+                    target=self._refresh, args=(key, fetch, future, now), daemon=True
+                ).start()
+                return entry.value
+            try:
+                result = value.result()
+            except CancelledError:
+                # the request fetching the value was cancelled
+                continue
+            if min_fetched_at is None:
+                with self._lock:
+                    self.misses += 1
+                return result
+            # the value may have been fetched before min_fetched_at, check again
+
+    async def aget(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable],
+        min_fetched_at: Optional[float] = None,
+    ) -> Any:
+        """
+        Like :meth:`get`, but awaits `fetch()`, a coroutine function, and waits
+        for other requests fetching the value without blocking the event loop.
+        Values are fetched again in the background on a task of the event loop.
+        """
+        if not self.ttl:
+            return await fetch()
+        while True:
+            action, value, now = self._lookup(key, min_fetched_at)
+            if action == HIT:
+                return self._result(value)
+            elif action == FETCH:
+                return await self._afetch(key, fetch, value, now)
+            elif action == REFRESH:
+                entry, future = value
+                task = asyncio.create_task(self._arefresh(key, fetch, future, now))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+                return entry.value
+            # unlike awaiting it, waiting for the wrapped future doesn't cancel the
+            # fetch if this request is cancelled
+            waiting = asyncio.wrap_future(value)
+            await asyncio.wait([waiting])
+            if waiting.cancelled():
+                # the request fetching the value was cancelled
+                continue
+            result = waiting.result()
+            if min_fetched_at is None:
+                with self._lock:
+                    self.misses += 1
+                return result
+
+    def _lookup(
+        self, key: Hashable, min_fetched_at: Optional[float]
+    ) -> Tuple[int, Any, float]:
+        """
+        Returns the action to take to get the value for `key`, the value to use
+        for it, and the current ``time.monotonic()`` value:
+
+        - ``HIT``: return the cached :class:`CacheEntry` value
+        - ``FETCH``: fetch the value and set the result of the `Future` value
+        - ``REFRESH``: return the stale entry of the ``(entry, future)`` value and
+          fetch the value in the background, setting the result of `future`
+        - ``WAIT``: wait for the result of the `Future` value
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self.entries.get(key)
+            age = now - entry.fetched_at if entry else None
+            if entry and (
+                entry.fetched_at >= min_fetched_at
+                if min_fetched_at is not None
+                else age < (self.negative_ttl if entry.error else self.ttl)
+            ):
+                self.hits += 1
+                return HIT, entry, now
+            stale = (
+                entry
+                and not entry.error
+                and min_fetched_at is None
+                and age < self.max_staleness
+            )
+            fetching = self.fetches.get(key)
+            if not fetching:
+                future = self.fetches[key] = Future()
+                if stale and self.refresh_in_background:
+                    self.stale_hits += 1
+                    return REFRESH, (entry, future), now
+                self.misses += 1
+                return FETCH, future, now
+            if stale:
+                self.stale_hits += 1
+                return HIT, entry, now
+            return WAIT, fetching, now
+
+    def _fetch(
+        self, key: Hashable, fetch: Callable[[], Any], future: Future, started: float
+    ) -> Any:
+        logger.debug(f"{self.name} cache miss for {key}, fetching...")
+        try:
+            value = fetch()
+        except BaseException as e:
+            self._set_exception(key, future, started, e)
+            raise
+        self._set_result(key, future, started, value)
+        return value
+
+    async def _afetch(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable],
+        future: Future,
+        started: float,
+    ) -> Any:
+        logger.debug(f"{self.name} cache miss for {key}, fetching...")
+        try:
+            value = await fetch()
+        except asyncio.CancelledError:
+            with self._lock:
+                del self.fetches[key]
+            future.cancel()
+            raise
+        except BaseException as e:
+            self._set_exception(key, future, started, e)
+            raise
+        self._set_result(key, future, started, value)
+        return value
+
+    def _set_result(self, key: Hashable, future: Future, started: float, value: Any):
+        with self._lock:
+            self._store(key, CacheEntry(value, started))
+            del self.fetches[key]
+        future.set_result(value)
+
+    def _set_exception(
+        self, key: Hashable, future: Future, started: float, error: BaseException
+    ):
+        with self._lock:
+            if self.negative_ttl and isinstance(error, self.cached_errors):
+                self._store(key, CacheEntry(None, started, error))
+            del self.fetches[key]
+        future.set_exception(error)
+
+    def _refresh(
+        self, key: Hashable, fetch: Callable[[], Any], future: Future, started: float
+    ):
+        try:
+            self._fetch(key, fetch, future, started)
+        except Exception as e:
+            logger.warning(f"unable to refresh {self.name} cache for {key}: {e!r}")
+
+    async def _arefresh(
+        self,
+        key: Hashable,
+        fetch: Callable[[], Awaitable],
+        future: Future,
+        started: float,
+    ):
+        try:
+            await self._afetch(key, fetch, future, started)
+        except Exception as e:
+            logger.warning(f"unable to refresh {self.name} cache for {key}: {e!r}")
+
+    def _store(self, key: Hashable, entry: CacheEntry):
+        self.entries.pop(key, None)
+        self.entries[key] = entry
+        while len(self.entries) > self.max_size:
+            del self.entries[next(iter(self.entries))]
+
+    @staticmethod
+    def _result(entry: CacheEntry) -> Any:
+        if entry.error:
+            raise entry.error
+        return entry.value
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the number of fresh and stale cache hits, cache misses, and the
+        fraction of requests served from the cache.
+        """
+        requests = self.hits + self.stale_hits + self.misses
+        return {
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "hit_rate": (self.hits + self.stale_hits) / requests if requests else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.entries.clear()
+
+
+class TokenCache:
+    """
+    A bounded, thread-safe LRU cache of validated SEP-10 tokens, keyed by the
+    SHA-256 hash of the encoded JWT.
+
+    Cached tokens are returned without being validated again until they expire.
+    At most `max_size` tokens are kept, and a `max_size` of 0 disables the cache.
+    """
+
+    def __init__(self, max_size: int = 10000):
+        self.max_size = max_size
+        self.tokens: "OrderedDict[bytes, SEP10Token]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+
+    def get(self, encoded_jwt: str) -> SEP10Token:
+        """
+        Returns the :class:`SEP10Token` for `encoded_jwt`, validating it if it
+        isn't cached or has expired.
+
+        :raises ValueError: the JWT is invalid
+        """
+        if not self.max_size:
+            return SEP10Token(encoded_jwt)
+        key = sha256(encoded_jwt.encode()).digest()
+        with self._lock:
+            token = self.tokens.get(key)
+            if token and time.time() <= token.payload["exp"]:
+                self.tokens.move_to_end(key)
+                self.hits += 1
+                return token
+            self.tokens.pop(key, None)
+            self.misses += 1
+        token = SEP10Token(encoded_jwt)
+        with self._lock:
+            self.tokens[key] = token
+            while len(self.tokens) > self.max_size:
+                self.tokens.popitem(last=False)
+        return token
+
+    def stats(self) -> Dict[str, float]:
+        """
+        Returns the number of cache hits and misses, and the fraction of tokens
+        served from the cache.
+        """
+        requests = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / requests if requests else 0.0,
+        }
+
+    def clear(self):
+        with self._lock:
+            self.tokens.clear()
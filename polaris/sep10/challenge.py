@@ -0,0 +1,170 @@
+"""
+Verification of signed SEP-10 challenge transactions decoded once per request.
+"""
+from typing import Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+from stellar_sdk import Keypair, MuxedAccount
+from stellar_sdk.exceptions import BadSignatureError
+from stellar_sdk.operation import ManageData
+from stellar_sdk.sep.ed25519_public_key_signer import Ed25519PublicKeySigner
+from stellar_sdk.sep.exceptions import InvalidSep10ChallengeError
+from stellar_sdk.sep.stellar_web_authentication import read_challenge_transaction
+
+from polaris import settings
+
+
+class Challenge:
+    """
+    A challenge transaction signed by the client, read and checked by
+    ``read_challenge_transaction()`` from its envelope XDR.
+
+    The ``verify_challenge_transaction_*()`` functions of ``stellar_sdk`` decode
+    and check the envelope XDR again on every call. The methods of this class
+    perform the same verifications on the decoded transaction instead, hashing
+    it once and verifying each signature at most once per key.
+
+    :raises InvalidSep10ChallengeError: the transaction is not a valid challenge
+    """
+
+    def __init__(self, envelope_xdr: str):
+        self.challenge = read_challenge_transaction(
+            challenge_transaction=envelope_xdr,
+            server_account_id=settings.SIGNING_KEY,
+            home_domains=settings.SEP10_HOME_DOMAINS,
+            web_auth_domain=urlparse(settings.HOST_URL).netloc,
+            network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+        )
+        self.envelope = self.challenge.transaction
+        self.transaction = self.envelope.transaction
+        self.client_account_id = self.challenge.client_account_id
+        self.memo = self.challenge.memo
+        # the Stellar account of the muxed account, to check for its existence
+        self.stellar_account = self.client_account_id
+        if self.client_account_id.startswith("M"):
+            self.stellar_account = MuxedAccount.from_account(
+                self.client_account_id
+            ).account_id
+        self.client_domain: Optional[str] = None
+        self.client_signing_key: Optional[str] = None
+        for operation in self.transaction.operations:
+            if (
+                isinstance(operation, ManageData)
+                and operation.data_name == "client_domain"
+            ):
+                self.client_domain = operation.data_value.decode()
+                self.client_signing_key = operation.source.account_id
+                break
+        self.hash = self.envelope.hash()
+        self._verified_signatures: Dict[Tuple[str, int], bool] = {}
+
+    def verify_signers(
+        self, signers: Sequence[Ed25519PublicKeySigner]
+    ) -> List[Ed25519PublicKeySigner]:
+        """
+        Verifies that every signature of the challenge is from the server, the
+        ``client_domain`` signing key if any, or one of `signers`, and returns the
+        client signers found.
+
+        Equivalent to ``verify_challenge_transaction_signers()``.
+        """
+        if not signers:
+            raise InvalidSep10ChallengeError("No signers provided.")
+        server_account_id = settings.SIGNING_KEY
+        # the server may be a signer of the client account, but must not take
+        # part in the authentication of the client
+        all_signers = [s for s in signers if s.account_id != server_account_id]
+        all_signers.append(Ed25519PublicKeySigner(server_account_id))
+        if self.client_signing_key:
+            all_signers.append(Ed25519PublicKeySigner(self.client_signing_key))
+        all_signers_found = self._signers_found(all_signers)
+
+        signers_found = []
+        server_signer_found = client_signing_key_found = False
+        for signer in all_signers_found:
+            if signer.account_id == server_account_id:
+                server_signer_found = True
+            elif signer.account_id == self.client_signing_key:
+                client_signing_key_found = True
+            elif all(s.account_id != signer.account_id for s in signers_found):
+                signers_found.append(signer)
+
+        if not server_signer_found:
+            raise InvalidSep10ChallengeError(
+                f"Transaction not signed by server: {server_account_id}."
+            )
+        if self.client_signing_key and not client_signing_key_found:
+            raise InvalidSep10ChallengeError(
+                "Transaction not signed by the source account of the 'client_domain' "
+                "ManageData operation"
+            )
+        if not signers_found:
+            raise InvalidSep10ChallengeError(
+                "Transaction not signed by any client signer."
+            )
+        if len(all_signers_found) != len(self.envelope.signatures):
+            raise InvalidSep10ChallengeError("Transaction has unrecognized signatures.")
+        return signers_found
+
+    def verify_threshold(
+        self, signers: Sequence[Ed25519PublicKeySigner], threshold: int
+    ) -> List[Ed25519PublicKeySigner]:
+        """
+        Verifies the challenge's signatures with :meth:`verify_signers` and that
+        the weight of the client signers found meets `threshold`.
+
+        Equivalent to ``verify_challenge_transaction_threshold()``.
+        """
+        signers_found = self.verify_signers(signers)
+        weight = sum(signer.weight for signer in signers_found)
+        if weight < threshold:
+            raise InvalidSep10ChallengeError(
+                f"signers with weight {weight} do not meet threshold {threshold}."
+            )
+        return signers_found
+
+    def verify_master_key(self):
+        """
+        Verifies that the challenge is signed by the master key of the client
+        account, and not by any other client signer.
+
+        Equivalent to ``verify_challenge_transaction_signed_by_client_master_key()``.
+        """
+        self.verify_signers([Ed25519PublicKeySigner(self.stellar_account, 255)])
+
+    def _signers_found(
+        self, signers: Sequence[Ed25519PublicKeySigner]
+    ) -> List[Ed25519PublicKeySigner]:
+        """
+        Returns the signers that signed the challenge, using each signature at
+        most once.
+        """
+        signatures = self.envelope.signatures
+        if not signatures:
+            raise InvalidSep10ChallengeError("Transaction has no signatures.")
+        signers_found = []
+        signatures_used = set()
+        for signer in signers:
+            kp = Keypair.from_public_key(signer.account_id)
+            hint = kp.signature_hint()
+            for index, decorated_signature in enumerate(signatures):
+                if (
+                    index not in signatures_used
+                    and decorated_signature.signature_hint == hint
+                    and self._signed_by(kp, index)
+                ):
+                    signatures_used.add(index)
+                    signers_found.append(signer)
+                    break
+        return signers_found
+
+    def _signed_by(self, kp: Keypair, index: int) -> bool:
+        key = (kp.public_key, index)
+        if key not in self._verified_signatures:
+            try:
+                kp.verify(self.hash, self.envelope.signatures[index].signature)
+            except BadSignatureError:
+                self._verified_signatures[key] = False
+            else:
+                self._verified_signatures[key] = True
+        return self._verified_signatures[key]
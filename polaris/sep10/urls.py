@@ -1,5 +1,9 @@
 """This module defines the URL patterns for the `/auth` endpoint."""
 from django.urls import path
-from polaris.sep10.views import SEP10Auth
 
-urlpatterns = [path("", SEP10Auth.as_view())]
+from polaris import settings
+from polaris.sep10.views import AsyncSEP10Auth, SEP10Auth
+
+urlpatterns = [
+    path("", (AsyncSEP10Auth if settings.ASYNC_VIEWS else SEP10Auth).as_view())
+]
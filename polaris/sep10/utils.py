@@ -1,10 +1,16 @@
+import asyncio
+
 from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from polaris import settings
+from polaris.sep10.cache import TokenCache
 from polaris.sep10.token import SEP10Token
 from polaris.utils import render_error_response
 
+token_cache = TokenCache(max_size=settings.SEP10_TOKEN_CACHE_SIZE)
+
 
 def check_auth(request, func, *args, **kwargs):
     """
@@ -21,6 +27,16 @@ def check_auth(request, func, *args, **kwargs):
     return func(token, request, *args, **kwargs)
 
 
+async def acheck_auth(request, func, *args, **kwargs):
+    """
+    Like :func:`check_auth`, awaiting the original view coroutine function.
+    """
+    response = check_auth(request, func, *args, **kwargs)
+    if asyncio.iscoroutine(response):
+        response = await response
+    return response
+
+
 def validate_sep10_token():
     """Decorator to validate the SEP 10 token in a request."""
 
@@ -57,6 +73,6 @@ def validate_jwt_request(request: Request) -> SEP10Token:
         raise bad_format_error
 
     try:
-        return SEP10Token(encoded_jwt)
+        return token_cache.get(encoded_jwt)
     except ValueError as e:
         raise ValueError(f"SEP-10 token error: {str(e)}")
@@ -6,8 +6,12 @@ on behalf of a user who holds a Stellar account.
 See: https://github.com/stellar/stellar-protocol/blob/master/ecosystem/sep-0010.md
 """
 import os
+import time
+import asyncio
 import jwt
 import toml
+from functools import partial
+from typing import Dict, List, MutableMapping, Optional, Tuple
 from urllib.parse import urlparse
 
 from django.utils.translation import gettext
@@ -17,13 +21,10 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.parsers import JSONParser, MultiPartParser, FormParser
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
-from stellar_sdk.operation import ManageData
-from stellar_sdk.sep.stellar_toml import fetch_stellar_toml
+from stellar_sdk.sep.ed25519_public_key_signer import Ed25519PublicKeySigner
+from stellar_sdk.sep.stellar_toml import fetch_stellar_toml, fetch_stellar_toml_async
 from stellar_sdk.sep.stellar_web_authentication import (
     build_challenge_transaction,
-    read_challenge_transaction,
-    verify_challenge_transaction_threshold,
-    verify_challenge_transaction_signed_by_client_master_key,
 )
 from stellar_sdk.sep.exceptions import (
     InvalidSep10ChallengeError,
@@ -34,14 +35,37 @@ from stellar_sdk.exceptions import (
     ConnectionError,
     Ed25519PublicKeyInvalidError,
 )
-from stellar_sdk import Keypair, MuxedAccount
+from stellar_sdk import Keypair
+from stellar_sdk.client.aiohttp_client import AiohttpClient
 from stellar_sdk.client.requests_client import RequestsClient
 
 from polaris import settings
-from polaris.utils import getLogger, render_error_response
+from polaris.sep10.cache import SingleFlightCache
+from polaris.sep10.challenge import Challenge
+from polaris.shared.views import AsyncAPIView
+from polaris.utils import getLogger, get_horizon_server_async, render_error_response
 
 MIME_URLENCODE, MIME_JSON = "application/x-www-form-urlencoded", "application/json"
 logger = getLogger(__name__)
+signers_cache = SingleFlightCache(
+    "account signers",
+    ttl=settings.SEP10_SIGNERS_CACHE_TTL,
+    max_staleness=settings.SEP10_SIGNERS_CACHE_MAX_STALENESS,
+)
+# errors raised when a 'client_domain' SIGNING_KEY can't be fetched
+CLIENT_DOMAIN_FETCH_ERRORS = (
+    ConnectionError,
+    StellarTomlNotFoundError,
+    toml.decoder.TomlDecodeError,
+)
+client_domain_cache = SingleFlightCache(
+    "client domain signing keys",
+    ttl=settings.SEP10_CLIENT_DOMAIN_CACHE_TTL,
+    max_staleness=settings.SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS,
+    negative_ttl=settings.SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL,
+    cached_errors=(*CLIENT_DOMAIN_FETCH_ERRORS, ValueError),
+    refresh_in_background=True,
+)
 
 
 class SEP10Auth(APIView):
@@ -59,9 +83,29 @@ class SEP10Auth(APIView):
     # GET functions
     ###############
     def get(self, request, *_args, **_kwargs) -> Response:
+        params, error_response = self._parse_challenge_request(request)
+        if error_response:
+            return error_response
+        client_domain, client_signing_key = params["client_domain"], None
+        if client_domain:
+            try:
+                client_signing_key = client_domain_cache.get(
+                    client_domain, partial(self._get_client_signing_key, client_domain)
+                )
+            except (*CLIENT_DOMAIN_FETCH_ERRORS, ValueError) as e:
+                return self._client_signing_key_error_response(e)
+        return self._challenge_response(client_signing_key=client_signing_key, **params)
+
+    @staticmethod
+    def _parse_challenge_request(request: Request) -> Tuple[Dict, Optional[Response]]:
+        """
+        Validates the parameters of a `GET /auth` request, returning the
+        `account`, `home_domain`, `client_domain`, and `memo` to use for the
+        challenge, or an error response.
+        """
         account = request.GET.get("account")
         if not account:
-            return Response(
+            return {}, Response(
                 {"error": "no 'account' provided"}, status=status.HTTP_400_BAD_REQUEST
             )
 
@@ -70,12 +114,12 @@ class SEP10Auth(APIView):
             try:
                 memo = int(memo)
             except ValueError:
-                return Response(
+                return {}, Response(
                     {"error": "invalid 'memo' value. Expected a 64-bit integer."},
                     status=status.HTTP_400_BAD_REQUEST,
                 )
             if account.startswith("M"):
-                return Response(
+                return {}, Response(
                     {
                         "error": "'memo' cannot be passed with a muxed client account address (M...)"
                     },
@@ -84,7 +128,7 @@ class SEP10Auth(APIView):
 
         home_domain = request.GET.get("home_domain")
         if home_domain and home_domain not in settings.SEP10_HOME_DOMAINS:
-            return Response(
+            return {}, Response(
                 {
                     "error": f"invalid 'home_domain' value. Accepted values: {settings.SEP10_HOME_DOMAINS}"
                 },
@@ -93,14 +137,14 @@ class SEP10Auth(APIView):
         elif not home_domain:
             home_domain = settings.SEP10_HOME_DOMAINS[0]
 
-        client_domain, client_signing_key = request.GET.get("client_domain"), None
+        client_domain = request.GET.get("client_domain")
         if settings.SEP10_CLIENT_ATTRIBUTION_REQUIRED and not client_domain:
-            return render_error_response(
+            return {}, render_error_response(
                 gettext("'client_domain' is required"), status_code=400
             )
         elif client_domain:
             if urlparse(f"https://{client_domain}").netloc != client_domain:
-                return render_error_response(
+                return {}, render_error_response(
                     gettext("'client_domain' must be a valid hostname"), status_code=400
                 )
             elif (
@@ -111,28 +155,33 @@ class SEP10Auth(APIView):
                 and client_domain not in settings.SEP10_CLIENT_ATTRIBUTION_ALLOWLIST
             ):
                 if settings.SEP10_CLIENT_ATTRIBUTION_REQUIRED:
-                    return render_error_response(
+                    return {}, render_error_response(
                         gettext("unrecognized 'client_domain'"), status_code=403
                     )
                 else:
                     client_domain = None
 
-        if client_domain:
-            try:
-                client_signing_key = self._get_client_signing_key(client_domain)
-            except (
-                ConnectionError,
-                StellarTomlNotFoundError,
-                toml.decoder.TomlDecodeError,
-            ):
-                return render_error_response(
-                    gettext("unable to fetch 'client_domain' SIGNING_KEY"),
-                )
-            except ValueError as e:
-                return render_error_response(str(e))
+        return {
+            "account": account,
+            "home_domain": home_domain,
+            "client_domain": client_domain,
+            "memo": memo,
+        }, None
 
+    @staticmethod
+    def _client_signing_key_error_response(error: Exception) -> Response:
+        if isinstance(error, CLIENT_DOMAIN_FETCH_ERRORS):
+            return render_error_response(
+                gettext("unable to fetch 'client_domain' SIGNING_KEY"),
+            )
+        return render_error_response(str(error))
+
+    @staticmethod
+    def _challenge_response(
+        account, home_domain, client_domain, client_signing_key, memo
+    ) -> Response:
         try:
-            transaction = self._challenge_transaction(
+            transaction = SEP10Auth._challenge_transaction(
                 account, home_domain, client_domain, client_signing_key, memo
             )
         except ValueError as e:
@@ -178,16 +227,19 @@ class SEP10Auth(APIView):
         envelope_xdr = request.data.get("transaction")
         if not envelope_xdr:
             return render_error_response(gettext("'transaction' is required"))
-        client_domain, error_response = self._validate_challenge_xdr(envelope_xdr)
+        challenge, error_response = self._validate_challenge_xdr(envelope_xdr)
         if error_response:
             return error_response
         else:
-            return Response({"token": self._generate_jwt(envelope_xdr, client_domain)})
+            return Response({"token": self._generate_jwt(challenge)})
 
     @staticmethod
-    def _validate_challenge_xdr(envelope_xdr: str):
+    def _validate_challenge_xdr(
+        envelope_xdr: str,
+    ) -> Tuple[Optional[Challenge], Optional[Response]]:
         """
-        Validate the provided TransactionEnvelope XDR (base64 string).
+        Validate the provided TransactionEnvelope XDR (base64 string), returning
+        the decoded :class:`Challenge` or an error response.
 
         If the source account of the challenge transaction exists, verify the weight
         of the signers on the challenge are signers for the account and the medium
@@ -199,98 +251,108 @@ class SEP10Auth(APIView):
         with a weight greater than the default thresholds.
         """
         logger.info("Validating challenge transaction")
-        generic_err_msg = gettext("error while validating challenge: %s")
-        try:
-            challenge = read_challenge_transaction(
-                challenge_transaction=envelope_xdr,
-                server_account_id=settings.SIGNING_KEY,
-                home_domains=settings.SEP10_HOME_DOMAINS,
-                web_auth_domain=urlparse(settings.HOST_URL).netloc,
-                network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
-            )
-        except (InvalidSep10ChallengeError, TypeError) as e:
-            return None, render_error_response(generic_err_msg % (str(e)))
-
-        client_domain = None
-        for operation in challenge.transaction.transaction.operations:
-            if (
-                isinstance(operation, ManageData)
-                and operation.data_name == "client_domain"
-            ):
-                client_domain = operation.data_value.decode()
-                break
-
-        # extract the Stellar account from the muxed account to check for its existence
-        stellar_account = challenge.client_account_id
-        if challenge.client_account_id.startswith("M"):
-            stellar_account = MuxedAccount.from_account(
-                challenge.client_account_id
-            ).account_id
+        challenge, error_response = SEP10Auth._read_challenge(envelope_xdr)
+        if error_response:
+            return None, error_response
 
+        stellar_account = challenge.stellar_account
+        started = time.monotonic()
+        load_signers = partial(SEP10Auth._load_signers, stellar_account)
         try:
-            account = settings.HORIZON_SERVER.load_account(stellar_account)
+            signers_and_threshold = signers_cache.get(stellar_account, load_signers)
         except NotFoundError:
-            logger.info("Account does not exist, using client's master key to verify")
+            return SEP10Auth._verify_master_key(challenge)
+
+        error_response = SEP10Auth._verify_signers(challenge, signers_and_threshold)
+        if error_response:
+            # the signers or threshold of the account may have changed since they
+            # were cached, verify the challenge again with up-to-date values
             try:
-                verify_challenge_transaction_signed_by_client_master_key(
-                    challenge_transaction=envelope_xdr,
-                    server_account_id=settings.SIGNING_KEY,
-                    home_domains=settings.SEP10_HOME_DOMAINS,
-                    web_auth_domain=urlparse(settings.HOST_URL).netloc,
-                    network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+                fresh_signers_and_threshold = signers_cache.get(
+                    stellar_account, load_signers, min_fetched_at=started
                 )
-                if (client_domain and len(challenge.transaction.signatures) != 3) or (
-                    not client_domain and len(challenge.transaction.signatures) != 2
-                ):
-                    raise InvalidSep10ChallengeError(
-                        gettext(
-                            "There is more than one client signer on a challenge "
-                            "transaction for an account that doesn't exist"
-                        )
+            except NotFoundError:
+                return None, error_response
+            if fresh_signers_and_threshold is signers_and_threshold:
+                return None, error_response
+            error_response = SEP10Auth._verify_signers(
+                challenge, fresh_signers_and_threshold
+            )
+        return (None, error_response) if error_response else (challenge, None)
+
+    @staticmethod
+    def _read_challenge(
+        envelope_xdr: str,
+    ) -> Tuple[Optional[Challenge], Optional[Response]]:
+        try:
+            return Challenge(envelope_xdr), None
+        except (InvalidSep10ChallengeError, TypeError) as e:
+            return None, SEP10Auth._challenge_error_response(e)
+
+    @staticmethod
+    def _verify_master_key(
+        challenge: Challenge,
+    ) -> Tuple[Optional[Challenge], Optional[Response]]:
+        logger.info("Account does not exist, using client's master key to verify")
+        try:
+            challenge.verify_master_key()
+            signatures = challenge.envelope.signatures
+            if (challenge.client_domain and len(signatures) != 3) or (
+                not challenge.client_domain and len(signatures) != 2
+            ):
+                raise InvalidSep10ChallengeError(
+                    gettext(
+                        "There is more than one client signer on a challenge "
+                        "transaction for an account that doesn't exist"
                     )
-            except InvalidSep10ChallengeError as e:
-                logger.info(
-                    f"Missing or invalid signature(s) for {challenge.client_account_id}: {str(e)}"
                 )
-                return None, render_error_response(generic_err_msg % (str(e)))
-            else:
-                logger.info("Challenge verified using client's master key")
-                return client_domain, None
+        except InvalidSep10ChallengeError as e:
+            logger.info(
+                f"Missing or invalid signature(s) for {challenge.client_account_id}: {str(e)}"
+            )
+            return None, SEP10Auth._challenge_error_response(e)
+        logger.info("Challenge verified using client's master key")
+        return challenge, None
 
-        signers = account.load_ed25519_public_key_signers()
-        threshold = account.thresholds.med_threshold
+    @staticmethod
+    def _verify_signers(
+        challenge: Challenge,
+        signers_and_threshold: Tuple[List[Ed25519PublicKeySigner], int],
+    ) -> Optional[Response]:
         try:
-            signers_found = verify_challenge_transaction_threshold(
-                challenge_transaction=envelope_xdr,
-                server_account_id=settings.SIGNING_KEY,
-                home_domains=settings.SEP10_HOME_DOMAINS,
-                web_auth_domain=urlparse(settings.HOST_URL).netloc,
-                network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
-                threshold=threshold,
-                signers=signers,
-            )
+            signers_found = challenge.verify_threshold(*signers_and_threshold)
         except InvalidSep10ChallengeError as e:
-            return None, render_error_response(generic_err_msg % (str(e)))
-
+            return SEP10Auth._challenge_error_response(e)
         logger.info(
             f"Challenge verified using account signers: {[s.account_id for s in signers_found]}"
         )
-        return client_domain, None
 
     @staticmethod
-    def _generate_jwt(envelope_xdr: str, client_domain: str = None) -> str:
+    def _challenge_error_response(error: Exception) -> Response:
+        return render_error_response(
+            gettext("error while validating challenge: %s") % (str(error))
+        )
+
+    @staticmethod
+    def _load_signers(stellar_account: str) -> Tuple[List[Ed25519PublicKeySigner], int]:
         """
-        Generates the JSON web token from the challenge transaction XDR.
+        Returns the signers and medium threshold of `stellar_account`.
 
-        See: https://github.com/stellar/stellar-protocol/blob/master/ecosystem/sep-0010.md#token
+        :raises NotFoundError: the account doesn't exist
         """
-        challenge = read_challenge_transaction(
-            challenge_transaction=envelope_xdr,
-            server_account_id=settings.SIGNING_KEY,
-            home_domains=settings.SEP10_HOME_DOMAINS,
-            web_auth_domain=urlparse(settings.HOST_URL).netloc,
-            network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+        account = settings.HORIZON_SERVER.load_account(stellar_account)
+        return (
+            account.load_ed25519_public_key_signers(),
+            account.thresholds.med_threshold,
         )
+
+    @staticmethod
+    def _generate_jwt(challenge: Challenge) -> str:
+        """
+        Generates the JSON web token from the verified challenge transaction.
+
+        See: https://github.com/stellar/stellar-protocol/blob/master/ecosystem/sep-0010.md#token
+        """
         logger.info(
             f"Generating SEP-10 token for account {challenge.client_account_id}"
         )
@@ -298,7 +360,7 @@ class SEP10Auth(APIView):
         # set iat value to minimum timebound of the challenge so that the JWT returned
         # for a given challenge is always the same.
         # https://github.com/stellar/stellar-protocol/pull/982
-        issued_at = challenge.transaction.transaction.preconditions.time_bounds.min_time
+        issued_at = challenge.transaction.preconditions.time_bounds.min_time
 
         # format sub value based on muxed account or memo
         if challenge.client_account_id.startswith("M") or not challenge.memo:
@@ -311,8 +373,8 @@ class SEP10Auth(APIView):
             "sub": sub,
             "iat": issued_at,
             "exp": issued_at + 24 * 60 * 60,
-            "jti": challenge.transaction.hash().hex(),
-            "client_domain": client_domain,
+            "jti": challenge.hash.hex(),
+            "client_domain": challenge.client_domain,
         }
         return jwt.encode(jwt_dict, settings.SERVER_JWT_KEY, algorithm="HS256")
 
@@ -324,6 +386,10 @@ class SEP10Auth(APIView):
                 request_timeout=settings.SEP10_CLIENT_ATTRIBUTION_REQUEST_TIMEOUT
             ),
         )
+        return SEP10Auth._parse_client_signing_key(client_toml_contents)
+
+    @staticmethod
+    def _parse_client_signing_key(client_toml_contents: MutableMapping) -> str:
         client_signing_key = client_toml_contents.get("SIGNING_KEY")
         if not client_signing_key:
             raise ValueError(gettext("SIGNING_KEY not present on 'client_domain' TOML"))
@@ -334,3 +400,105 @@ class SEP10Auth(APIView):
                 gettext("invalid SIGNING_KEY value on 'client_domain' TOML")
             )
         return client_signing_key
+
+
+class AsyncSEP10Auth(AsyncAPIView, SEP10Auth):
+    """
+    An asynchronous version of :class:`SEP10Auth`, used instead when
+    ``ASYNC_VIEWS`` is enabled.
+
+    Account signers are loaded from Horizon using ``ServerAsync`` and
+    ``client_domain`` stellar.toml files are fetched using aiohttp, so an ASGI
+    server can serve other requests while waiting for the responses.
+    """
+
+    async def get(self, request, *_args, **_kwargs) -> Response:
+        params, error_response = self._parse_challenge_request(request)
+        if error_response:
+            return error_response
+        client_domain, client_signing_key = params["client_domain"], None
+        if client_domain:
+            try:
+                client_signing_key = await client_domain_cache.aget(
+                    client_domain,
+                    partial(self._aget_client_signing_key, client_domain),
+                )
+            except (*CLIENT_DOMAIN_FETCH_ERRORS, ValueError) as e:
+                return self._client_signing_key_error_response(e)
+        return self._challenge_response(client_signing_key=client_signing_key, **params)
+
+    async def post(self, request: Request, *_args, **_kwargs) -> Response:
+        envelope_xdr = request.data.get("transaction")
+        if not envelope_xdr:
+            return render_error_response(gettext("'transaction' is required"))
+        challenge, error_response = await self._avalidate_challenge_xdr(envelope_xdr)
+        if error_response:
+            return error_response
+        else:
+            return Response({"token": self._generate_jwt(challenge)})
+
+    @staticmethod
+    async def _avalidate_challenge_xdr(
+        envelope_xdr: str,
+    ) -> Tuple[Optional[Challenge], Optional[Response]]:
+        """
+        Like :meth:`SEP10Auth._validate_challenge_xdr`, loading the signers of the
+        account using :meth:`_aload_signers`.
+        """
+        logger.info("Validating challenge transaction")
+        challenge, error_response = SEP10Auth._read_challenge(envelope_xdr)
+        if error_response:
+            return None, error_response
+
+        stellar_account = challenge.stellar_account
+        started = time.monotonic()
+        load_signers = partial(AsyncSEP10Auth._aload_signers, stellar_account)
+        try:
+            signers_and_threshold = await signers_cache.aget(
+                stellar_account, load_signers
+            )
+        except NotFoundError:
+            return SEP10Auth._verify_master_key(challenge)
+
+        error_response = SEP10Auth._verify_signers(challenge, signers_and_threshold)
+        if error_response:
+            try:
+                fresh_signers_and_threshold = await signers_cache.aget(
+                    stellar_account, load_signers, min_fetched_at=started
+                )
+            except NotFoundError:
+                return None, error_response
+            if fresh_signers_and_threshold is signers_and_threshold:
+                return None, error_response
+            error_response = SEP10Auth._verify_signers(
+                challenge, fresh_signers_and_threshold
+            )
+        return (None, error_response) if error_response else (challenge, None)
+
+    @staticmethod
+    async def _aload_signers(
+        stellar_account: str,
+    ) -> Tuple[List[Ed25519PublicKeySigner], int]:
+        """
+        Returns the signers and medium threshold of `stellar_account`.
+
+        :raises NotFoundError: the account doesn't exist
+        """
+        account = await get_horizon_server_async().load_account(stellar_account)
+        return (
+            account.load_ed25519_public_key_signers(),
+            account.thresholds.med_threshold,
+        )
+
+    @staticmethod
+    async def _aget_client_signing_key(client_domain: str) -> str:
+        async with AiohttpClient(
+            request_timeout=settings.SEP10_CLIENT_ATTRIBUTION_REQUEST_TIMEOUT
+        ) as client:
+            try:
+                client_toml_contents = await fetch_stellar_toml_async(
+                    client_domain, client=client
+                )
+            except asyncio.TimeoutError as e:
+                raise ConnectionError(e)
+        return SEP10Auth._parse_client_signing_key(client_toml_contents)
@@ -1,6 +1,8 @@
 from decimal import Decimal, DecimalException
+from typing import Dict, Optional, Tuple
 from urllib.parse import urlencode
 
+from asgiref.sync import sync_to_async
 from django.core.exceptions import ObjectDoesNotExist, ValidationError
 from django.core.validators import URLValidator
 from django.urls import reverse
@@ -35,9 +37,12 @@ from polaris.utils import (
     create_transaction_id,
     make_memo,
     get_account_obj,
+    get_account_obj_async,
+    get_horizon_server_async,
 )
-from polaris.sep10.utils import validate_sep10_token
+from polaris.sep10.utils import acheck_auth, validate_sep10_token
 from polaris.sep10.token import SEP10Token
+from polaris.shared.views import AsyncAPIView
 from polaris.sep24.utils import (
     check_authentication,
     interactive_url,
@@ -420,6 +425,60 @@ def deposit(token: SEP10Token, request: Request) -> Response:
     Creates an `incomplete` deposit Transaction object in the database and
     returns the URL entry-point for the interactive flow.
     """
+    params, error_response = parse_deposit_request(token, request)
+    if error_response:
+        return error_response
+    if not rci.account_creation_supported:
+        try:
+            get_account_obj(Keypair.from_public_key(params["stellar_account"]))
+        except RuntimeError:
+            return render_error_response(
+                _("public key 'account' must be a funded Stellar account")
+            )
+    return create_deposit(token, request, params)
+
+
+class AsyncDeposit(AsyncAPIView):
+    """
+    An asynchronous version of :func:`deposit`, used instead when ``ASYNC_VIEWS``
+    is enabled.
+
+    If account creation isn't supported, the ``account`` is loaded from Horizon
+    using ``ServerAsync``, so an ASGI server can serve other requests while
+    waiting for the response.
+    """
+
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+
+    async def post(self, request: Request, *_args, **_kwargs) -> Response:
+        return await acheck_auth(request, adeposit)
+
+
+async def adeposit(token: SEP10Token, request: Request) -> Response:
+    params, error_response = await sync_to_async(parse_deposit_request)(token, request)
+    if error_response:
+        return error_response
+    if not rci.account_creation_supported:
+        try:
+            await get_account_obj_async(
+                Keypair.from_public_key(params["stellar_account"]),
+                get_horizon_server_async(),
+            )
+        except RuntimeError:
+            return render_error_response(
+                _("public key 'account' must be a funded Stellar account")
+            )
+    return await sync_to_async(create_deposit)(token, request, params)
+
+
+def parse_deposit_request(
+    token: SEP10Token, request: Request
+) -> Tuple[Optional[Dict], Optional[Response]]:
+    """
+    Validates the arguments of a ``POST /transactions/deposit/interactive``
+    request, returning the parsed arguments or an error response.
+    """
     asset_code = request.data.get("asset_code")
     destination_account = (
         request.data.get("account") or token.muxed_account or token.account
@@ -434,12 +493,12 @@ def deposit(token: SEP10Token, request: Request) -> Response:
         claimable_balance_supported = False
     elif isinstance(claimable_balance_supported, str):
         if claimable_balance_supported.lower() not in ["true", "false"]:
-            return render_error_response(
+            return None, render_error_response(
                 _("'claimable_balance_supported' value must be 'true' or 'false'")
             )
         claimable_balance_supported = claimable_balance_supported.lower() == "true"
     elif not isinstance(claimable_balance_supported, bool):
-        return render_error_response(
+        return None, render_error_response(
             _(
                 "unexpected data type for 'claimable_balance_supprted'. Expected string or boolean."
             )
@@ -447,51 +506,65 @@ def deposit(token: SEP10Token, request: Request) -> Response:
 
     # Verify that the request is valid.
     if not asset_code:
-        return render_error_response(_("`asset_code` is required"))
+        return None, render_error_response(_("`asset_code` is required"))
 
     # Ensure memo won't cause stellar transaction to fail when submitted
     try:
         make_memo(request.data.get("memo"), request.data.get("memo_type"))
     except (ValueError, TypeError):
-        return render_error_response(_("invalid 'memo' for 'memo_type'"))
+        return None, render_error_response(_("invalid 'memo' for 'memo_type'"))
 
     # Verify that the asset code exists in our database, with deposit enabled.
     asset = Asset.objects.filter(code=asset_code).first()
     if not asset:
-        return render_error_response(_("unknown asset: %s") % asset_code)
+        return None, render_error_response(_("unknown asset: %s") % asset_code)
     elif not (asset.deposit_enabled and asset.sep24_enabled):
-        return render_error_response(_("invalid operation for asset %s") % asset_code)
+        return None, render_error_response(
+            _("invalid operation for asset %s") % asset_code
+        )
 
     amount = None
     if request.data.get("amount"):
         try:
             amount = Decimal(request.data.get("amount"))
         except DecimalException:
-            return render_error_response(_("invalid 'amount'"))
+            return None, render_error_response(_("invalid 'amount'"))
         if not (asset.deposit_min_amount <= amount <= asset.deposit_max_amount):
-            return render_error_response(_("invalid 'amount'"))
+            return None, render_error_response(_("invalid 'amount'"))
 
     stellar_account = destination_account
     if destination_account.startswith("M"):
         try:
             stellar_account = StrKey.decode_muxed_account(destination_account).ed25519
         except (MuxedEd25519AccountInvalidError, ValueError):
-            return render_error_response(_("invalid 'account'"))
+            return None, render_error_response(_("invalid 'account'"))
     else:
         try:
             Keypair.from_public_key(destination_account)
         except Ed25519PublicKeyInvalidError:
-            return render_error_response(_("invalid 'account'"))
+            return None, render_error_response(_("invalid 'account'"))
+
+    return (
+        {
+            "asset_code": asset_code,
+            "asset": asset,
+            "amount": amount,
+            "destination_account": destination_account,
+            "stellar_account": stellar_account,
+            "lang": lang,
+            "sep9_fields": sep9_fields,
+            "claimable_balance_supported": claimable_balance_supported,
+        },
+        None,
+    )
 
-    if not rci.account_creation_supported:
-        try:
-            get_account_obj(Keypair.from_public_key(stellar_account))
-        except RuntimeError:
-            return render_error_response(
-                _("public key 'account' must be a funded Stellar account")
-            )
 
-    if sep9_fields:
+def create_deposit(token: SEP10Token, request: Request, params: Dict) -> Response:
+    """
+    Saves the SEP-9 fields of a validated ``POST /transactions/deposit/interactive``
+    request and creates its transaction.
+    """
+    if params["sep9_fields"]:
         try:
             rdi.save_sep9_fields(
                 token=token,
@@ -500,8 +573,8 @@ def deposit(token: SEP10Token, request: Request) -> Response:
                 muxed_account=token.muxed_account,
                 account_memo=str(token.memo) if token.memo else None,
                 account_memo_type=Transaction.MEMO_TYPES.id if token.memo else None,
-                fields=sep9_fields,
-                language_code=lang,
+                fields=params["sep9_fields"],
+                language_code=params["lang"],
             )
         except ValueError as e:
             # The anchor found a validation error in the sep-9 fields POSTed by
@@ -520,12 +593,12 @@ def deposit(token: SEP10Token, request: Request) -> Response:
         stellar_account=token.account,
         muxed_account=token.muxed_account,
         account_memo=token.memo,
-        asset=asset,
+        asset=params["asset"],
         kind=Transaction.KIND.deposit,
         status=Transaction.STATUS.incomplete,
-        to_address=destination_account,
+        to_address=params["destination_account"],
         protocol=Transaction.PROTOCOL.sep24,
-        claimable_balance_supported=claimable_balance_supported,
+        claimable_balance_supported=params["claimable_balance_supported"],
         memo=request.data.get("memo"),
         memo_type=request.data.get("memo_type") or Transaction.MEMO_TYPES.hash,
         more_info_url=request.build_absolute_uri(
@@ -540,10 +613,10 @@ def deposit(token: SEP10Token, request: Request) -> Response:
         transaction_id=str(transaction_id),
         account=token.muxed_account or token.account,
         memo=token.memo,
-        asset_code=asset_code,
+        asset_code=params["asset_code"],
         op_type=settings.OPERATION_DEPOSIT,
-        amount=amount,
-        lang=lang,
+        amount=params["amount"],
+        lang=params["lang"],
     )
     return Response(
         {"type": "interactive_customer_info_needed", "url": url, "id": transaction_id},
@@ -9,6 +9,7 @@ from polaris.locale.utils import (
     activate_lang_for_request,
     validate_or_use_default_language,
 )
+from polaris.cache import cached_response
 from polaris.models import Asset
 from polaris.integrations import (
     registered_custody_integration as rci,
@@ -43,7 +44,12 @@ def info(request):
     Definition of the /info endpoint, in accordance with SEP-0024.
     See: https://github.com/stellar/stellar-protocol/blob/master/ecosystem/sep-0024.md#info
     """
-    activate_lang_for_request(validate_or_use_default_language(request.GET.get("lang")))
+    lang = validate_or_use_default_language(request.GET.get("lang"))
+    activate_lang_for_request(lang)
+    return cached_response(request, f"sep24_info:{lang}", get_info_response)
+
+
+def get_info_response() -> Response:
     info_data = {
         "deposit": {},
         "withdraw": {},
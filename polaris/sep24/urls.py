@@ -1,6 +1,7 @@
 from django.urls import re_path
 from django.views.decorators.csrf import csrf_exempt
 
+from polaris import settings
 from polaris.sep24.info import info
 from polaris.sep24.fee import fee
 from polaris.sep24.transaction import more_info, transaction, transactions
@@ -11,6 +12,7 @@ from polaris.sep24.withdraw import (
     complete_interactive_withdraw,
 )
 from polaris.sep24.deposit import (
+    AsyncDeposit,
     deposit,
     complete_interactive_deposit,
     post_interactive_deposit,
@@ -21,7 +23,10 @@ from polaris.sep24.tzinfo import post_tzinfo
 SEP24_MORE_INFO_PATH = "transaction/more_info"
 
 urlpatterns = [
-    re_path(r"^transactions/deposit/interactive/?$", csrf_exempt(deposit)),
+    re_path(
+        r"^transactions/deposit/interactive/?$",
+        AsyncDeposit.as_view() if settings.ASYNC_VIEWS else csrf_exempt(deposit),
+    ),
     re_path(
         r"^transactions/deposit/interactive/complete/?$",
         complete_interactive_deposit,
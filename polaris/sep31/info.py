@@ -1,4 +1,4 @@
-from typing import Dict
+from typing import Dict, Optional
 from polaris.utils import getLogger
 
 from django.utils.translation import gettext as _
@@ -7,6 +7,8 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 
+from polaris.cache import cached_response, is_cacheable
+from polaris.locale.utils import validate_or_use_default_language
 from polaris.models import Asset
 from polaris.utils import render_error_response
 from polaris.integrations import registered_sep31_receiver_integration
@@ -19,13 +21,26 @@ logger = getLogger(__name__)
 @api_view(["GET"])
 @renderer_classes([JSONRenderer, BrowsableAPIRenderer])
 def info(request: Request) -> Response:
+    lang = request.GET.get("lang")
+    # the integration rejects unsupported languages, whose responses aren't cached
+    cacheable = is_cacheable(registered_sep31_receiver_integration.info) and (
+        not lang or validate_or_use_default_language(lang) == lang
+    )
+    if not cacheable:
+        return get_info_response(request, lang)
+    return cached_response(
+        request, f"sep31_info:{lang or ''}", lambda: get_info_response(request, lang)
+    )
+
+
+def get_info_response(request: Request, lang: Optional[str]) -> Response:
     info_data = {
         "receive": {},
     }
     for asset in Asset.objects.filter(sep31_enabled=True):
         try:
             fields_and_types = registered_sep31_receiver_integration.info(
-                request=request, asset=asset, lang=request.GET.get("lang")
+                request=request, asset=asset, lang=lang
             )
         except ValueError:
             return render_error_response("unsupported 'lang'")
@@ -1,6 +1,7 @@
 from decimal import Decimal, DecimalException
 from typing import Dict, Tuple
 
+from asgiref.sync import sync_to_async
 from django.utils.translation import gettext as _
 from django.core.validators import URLValidator
 from django.core.exceptions import ValidationError
@@ -31,12 +32,15 @@ from polaris.utils import (
     extract_sep9_fields,
     make_memo,
     get_account_obj,
+    get_account_obj_async,
+    get_horizon_server_async,
     get_quote_and_offchain_source_asset,
 )
 from polaris.shared.endpoints import SEP6_MORE_INFO_PATH
 from polaris.sep6.utils import validate_403_response
-from polaris.sep10.utils import validate_sep10_token
+from polaris.sep10.utils import acheck_auth, validate_sep10_token
 from polaris.sep10.token import SEP10Token
+from polaris.shared.views import AsyncAPIView
 from polaris.integrations import (
     registered_deposit_integration as rdi,
     registered_custody_integration as rci,
@@ -63,11 +67,64 @@ def deposit_exchange(token: SEP10Token, request: Request) -> Response:
     return deposit_logic(token=token, request=request, exchange=True)
 
 
+class AsyncDeposit(AsyncAPIView):
+    """
+    An asynchronous version of :func:`deposit`, used instead when ``ASYNC_VIEWS``
+    is enabled.
+
+    If account creation isn't supported, the ``account`` is loaded from Horizon
+    using ``ServerAsync``, so an ASGI server can serve other requests while
+    waiting for the response.
+    """
+
+    renderer_classes = [JSONRenderer, BrowsableAPIRenderer]
+    parser_classes = [MultiPartParser, FormParser, JSONParser]
+    exchange = False
+
+    async def get(self, request: Request, *_args, **_kwargs) -> Response:
+        return await acheck_auth(request, adeposit_logic, exchange=self.exchange)
+
+
+class AsyncDepositExchange(AsyncDeposit):
+    """
+    An asynchronous version of :func:`deposit_exchange`, used instead when
+    ``ASYNC_VIEWS`` is enabled.
+    """
+
+    exchange = True
+
+
 def deposit_logic(token: SEP10Token, request: Request, exchange: bool) -> Response:
     args = parse_request_args(token, request, exchange)
     if "error" in args:
         return args["error"]
+    return process_deposit_request(token, request, args, exchange)
+
 
+async def adeposit_logic(
+    token: SEP10Token, request: Request, exchange: bool
+) -> Response:
+    args = await sync_to_async(parse_request_args)(
+        token, request, exchange, check_account=False
+    )
+    if "error" in args:
+        return args["error"]
+    if not rci.account_creation_supported:
+        try:
+            await get_account_obj_async(
+                Keypair.from_public_key(get_stellar_account(args["account"])),
+                get_horizon_server_async(),
+            )
+        except RuntimeError:
+            return render_error_response(
+                _("public key 'account' must be a funded Stellar account")
+            )
+    return await sync_to_async(process_deposit_request)(token, request, args, exchange)
+
+
+def process_deposit_request(
+    token: SEP10Token, request: Request, args: Dict, exchange: bool
+) -> Response:
     transaction_id = create_transaction_id()
     transaction = Transaction(
         id=transaction_id,
@@ -209,9 +266,25 @@ def validate_response(
     return response, 200
 
 
+def get_stellar_account(account: str) -> str:
+    """
+    Returns the Stellar account of `account`, which may be a muxed account.
+    """
+    if account.startswith("M"):
+        return StrKey.decode_muxed_account(account).ed25519
+    return account
+
+
 def parse_request_args(
-    token: SEP10Token, request: Request, exchange: bool = False
+    token: SEP10Token,
+    request: Request,
+    exchange: bool = False,
+    check_account: bool = True,
 ) -> Dict:
+    """
+    Validates the arguments of a deposit request. If `check_account` is true and
+    account creation isn't supported, the ``account`` must exist on Horizon.
+    """
     lang = validate_or_use_default_language(request.GET.get("lang"))
     activate_lang_for_request(lang)
 
@@ -327,13 +400,9 @@ def parse_request_args(
             )
         }
 
-    if not rci.account_creation_supported:
-        if account.startswith("M"):
-            stellar_account = StrKey.decode_muxed_account(account).ed25519
-        else:
-            stellar_account = account
+    if check_account and not rci.account_creation_supported:
         try:
-            get_account_obj(Keypair.from_public_key(stellar_account))
+            get_account_obj(Keypair.from_public_key(get_stellar_account(account)))
         except RuntimeError:
             return {
                 "error": render_error_response(
@@ -13,6 +13,7 @@ from rest_framework.response import Response
 from rest_framework.renderers import JSONRenderer, BrowsableAPIRenderer
 
 from polaris import settings
+from polaris.cache import cached_response, is_cacheable
 from polaris.models import Asset
 from polaris.utils import render_error_response
 from polaris.integrations import (
@@ -28,6 +29,16 @@ logger = getLogger(__name__)
 @api_view(["GET"])
 @renderer_classes([JSONRenderer, BrowsableAPIRenderer])
 def info(request: Request) -> Response:
+    lang = validate_or_use_default_language(request.GET.get("lang"))
+    activate_lang_for_request(lang)
+    if not is_cacheable(registered_info_func):
+        return get_info_response(request, lang)
+    return cached_response(
+        request, f"sep6_info:{lang}", lambda: get_info_response(request, lang)
+    )
+
+
+def get_info_response(request: Request, lang: str) -> Response:
     info_data = {
         "deposit": {},
         "withdraw": {},
@@ -36,8 +47,6 @@ def info(request: Request) -> Response:
         "transaction": {"enabled": True, "authentication_required": True},
         "features": {"account_creation": True, "claimable_balances": True},
     }
-    lang = validate_or_use_default_language(request.GET.get("lang"))
-    activate_lang_for_request(lang)
     error_response = None
     for asset in Asset.objects.filter(sep6_enabled=True):
         error_response = populate_asset_info(request, asset, info_data, lang, False)
@@ -4,7 +4,10 @@ from polaris import settings
 from polaris.sep6 import info, deposit, withdraw, fee, transaction
 
 urlpatterns = [
-    re_path(r"^deposit/?$", deposit.deposit),
+    re_path(
+        r"^deposit/?$",
+        deposit.AsyncDeposit.as_view() if settings.ASYNC_VIEWS else deposit.deposit,
+    ),
     re_path(r"^withdraw/?$", withdraw.withdraw),
     re_path(r"^info/?$", info.info),
     re_path(r"^fee/?$", fee.fee),
@@ -23,7 +26,14 @@ if settings.SEP6_USE_MORE_INFO_URL:
 if "sep-38" in settings.ACTIVE_SEPS:
     urlpatterns.extend(
         [
-            re_path(r"^deposit-exchange/?$", deposit.deposit_exchange),
+            re_path(
+                r"^deposit-exchange/?$",
+                (
+                    deposit.AsyncDepositExchange.as_view()
+                    if settings.ASYNC_VIEWS
+                    else deposit.deposit_exchange
+                ),
+            ),
             re_path(r"^withdraw-exchange/?$", withdraw.withdraw_exchange),
         ]
     )
@@ -104,6 +104,14 @@ MAX_TRANSACTION_FEE_STROOPS = env_or_settings(
     "MAX_TRANSACTION_FEE_STROOPS", int=True, required=False
 )
 
+MAX_TRANSACTIONS_PAGE_SIZE = env_or_settings(
+    "MAX_TRANSACTIONS_PAGE_SIZE", int=True, required=False
+)
+if MAX_TRANSACTIONS_PAGE_SIZE is None:
+    MAX_TRANSACTIONS_PAGE_SIZE = 200
+elif MAX_TRANSACTIONS_PAGE_SIZE <= 0:
+    raise ImproperlyConfigured("MAX_TRANSACTIONS_PAGE_SIZE must be positive")
+
 CALLBACK_REQUEST_TIMEOUT = (
     env_or_settings("CALLBACK_REQUEST_TIMEOUT", int=True, required=False) or 3
 )
@@ -130,11 +138,82 @@ SEP10_CLIENT_ATTRIBUTION_ALLOWLIST = env_or_settings(
 SEP10_CLIENT_ATTRIBUTION_DENYLIST = env_or_settings(
     "SEP10_CLIENT_ATTRIBUTION_DENYLIST", list=True, required=False
 )
+SEP10_SIGNERS_CACHE_TTL = env_or_settings(
+    "SEP10_SIGNERS_CACHE_TTL", int=True, required=False
+)
+if SEP10_SIGNERS_CACHE_TTL is None:
+    SEP10_SIGNERS_CACHE_TTL = 5
+SEP10_SIGNERS_CACHE_MAX_STALENESS = env_or_settings(
+    "SEP10_SIGNERS_CACHE_MAX_STALENESS", int=True, required=False
+)
+if SEP10_SIGNERS_CACHE_MAX_STALENESS is None:
+    SEP10_SIGNERS_CACHE_MAX_STALENESS = 30
+if SEP10_SIGNERS_CACHE_TTL < 0 or SEP10_SIGNERS_CACHE_MAX_STALENESS < 0:
+    raise ImproperlyConfigured("SEP-10 signers cache durations must not be negative")
+SEP10_CLIENT_DOMAIN_CACHE_TTL = env_or_settings(
+    "SEP10_CLIENT_DOMAIN_CACHE_TTL", int=True, required=False
+)
+if SEP10_CLIENT_DOMAIN_CACHE_TTL is None:
+    SEP10_CLIENT_DOMAIN_CACHE_TTL = 300
+SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL = env_or_settings(
+    "SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL", int=True, required=False
+)
+if SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL is None:
+    SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL = 30
+SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS = env_or_settings(
+    "SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS", int=True, required=False
+)
+if SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS is None:
+    SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS = 3600
+if min(
+    SEP10_CLIENT_DOMAIN_CACHE_TTL,
+    SEP10_CLIENT_DOMAIN_CACHE_NEGATIVE_TTL,
+    SEP10_CLIENT_DOMAIN_CACHE_MAX_STALENESS,
+) < 0:
+    raise ImproperlyConfigured(
+        "SEP-10 client domain cache durations must not be negative"
+    )
+SEP10_TOKEN_CACHE_SIZE = env_or_settings(
+    "SEP10_TOKEN_CACHE_SIZE", int=True, required=False
+)
+if SEP10_TOKEN_CACHE_SIZE is None:
+    SEP10_TOKEN_CACHE_SIZE = 10000
+if SEP10_TOKEN_CACHE_SIZE < 0:
+    raise ImproperlyConfigured("SEP10_TOKEN_CACHE_SIZE must not be negative")
 
 ADDITIVE_FEES_ENABLED = (
     env_or_settings("ADDITIVE_FEES_ENABLED", bool=True, required=False) or False
 )
 
+ASYNC_VIEWS = env_or_settings("ASYNC_VIEWS", bool=True, required=False) or False
+
+DB_THREAD_POOL_SIZE = env_or_settings("DB_THREAD_POOL_SIZE", int=True, required=False)
+if DB_THREAD_POOL_SIZE is None:
+    default_db = getattr(settings, "DATABASES", {}).get("default", {})
+    db_pool = default_db.get("OPTIONS", {}).get("pool")
+    if "sqlite" in default_db.get("ENGINE", ""):
+        # SQLite only supports one writer at a time
+        DB_THREAD_POOL_SIZE = 1
+    elif isinstance(db_pool, dict):
+        # psycopg's connection pool defaults to 4 connections
+        DB_THREAD_POOL_SIZE = db_pool.get("max_size") or db_pool.get("min_size") or 4
+    else:
+        DB_THREAD_POOL_SIZE = 4
+if DB_THREAD_POOL_SIZE <= 0:
+    raise ImproperlyConfigured("DB_THREAD_POOL_SIZE must be positive")
+
+INFO_CACHE_TIMEOUT = env_or_settings("INFO_CACHE_TIMEOUT", int=True, required=False)
+if INFO_CACHE_TIMEOUT is None:
+    INFO_CACHE_TIMEOUT = 60
+elif INFO_CACHE_TIMEOUT < 0:
+    raise ImproperlyConfigured("INFO_CACHE_TIMEOUT must not be negative")
+
+TOML_CACHE_TIMEOUT = env_or_settings("TOML_CACHE_TIMEOUT", int=True, required=False)
+if TOML_CACHE_TIMEOUT is None:
+    TOML_CACHE_TIMEOUT = 60
+elif TOML_CACHE_TIMEOUT < 0:
+    raise ImproperlyConfigured("TOML_CACHE_TIMEOUT must not be negative")
+
 # Constants
 OPERATION_DEPOSIT = "deposit"
 OPERATION_WITHDRAWAL = "withdraw"
@@ -6,6 +6,7 @@ from rest_framework import status
 from rest_framework.request import Request
 from rest_framework.response import Response
 from django.core.exceptions import ValidationError, ObjectDoesNotExist
+from django.db.models import Q
 from django.utils.translation import gettext as _
 from django.conf import settings as django_settings
 
@@ -19,7 +20,10 @@ from polaris.utils import render_error_response, getLogger
 from polaris.models import Transaction, Asset, OffChainAsset
 from polaris.integrations import registered_fee_func
 from polaris.sep24.utils import verify_valid_asset_operation, get_timezone_utc_offset
-from polaris.shared.serializers import TransactionSerializer
+from polaris.shared.serializers import (
+    TransactionSerializer,
+    TransactionValuesSerializer,
+)
 from polaris.integrations import (
     registered_deposit_integration as rdi,
     registered_withdrawal_integration as rwi,
@@ -240,31 +244,41 @@ def transactions_request(
     qset_filter["muxed_account"] = token.muxed_account
     qset_filter["account_memo"] = token.memo
 
+    protocol = Transaction.PROTOCOL.sep6 if sep6 else Transaction.PROTOCOL.sep24
+    transactions_qset = Transaction.objects.filter(
+        protocol=protocol, **qset_filter
+    ).order_by("-started_at", "-id")
+
     # Since the Transaction IDs are UUIDs, rather than in the chronological
-    # order of their creation, we map the paging ID (if provided) to the
-    # started_at field of a Transaction.
+    # order of their creation, the paging ID (if provided) is used as a cursor
+    # on (started_at, id), the order transactions are returned in. Comparing
+    # IDs of transactions started at the same time ensures none are skipped or
+    # returned twice.
     paging_id = request.GET.get("paging_id")
     if paging_id:
         try:
-            start_transaction = Transaction.objects.get(id=paging_id)
-        except ObjectDoesNotExist:
+            start_transaction = Transaction.objects.get(
+                id=paging_id,
+                protocol=protocol,
+                stellar_account=token.account,
+                muxed_account=token.muxed_account,
+                account_memo=token.memo,
+            )
+        except (ObjectDoesNotExist, ValidationError):
             return render_error_response(
                 "invalid paging_id", status_code=status.HTTP_400_BAD_REQUEST
             )
-        qset_filter["started_at__lt"] = start_transaction.started_at
+        transactions_qset = transactions_qset.filter(
+            Q(started_at__lt=start_transaction.started_at)
+            | Q(started_at=start_transaction.started_at, id__lt=start_transaction.id)
+        )
 
-    protocol = Transaction.PROTOCOL.sep6 if sep6 else Transaction.PROTOCOL.sep24
-    transactions_qset = Transaction.objects.filter(protocol=protocol, **qset_filter)
+    page_size = polaris_settings.MAX_TRANSACTIONS_PAGE_SIZE
     if limit:
-        transactions_qset = transactions_qset[:limit]
+        page_size = min(limit, page_size)
+    rows = transactions_qset.values(*TransactionValuesSerializer.fields)[:page_size]
 
-    serializer = TransactionSerializer(
-        transactions_qset,
-        many=True,
-        context={"request": request, "same_asset": True, "sep6": sep6},
-    )
-
-    return Response({"transactions": serializer.data})
+    return Response({"transactions": TransactionValuesSerializer.serialize(rows)})
 
 
 def transaction_request(
@@ -400,4 +414,6 @@ def _get_transaction_from_request(
         qset_filter["account_memo"] = token.memo
 
     protocol = Transaction.PROTOCOL.sep6 if sep6 else Transaction.PROTOCOL.sep24
-    return Transaction.objects.get(protocol=protocol, **qset_filter)
+    return Transaction.objects.select_related("asset", "quote").get(
+        protocol=protocol, **qset_filter
+    )
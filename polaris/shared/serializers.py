@@ -1,9 +1,10 @@
 """This module defines a serializer for the transaction model."""
 from decimal import Decimal
-from datetime import timezone
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, List, Optional
 
 from rest_framework import serializers
-from django.db.models import QuerySet
+from django.db.models import QuerySet, prefetch_related_objects
 
 from polaris import settings
 from polaris.models import Transaction
@@ -24,20 +25,16 @@ class TransactionSerializer(serializers.ModelSerializer):
 
     def __init__(self, data, *args, **kwargs):
         """
-        Saves the transaction's asset to the object instance so _round_decimals()
-        does not have to access instance.asset, making a new DB query each time.
-
-        This class asssumes the transaction objects being passed use the same
-        asset. If the transactions to be serialized are for multiple assets,
-        split the calls to this serializer by asset.
+        Fetches the assets and quotes of the transactions not already fetched,
+        using ``select_related()`` for example, in one query each so that
+        to_representation() doesn't make a new DB query for each transaction.
         """
+        if isinstance(data, QuerySet):
+            data = list(data)
         if isinstance(data, Transaction):
-            self.asset = data.asset
-        elif isinstance(data, list) or isinstance(data, QuerySet):
-            if isinstance(data, QuerySet):
-                data = list(data)
-            if len(data) != 0:
-                self.asset = data[0].asset
+            prefetch_related_objects([data], "asset", "quote")
+        elif isinstance(data, list):
+            prefetch_related_objects(data, "asset", "quote")
         super().__init__(data, *args, **kwargs)
 
     def to_representation(self, instance):
@@ -73,26 +70,26 @@ class TransactionSerializer(serializers.ModelSerializer):
                 data["amount_fee_asset"] = instance.fee_asset
         return data
 
-    def _round_decimals(self, data, instance):
+    @staticmethod
+    def _round_decimals(data, instance):
         """
         Rounds each decimal field to instance.asset.significant_decimals.
         """
+        significant_decimals = instance.asset.significant_decimals
         for field in ["amount_in", "amount_out", "amount_fee"]:
             if getattr(instance, field) is None:
                 continue
             value = getattr(instance, field)
-            if self.asset.significant_decimals == 7 and Decimal(
-                "0.000001"
-            ) > value >= Decimal("0.0000001"):
+            if significant_decimals == 7 and Decimal("0.000001") > value >= Decimal(
+                "0.0000001"
+            ):
                 # the decimal.Decimal class uses exponent notation for numbers
                 # smaller than 0.000001 (6 decimals). Stellar only supports 7
                 # decimals of precision, leaving 9 possible values where the
                 # Decimal class uses exponent notation, which is corrected here.
                 data[field] = f"{value:.7f}"
             else:
-                data[field] = str(
-                    round(getattr(instance, field), self.asset.significant_decimals)
-                )
+                data[field] = str(round(getattr(instance, field), significant_decimals))
 
     class Meta:
         model = Transaction
@@ -118,3 +115,152 @@ class TransactionSerializer(serializers.ModelSerializer):
             "message",
             "claimable_balance_id",
         ]
+
+
+class TransactionValuesSerializer:
+    """
+    Serializes transactions like :class:`TransactionSerializer`, from the rows
+    returned by ``QuerySet.values(*TransactionValuesSerializer.fields)`` rather
+    than model instances.
+
+    DRF's field machinery and the post-processing done by TransactionSerializer
+    dominate the cost of serializing large pages of transactions. This class
+    builds each representation directly instead, formatting amounts with a
+    function bound to the asset's ``significant_decimals``. The output is
+    identical to TransactionSerializer's, including the order of the keys.
+    """
+
+    fields = (
+        "id",
+        "kind",
+        "status",
+        "status_eta",
+        "amount_in",
+        "amount_out",
+        "amount_fee",
+        "started_at",
+        "completed_at",
+        "stellar_transaction_id",
+        "external_transaction_id",
+        "from_address",
+        "to_address",
+        "receiving_anchor_account",
+        "memo",
+        "memo_type",
+        "more_info_url",
+        "refunded",
+        "claimable_balance_id",
+        "protocol",
+        "fee_asset",
+        "quote_id",
+        "quote__sell_asset",
+        "quote__buy_asset",
+        "asset__significant_decimals",
+    )
+    _amount_formatters: Dict[int, Callable[[Decimal], str]] = {}
+
+    @classmethod
+    def serialize(cls, rows: Iterable[dict]) -> List[dict]:
+        """
+        Returns the representation of each row.
+        """
+        include_sep6_more_info_url = settings.SEP6_USE_MORE_INFO_URL
+        # Transaction.message for each status, translated once per call
+        messages = {}
+        data = []
+        for row in rows:
+            format_amount = cls._amount_formatter(row["asset__significant_decimals"])
+            status = row["status"]
+            message = messages.get(status)
+            if message is None:
+                message = messages[status] = str(
+                    Transaction.status_to_message[str(status)]
+                )
+            representation = {
+                "id": str(row["id"]),
+                "kind": row["kind"],
+                "status": status,
+                "status_eta": row["status_eta"],
+                "amount_in": _format_optional(format_amount, row["amount_in"]),
+                "amount_out": _format_optional(format_amount, row["amount_out"]),
+                "amount_fee": _format_optional(format_amount, row["amount_fee"]),
+                "started_at": _format_datetime(row["started_at"]),
+                "completed_at": _format_datetime(row["completed_at"]),
+                "stellar_transaction_id": row["stellar_transaction_id"],
+                "external_transaction_id": row["external_transaction_id"],
+            }
+            if (
+                row["protocol"] != Transaction.PROTOCOL.sep6
+                or include_sep6_more_info_url
+            ):
+                representation["more_info_url"] = row["more_info_url"]
+            representation["refunded"] = row["refunded"]
+            representation["message"] = message
+            if row["kind"] == Transaction.KIND.deposit:
+                representation["claimable_balance_id"] = row["claimable_balance_id"]
+                representation["to"] = row["to_address"]
+                representation["from"] = row["from_address"]
+                representation["deposit_memo_type"] = row["memo_type"]
+                representation["deposit_memo"] = row["memo"]
+            else:
+                representation["to"] = row["to_address"]
+                representation["from"] = row["from_address"]
+                representation["withdraw_memo_type"] = row["memo_type"]
+                representation["withdraw_memo"] = row["memo"]
+                representation["withdraw_anchor_account"] = row[
+                    "receiving_anchor_account"
+                ]
+            if row["quote_id"] is not None:
+                representation["amount_in_asset"] = row["quote__sell_asset"]
+                representation["amount_out_asset"] = row["quote__buy_asset"]
+                if row["fee_asset"]:
+                    representation["amount_fee_asset"] = row["fee_asset"]
+            data.append(representation)
+        return data
+
+    @classmethod
+    def _amount_formatter(cls, significant_decimals: int) -> Callable[[Decimal], str]:
+        """
+        Returns a function formatting amounts like
+        :meth:`TransactionSerializer._round_decimals`.
+        """
+        try:
+            return cls._amount_formatters[significant_decimals]
+        except KeyError:
+            pass
+        # round(value, n) quantizes value to this exponent
+        exponent = Decimal((0, (1,), -significant_decimals))
+        if significant_decimals == 7:
+            lower, upper = Decimal("0.0000001"), Decimal("0.000001")
+
+            def format_amount(value: Decimal) -> str:
+                # see TransactionSerializer._round_decimals()
+                if upper > value >= lower:
+                    return f"{value:.7f}"
+                return str(value.quantize(exponent))
+
+        else:
+
+            def format_amount(value: Decimal) -> str:
+                return str(value.quantize(exponent))
+
+        cls._amount_formatters[significant_decimals] = format_amount
+        return format_amount
+
+
+def _format_optional(
+    format_amount: Callable[[Decimal], str], value: Optional[Decimal]
+) -> Optional[str]:
+    return None if value is None else format_amount(value)
+
+
+def _format_datetime(value: Optional[datetime]) -> Optional[str]:
+    """
+    Formats `value` like the ``started_at`` and ``completed_at`` fields of
+    TransactionSerializer.
+    """
+    if not value:
+        return None
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime(DATETIME_FORMAT)
@@ -0,0 +1,38 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
+from rest_framework.views import APIView
+
+
+class AsyncAPIView(APIView):
+    """
+    An ``APIView`` whose request handlers are coroutines, used by the
+    asynchronous versions of the endpoints enabled by ``ASYNC_VIEWS``.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        """
+        ``APIView.dispatch()``, awaiting the request handler.
+        """
+        self.args = args
+        self.kwargs = kwargs
+        request = self.initialize_request(request, *args, **kwargs)
+        self.request = request
+        self.headers = self.default_response_headers
+
+        try:
+            # authenticators, permissions, and throttles may query the database
+            await sync_to_async(self.initial)(request, *args, **kwargs)
+            handler = self.http_method_not_allowed
+            if request.method.lower() in self.http_method_names:
+                handler = getattr(
+                    self, request.method.lower(), self.http_method_not_allowed
+                )
+            response = handler(request, *args, **kwargs)
+            if asyncio.iscoroutine(response):
+                response = await response
+        except Exception as exc:
+            response = self.handle_exception(exc)
+
+        self.response = self.finalize_response(request, response, *args, **kwargs)
+        return self.response
@@ -0,0 +1,118 @@
+"""
+Decoding throughput of ``watch_transactions.iter_payments()`` compared to the
+``stellar_sdk`` object-based decoding it replaced.
+
+The corpus consists of the envelope and result XDR of real testnet transactions:
+a payment, a path payment strict send, and a fee bump transaction. Each decoder
+processes the corpus ``POLARIS_BENCH_DECODE_ITERATIONS`` times.
+"""
+
+import time
+from typing import List
+
+from stellar_sdk import FeeBumpTransactionEnvelope, TransactionEnvelope
+from stellar_sdk.operation import (
+    Payment,
+    PathPaymentStrictReceive,
+    PathPaymentStrictSend,
+)
+from stellar_sdk.utils import from_xdr_amount
+from stellar_sdk.xdr import TransactionResult
+
+from polaris import settings
+from polaris.management.commands.watch_transactions import PaymentValues, iter_payments
+from polaris.tests.benchmarks.conftest import BENCHMARK_RESULTS, env_int
+from polaris.tests.commands.test_watch_transactions import (
+    SUCCESS_FEE_BUMP_TRANSACTION_JSON,
+    SUCCESS_PAYMENT_TRANSACTION_JSON,
+    SUCCESS_STRICT_SEND_PAYMENT,
+)
+
+ITERATIONS = env_int("POLARIS_BENCH_DECODE_ITERATIONS", 2000)
+CORPUS = [
+    (response["envelope_xdr"], response["result_xdr"])
+    for response in [
+        SUCCESS_PAYMENT_TRANSACTION_JSON,
+        SUCCESS_STRICT_SEND_PAYMENT,
+        SUCCESS_FEE_BUMP_TRANSACTION_JSON,
+    ]
+]
+
+
+def sdk_payments(envelope_xdr: str, result_xdr: str) -> List[PaymentValues]:
+    """
+    The decoding previously used by watch_transactions: parse the envelope into
+    ``stellar_sdk`` objects, falling back to a fee bump envelope on failure, and
+    round trip each payment operation through XDR.
+    """
+    try:
+        tx = TransactionEnvelope.from_xdr(
+            envelope_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
+        ).transaction
+        op_results = TransactionResult.from_xdr(result_xdr).result.results
+    except ValueError:
+        tx = FeeBumpTransactionEnvelope.from_xdr(
+            envelope_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
+        ).transaction.inner_transaction_envelope.transaction
+        op_results = TransactionResult.from_xdr(
+            result_xdr
+        ).result.inner_result_pair.result.result.results
+
+    payments = []
+    for op, op_result in zip(tx.operations, op_results):
+        if isinstance(op, Payment):
+            op = Payment.from_xdr_object(op.to_xdr_object())
+            asset, amount = op.asset, str(op.amount)
+        elif isinstance(op, PathPaymentStrictSend):
+            op = PathPaymentStrictSend.from_xdr_object(op.to_xdr_object())
+            asset = op.dest_asset
+            amount = from_xdr_amount(
+                op_result.tr.path_payment_strict_send_result.success.last.amount.int64
+            )
+        elif isinstance(op, PathPaymentStrictReceive):
+            op = PathPaymentStrictReceive.from_xdr_object(op.to_xdr_object())
+            asset, amount = op.dest_asset, str(op.dest_amount)
+        else:
+            continue
+        source = op.source or tx.source
+        payments.append(
+            (
+                op.destination.account_id,
+                (asset.code, asset.issuer),
+                amount,
+                source.account_muxed or source.account_id,
+            )
+        )
+    return payments
+
+
+def run(decoder) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for envelope_xdr, result_xdr in CORPUS:
+            for _payment in decoder(envelope_xdr, result_xdr):
+                pass
+    return time.perf_counter() - start
+
+
+def test_payment_decoding_throughput():
+    for envelope_xdr, result_xdr in CORPUS:
+        assert list(iter_payments(envelope_xdr, result_xdr)) == sdk_payments(
+            envelope_xdr, result_xdr
+        )
+
+    decoded = ITERATIONS * len(CORPUS)
+    sdk_elapsed = run(sdk_payments)
+    xdr_elapsed = run(iter_payments)
+    BENCHMARK_RESULTS.append(
+        f"payment decoding: {decoded} transactions, corpus of {len(CORPUS)}"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    stellar_sdk objects: {decoded / sdk_elapsed:.0f} transactions/s "
+        f"({sdk_elapsed / decoded * 1e6:.1f}us each)"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    iter_payments: {decoded / xdr_elapsed:.0f} transactions/s "
+        f"({xdr_elapsed / decoded * 1e6:.1f}us each, "
+        f"{sdk_elapsed / xdr_elapsed:.1f}x)"
+    )
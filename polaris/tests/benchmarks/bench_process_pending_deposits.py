@@ -0,0 +1,161 @@
+"""
+End-to-end throughput of the ``process_pending_deposits`` deposit pipeline.
+
+Each configuration creates pending deposits, lets a benchmark
+:class:`~polaris.integrations.RailsIntegration` report them as received, and
+drives them through ``check_rails_for_ready_transactions()`` and
+``submit_transaction()`` against a local :class:`HorizonStub` until every
+deposit is completed. Nothing in the deposit path is mocked: envelopes are built,
+signed and submitted by the default self-custody integration.
+
+Modes:
+
+    default     one submission worker, as run by the command
+    concurrent  ``POLARIS_BENCH_CONCURRENCY`` submission workers sharing the queue
+    batched     the rails integration returns ``POLARIS_BENCH_BATCH_SIZE`` deposits
+                per poll and each batch is submitted concurrently before polling
+                again. Poll backoff is disabled so deposits not returned are due
+                again on the next poll.
+
+The number of deposits and assets are read from ``POLARIS_BENCH_DEPOSITS`` and
+``POLARIS_BENCH_ASSETS``.
+"""
+
+import asyncio
+import time
+from collections import defaultdict
+from typing import List, Optional
+from unittest.mock import patch
+
+import pytest
+from asgiref.sync import sync_to_async
+from django.db.models import QuerySet
+from stellar_sdk import ServerAsync
+from stellar_sdk.client.aiohttp_client import AiohttpClient
+
+from polaris import settings
+from polaris.integrations import RailsIntegration
+from polaris.management.commands.process_pending_deposits import (
+    ProcessPendingDeposits,
+    PolarisQueueAdapter,
+    SUBMIT_TRANSACTION_QUEUE,
+)
+from polaris.models import Transaction
+from polaris.utils import db_sync_to_async
+from polaris.tests.benchmarks.conftest import (
+    BENCHMARK_RESULTS,
+    QueryCounter,
+    StageTimer,
+    env_int,
+    summarize,
+)
+
+test_module = "polaris.management.commands.process_pending_deposits"
+
+DEPOSITS = env_int("POLARIS_BENCH_DEPOSITS", 200)
+ASSETS = env_int("POLARIS_BENCH_ASSETS", 4)
+CONCURRENCY = env_int("POLARIS_BENCH_CONCURRENCY", ASSETS)
+BATCH_SIZE = env_int("POLARIS_BENCH_BATCH_SIZE", 50)
+
+STAGES = [
+    "get_ready_deposits",
+    "check_accounts",
+    "submit",
+    "handle_successful_transaction",
+]
+
+
+class BenchmarkRailsIntegration(RailsIntegration):
+    """
+    Reports every pending deposit as received, or at most `batch_size` of them
+    per call.
+    """
+
+    def __init__(self, batch_size: Optional[int] = None):
+        self.batch_size = batch_size
+
+    def poll_pending_deposits(
+        self, pending_deposits: QuerySet, *args, **kwargs
+    ) -> List[Transaction]:
+        if self.batch_size:
+            pending_deposits = pending_deposits.order_by("started_at")[
+                : self.batch_size
+            ]
+        return list(pending_deposits)
+
+
+async def drain_queue(queues: PolarisQueueAdapter, server: ServerAsync, locks):
+    queue = queues.queues[SUBMIT_TRANSACTION_QUEUE]
+    while not queue.empty():
+        # get_transaction() would wait for a new entry if this one is skipped
+        entry = queue.get_nowait()
+        transaction = await db_sync_to_async(queues.load_transaction)(
+            SUBMIT_TRANSACTION_QUEUE, entry
+        )
+        if transaction:
+            await ProcessPendingDeposits.submit_transaction(
+                transaction, server, locks, queues
+            )
+        queue.task_done(entry.source_account)
+
+
+async def run_pipeline(mode: str):
+    queues = PolarisQueueAdapter([SUBMIT_TRANSACTION_QUEUE])
+    locks = {
+        "source_accounts": defaultdict(asyncio.Lock),
+        "destination_accounts": defaultdict(asyncio.Lock),
+    }
+    async with ServerAsync(settings.HORIZON_URI, client=AiohttpClient()) as server:
+        if mode == "batched":
+            while True:
+                await ProcessPendingDeposits.check_rails_for_ready_transactions(
+                    queues, min_poll_interval=0, backoff_factor=0
+                )
+                if queues.queues[SUBMIT_TRANSACTION_QUEUE].empty():
+                    break
+                await asyncio.gather(
+                    *[drain_queue(queues, server, locks) for _ in range(BATCH_SIZE)]
+                )
+        else:
+            await ProcessPendingDeposits.check_rails_for_ready_transactions(queues)
+            workers = CONCURRENCY if mode == "concurrent" else 1
+            await asyncio.gather(
+                *[drain_queue(queues, server, locks) for _ in range(workers)]
+            )
+
+
+@pytest.mark.django_db(transaction=True)
+@pytest.mark.parametrize("mode", ["default", "concurrent", "batched"])
+async def test_deposit_throughput(mode, horizon_stub, pending_deposits_factory):
+    await sync_to_async(pending_deposits_factory)(DEPOSITS, ASSETS)
+    rails = BenchmarkRailsIntegration(BATCH_SIZE if mode == "batched" else None)
+    timer = StageTimer()
+    for stage in STAGES:
+        timer.wrap(ProcessPendingDeposits, stage)
+
+    with patch(f"{test_module}.rri", rails), timer, QueryCounter() as queries:
+        start = time.perf_counter()
+        await run_pipeline(mode)
+        elapsed = time.perf_counter() - start
+
+    completed = await sync_to_async(
+        Transaction.objects.filter(status=Transaction.STATUS.completed).count
+    )()
+    assert completed == DEPOSITS
+
+    BENCHMARK_RESULTS.append(
+        f"process_pending_deposits [{mode}] deposits={DEPOSITS} assets={ASSETS} "
+        f"horizon_latency={horizon_stub.latency * 1000:.1f}ms "
+        f"error_rate={horizon_stub.error_rate:.2f}"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    {DEPOSITS / elapsed:.1f} deposits/s in {elapsed:.2f}s, "
+        f"{queries.count} queries ({queries.count / DEPOSITS:.1f} per deposit)"
+    )
+    for stage in STAGES:
+        BENCHMARK_RESULTS.append(f"    {stage}: {summarize(timer.durations[stage])}")
+    for endpoint, count in sorted(horizon_stub.request_counts.items()):
+        BENCHMARK_RESULTS.append(
+            f"    horizon {endpoint}: {count} "
+            f"({summarize(horizon_stub.request_durations[endpoint])})"
+        )
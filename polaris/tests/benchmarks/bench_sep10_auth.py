@@ -0,0 +1,165 @@
+"""
+CPU cost of verifying signed challenges in ``POST /auth``.
+
+Compares the verification previously done by ``SEP10Auth``, which decoded and
+checked the challenge with ``read_challenge_transaction()``, again with each
+``verify_challenge_transaction_*()`` call, and once more to generate the JWT, to
+:class:`~polaris.sep10.challenge.Challenge`, which decodes it once.
+
+The corpus consists of challenges signed by the master key of an account, by two
+of three signers of a multisig account, and by an account and a client domain
+signing key. Each pipeline verifies the corpus ``POLARIS_BENCH_AUTH_ITERATIONS``
+times. The requests per second of the complete endpoint, with the account
+signers cached, are measured for the same number of requests.
+"""
+
+import time
+from unittest.mock import Mock, patch
+from urllib.parse import urlparse
+
+import pytest
+from stellar_sdk import Keypair, TransactionEnvelope
+from stellar_sdk.sep.ed25519_public_key_signer import Ed25519PublicKeySigner
+from stellar_sdk.sep.stellar_web_authentication import (
+    build_challenge_transaction,
+    read_challenge_transaction,
+    verify_challenge_transaction_threshold,
+)
+
+from polaris import settings
+from polaris.sep10.challenge import Challenge
+from polaris.sep10.views import signers_cache
+from polaris.tests.benchmarks.conftest import BENCHMARK_RESULTS, env_int
+
+ITERATIONS = env_int("POLARIS_BENCH_AUTH_ITERATIONS", 300)
+SDK_ARGS = dict(
+    server_account_id=settings.SIGNING_KEY,
+    home_domains=settings.SEP10_HOME_DOMAINS,
+    web_auth_domain=urlparse(settings.HOST_URL).netloc,
+    network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+)
+
+
+def signed_challenge(account: str, signers, client_domain_kp=None) -> str:
+    challenge_xdr = build_challenge_transaction(
+        server_secret=settings.SIGNING_SEED,
+        client_account_id=account,
+        home_domain=settings.SEP10_HOME_DOMAINS[0],
+        web_auth_domain=urlparse(settings.HOST_URL).netloc,
+        network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+        client_domain="test.com" if client_domain_kp else None,
+        client_signing_key=client_domain_kp.public_key if client_domain_kp else None,
+    )
+    envelope = TransactionEnvelope.from_xdr(
+        challenge_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
+    )
+    for kp in signers:
+        envelope.sign(kp)
+    return envelope.to_xdr()
+
+
+def build_corpus():
+    """
+    Returns a list of ``(envelope_xdr, signers, threshold)`` tuples.
+    """
+    master = Keypair.random()
+    multisig = [Keypair.random() for _ in range(3)]
+    attributed, client_domain_kp = Keypair.random(), Keypair.random()
+    return [
+        (
+            signed_challenge(master.public_key, [master]),
+            [Ed25519PublicKeySigner(master.public_key, 1)],
+            1,
+        ),
+        (
+            signed_challenge(multisig[0].public_key, multisig[:2]),
+            [Ed25519PublicKeySigner(kp.public_key, 1) for kp in multisig],
+            2,
+        ),
+        (
+            signed_challenge(
+                attributed.public_key, [attributed, client_domain_kp], client_domain_kp
+            ),
+            [Ed25519PublicKeySigner(attributed.public_key, 1)],
+            1,
+        ),
+    ]
+
+
+def sdk_pipeline(envelope_xdr, signers, threshold):
+    """
+    The verification previously done by ``SEP10Auth.post()``.
+    """
+    read_challenge_transaction(envelope_xdr, **SDK_ARGS)
+    verify_challenge_transaction_threshold(
+        envelope_xdr, threshold=threshold, signers=signers, **SDK_ARGS
+    )
+    challenge = read_challenge_transaction(envelope_xdr, **SDK_ARGS)
+    return challenge.transaction.hash().hex()
+
+
+def challenge_pipeline(envelope_xdr, signers, threshold):
+    challenge = Challenge(envelope_xdr)
+    challenge.verify_threshold(signers, threshold)
+    return challenge.hash.hex()
+
+
+def run(pipeline, corpus) -> float:
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        for envelope_xdr, signers, threshold in corpus:
+            pipeline(envelope_xdr, signers, threshold)
+    return time.perf_counter() - start
+
+
+def test_challenge_verification_cpu():
+    corpus = build_corpus()
+    for args in corpus:
+        assert challenge_pipeline(*args) == sdk_pipeline(*args)
+
+    verified = ITERATIONS * len(corpus)
+    sdk_elapsed = run(sdk_pipeline, corpus)
+    challenge_elapsed = run(challenge_pipeline, corpus)
+    BENCHMARK_RESULTS.append(
+        f"challenge verification: {verified} challenges, corpus of {len(corpus)}"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    stellar_sdk functions: {sdk_elapsed / verified * 1e6:.0f}us each"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    Challenge: {challenge_elapsed / verified * 1e6:.0f}us each "
+        f"({sdk_elapsed / challenge_elapsed:.1f}x, "
+        f"{(sdk_elapsed - challenge_elapsed) / verified * 1e6:.0f}us saved)"
+    )
+
+
+@pytest.mark.django_db
+def test_post_auth_throughput(client):
+    corpus = build_corpus()
+    accounts = {
+        Challenge(envelope_xdr).stellar_account: (signers, threshold)
+        for envelope_xdr, signers, threshold in corpus
+    }
+
+    def load_account(account_id):
+        signers, threshold = accounts[account_id]
+        return Mock(
+            load_ed25519_public_key_signers=Mock(return_value=signers),
+            thresholds=Mock(med_threshold=threshold),
+        )
+
+    signers_cache.clear()
+    with patch.object(settings.HORIZON_SERVER, "load_account", load_account):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            for envelope_xdr, _signers, _threshold in corpus:
+                response = client.post("/auth", {"transaction": envelope_xdr})
+                assert response.status_code == 200, response.content
+        elapsed = time.perf_counter() - start
+    signers_cache.clear()
+
+    requests = ITERATIONS * len(corpus)
+    BENCHMARK_RESULTS.append(
+        f"POST /auth: {requests / elapsed:.0f} requests/s "
+        f"({elapsed / requests * 1e6:.0f}us each, account signers cached)"
+    )
@@ -0,0 +1,88 @@
+"""
+Per-request cost of authenticating SEP-10 tokens with ``validate_jwt_request()``.
+
+Compares validating every token, as done when ``SEP10_TOKEN_CACHE_SIZE`` is 0,
+to looking up the tokens already validated in the
+:class:`~polaris.sep10.cache.TokenCache`. The corpus consists of tokens for a
+Stellar account, a muxed account, an account and memo, and an account with a
+client domain. Each configuration authenticates
+``POLARIS_BENCH_TOKEN_ITERATIONS`` requests per token.
+"""
+
+import time
+from unittest.mock import patch
+
+import jwt
+from django.test import RequestFactory
+from stellar_sdk import Keypair, MuxedAccount
+
+from polaris import settings
+from polaris.sep10 import utils
+from polaris.sep10.cache import TokenCache
+from polaris.tests.benchmarks.conftest import BENCHMARK_RESULTS, env_int
+
+ITERATIONS = env_int("POLARIS_BENCH_TOKEN_ITERATIONS", 5000)
+
+
+def build_requests():
+    account = Keypair.random().public_key
+    now = int(time.time())
+    payloads = [
+        {"sub": account},
+        {"sub": MuxedAccount(account, 123).account_muxed},
+        {"sub": f"{account}:123"},
+        {"sub": account, "client_domain": "wallet.example.com"},
+    ]
+    factory = RequestFactory()
+    return [
+        factory.get(
+            "/transactions",
+            HTTP_AUTHORIZATION="Bearer "
+            + jwt.encode(
+                {
+                    "iss": f"{settings.HOST_URL}/auth",
+                    "iat": now,
+                    "exp": now + 3600,
+                    "jti": "bench",
+                    **payload,
+                },
+                settings.SERVER_JWT_KEY,
+                algorithm="HS256",
+            ),
+        )
+        for payload in payloads
+    ]
+
+
+def run(requests, cache: TokenCache) -> float:
+    with patch.object(utils, "token_cache", cache):
+        start = time.perf_counter()
+        for _ in range(ITERATIONS):
+            for request in requests:
+                utils.validate_jwt_request(request)
+        return time.perf_counter() - start
+
+
+def test_token_validation_overhead():
+    requests = build_requests()
+    for request in requests:
+        assert (
+            TokenCache().get(request.headers["Authorization"].split(" ")[1]).payload
+            == utils.validate_jwt_request(request).payload
+        )
+
+    authenticated = ITERATIONS * len(requests)
+    uncached_elapsed = run(requests, TokenCache(max_size=0))
+    cache = TokenCache()
+    cached_elapsed = run(requests, cache)
+    BENCHMARK_RESULTS.append(
+        f"token validation: {authenticated} requests, {len(requests)} tokens"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    uncached: {uncached_elapsed / authenticated * 1e6:.1f}us per request"
+    )
+    BENCHMARK_RESULTS.append(
+        f"    TokenCache: {cached_elapsed / authenticated * 1e6:.1f}us per request "
+        f"({uncached_elapsed / cached_elapsed:.1f}x, "
+        f"hit rate {cache.stats()['hit_rate']:.3f})"
+    )
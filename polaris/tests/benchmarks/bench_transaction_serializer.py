@@ -0,0 +1,127 @@
+"""
+Throughput of serializing pages of transactions for ``GET /transactions``.
+
+Compares :class:`~polaris.shared.serializers.TransactionSerializer`, given model
+instances fetched with their assets and quotes, to
+:class:`~polaris.shared.serializers.TransactionValuesSerializer`, given the rows
+returned by ``QuerySet.values()``. Rows per second are measured for the
+serialization alone and including the query.
+
+The corpus consists of ``POLARIS_BENCH_SERIALIZER_ROWS`` deposits and withdrawals
+for assets with 2 and 7 significant decimals, a third of them with quotes. Each
+serializer serializes the corpus ``POLARIS_BENCH_SERIALIZER_ITERATIONS`` times.
+"""
+
+import datetime
+import time
+from decimal import Decimal
+
+import pytest
+from rest_framework.renderers import JSONRenderer
+from stellar_sdk import Keypair
+
+from polaris.models import Asset, Quote, Transaction
+from polaris.shared.serializers import (
+    TransactionSerializer,
+    TransactionValuesSerializer,
+)
+from polaris.tests.benchmarks.conftest import BENCHMARK_RESULTS, env_int
+
+ROWS = env_int("POLARIS_BENCH_SERIALIZER_ROWS", 1000)
+ITERATIONS = env_int("POLARIS_BENCH_SERIALIZER_ITERATIONS", 10)
+
+
+def create_transactions():
+    assets = [
+        Asset.objects.create(
+            code="USD",
+            issuer=Keypair.random().public_key,
+            significant_decimals=significant_decimals,
+        )
+        for significant_decimals in [2, 7]
+    ]
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    transactions = []
+    for i in range(ROWS):
+        asset = assets[i % 2]
+        quote = None
+        if i % 3 == 0:
+            quote = Quote.objects.create(
+                stellar_account="test source address",
+                type=Quote.TYPE.firm,
+                sell_asset=f"stellar:{asset.code}:{asset.issuer}",
+                buy_asset="iso4217:BRL",
+                sell_amount=100,
+            )
+        transactions.append(
+            Transaction(
+                stellar_account="test source address",
+                asset=asset,
+                quote=quote,
+                kind=Transaction.KIND.deposit if i % 2 else Transaction.KIND.withdrawal,
+                status=Transaction.STATUS.completed,
+                amount_in=Decimal("100.1234567"),
+                amount_out=Decimal("98.1234567"),
+                amount_fee=Decimal("2"),
+                started_at=started_at - datetime.timedelta(seconds=i),
+                completed_at=started_at,
+                stellar_transaction_id=f"{i:064x}",
+                to_address=Keypair.random().public_key,
+                memo=str(i),
+                memo_type=Transaction.MEMO_TYPES.id,
+                protocol=Transaction.PROTOCOL.sep24,
+            )
+        )
+    Transaction.objects.bulk_create(transactions)
+
+
+def transactions_qset():
+    return Transaction.objects.order_by("-started_at", "-id")
+
+
+def serialize_instances(transactions):
+    return TransactionSerializer(transactions, many=True).data
+
+
+def serialize_values(rows):
+    return TransactionValuesSerializer.serialize(rows)
+
+
+def fetch_instances():
+    return list(transactions_qset().select_related("asset", "quote"))
+
+
+def fetch_values():
+    return list(transactions_qset().values(*TransactionValuesSerializer.fields))
+
+
+def run(serialize, fetch, include_query: bool) -> float:
+    data = fetch()
+    start = time.perf_counter()
+    for _ in range(ITERATIONS):
+        if include_query:
+            data = fetch()
+        serialize(data)
+    return time.perf_counter() - start
+
+
+@pytest.mark.django_db
+def test_transaction_serializer_throughput():
+    create_transactions()
+    renderer = JSONRenderer()
+    assert renderer.render(serialize_values(fetch_values())) == renderer.render(
+        serialize_instances(fetch_instances())
+    )
+
+    serialized = ROWS * ITERATIONS
+    BENCHMARK_RESULTS.append(f"transaction serialization: {ROWS} rows")
+    for include_query in [False, True]:
+        instances_elapsed = run(serialize_instances, fetch_instances, include_query)
+        values_elapsed = run(serialize_values, fetch_values, include_query)
+        label = "with query" if include_query else "serialization only"
+        BENCHMARK_RESULTS.append(
+            f"    {label}: TransactionSerializer "
+            f"{serialized / instances_elapsed:.0f} rows/s, "
+            f"TransactionValuesSerializer {serialized / values_elapsed:.0f} rows/s "
+            f"({instances_elapsed / values_elapsed:.1f}x)"
+        )
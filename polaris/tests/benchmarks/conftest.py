@@ -0,0 +1,232 @@
+"""
+Fixtures and reporting helpers shared by the benchmark modules in this package.
+
+Benchmark modules are named ``bench_*.py`` so they are not collected by a plain
+``pytest`` run. Run them explicitly, for example::
+
+    pytest polaris/tests/benchmarks/bench_process_pending_deposits.py
+
+Results are printed in the terminal summary at the end of the session.
+"""
+
+import functools
+import inspect
+import os
+import statistics
+import threading
+import time
+from collections import defaultdict
+from decimal import Decimal
+from typing import Callable, Dict, List
+from unittest.mock import patch
+
+import pytest
+from django.db.backends.utils import CursorWrapper
+from stellar_sdk import Keypair, Server
+
+from polaris import settings
+from polaris.models import Asset, Transaction, ASSET_DISTRIBUTION_ACCOUNT_MAP
+from polaris.tests.benchmarks.horizon_stub import HorizonStub
+
+BENCHMARK_RESULTS: List[str] = []
+
+
+def env_int(name: str, default: int) -> int:
+    return int(os.environ.get(name, default))
+
+
+def env_float(name: str, default: float) -> float:
+    return float(os.environ.get(name, default))
+
+
+def pytest_terminal_summary(terminalreporter):
+    if not BENCHMARK_RESULTS:
+        return
+    terminalreporter.section("benchmark results")
+    for line in BENCHMARK_RESULTS:
+        terminalreporter.write_line(line)
+
+
+def summarize(durations: List[float]) -> str:
+    if not durations:
+        return "n=0"
+    ordered = sorted(durations)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return (
+        f"n={len(ordered)} p50={statistics.median(ordered) * 1000:.2f}ms "
+        f"p95={p95 * 1000:.2f}ms max={ordered[-1] * 1000:.2f}ms"
+    )
+
+
+class QueryCounter:
+    """
+    Counts the SQL statements executed by any thread while active.
+
+    Polaris' async commands run ORM calls on ``sync_to_async`` executor threads,
+    each with its own connection, so counting on a single connection object
+    would miss most queries.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self._lock = threading.Lock()
+        self._patches = []
+
+    def _counting(self, method: Callable):
+        @functools.wraps(method)
+        def wrapper(*args, **kwargs):
+            with self._lock:
+                self.count += 1
+            return method(*args, **kwargs)
+
+        return wrapper
+
+    def __enter__(self):
+        self._patches = [
+            patch.object(
+                CursorWrapper, name, self._counting(getattr(CursorWrapper, name))
+            )
+            for name in ["execute", "executemany"]
+        ]
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *_args):
+        for p in self._patches:
+            p.stop()
+
+
+class StageTimer:
+    """
+    Records the wall-clock duration of every call to the wrapped functions,
+    keyed by stage name.
+    """
+
+    def __init__(self):
+        self.durations: Dict[str, List[float]] = defaultdict(list)
+        self._patches = []
+
+    def wrap(self, target, attribute: str, stage: str = None):
+        stage = stage or attribute
+        original = getattr(target, attribute)
+        durations = self.durations[stage]
+
+        if inspect.iscoroutinefunction(original):
+
+            @functools.wraps(original)
+            async def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return await original(*args, **kwargs)
+                finally:
+                    durations.append(time.perf_counter() - start)
+
+        else:
+
+            @functools.wraps(original)
+            def timed(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return original(*args, **kwargs)
+                finally:
+                    durations.append(time.perf_counter() - start)
+
+        self._patches.append(patch.object(target, attribute, timed))
+
+    def __enter__(self):
+        for p in self._patches:
+            p.start()
+        return self
+
+    def __exit__(self, *_args):
+        for p in self._patches:
+            p.stop()
+
+
+@pytest.fixture
+def horizon_stub():
+    """
+    Starts a :class:`HorizonStub` and points Polaris' Horizon settings at it.
+
+    Latency and error rate are read from ``POLARIS_BENCH_HORIZON_LATENCY`` (seconds)
+    and ``POLARIS_BENCH_HORIZON_ERROR_RATE`` (0 to 1).
+    """
+    stub = HorizonStub(
+        latency=env_float("POLARIS_BENCH_HORIZON_LATENCY", 0.005),
+        error_rate=env_float("POLARIS_BENCH_HORIZON_ERROR_RATE", 0.0),
+        seed=0,
+    )
+    with stub:
+        server = Server(horizon_url=stub.url)
+        with patch.object(settings, "HORIZON_URI", stub.url), patch.object(
+            settings, "HORIZON_SERVER", server
+        ):
+            ASSET_DISTRIBUTION_ACCOUNT_MAP.clear()
+            yield stub
+            ASSET_DISTRIBUTION_ACCOUNT_MAP.clear()
+        server.close()
+
+
+@pytest.fixture
+def pending_deposits_factory(horizon_stub):
+    """
+    Factory fixture creating `count` deposits in ``pending_user_transfer_start``
+    spread evenly across `asset_count` assets, each with its own distribution
+    account. Every account involved is registered with `horizon_stub`, and
+    destination accounts already trust the asset they receive.
+    """
+
+    def create_pending_deposits(count: int, asset_count: int) -> List[Transaction]:
+        assets = []
+        for i in range(asset_count):
+            issuer = Keypair.random().public_key
+            distribution = Keypair.random()
+            asset = Asset.objects.create(
+                code=f"BENCH{i}",
+                issuer=issuer,
+                distribution_seed=distribution.secret,
+                significant_decimals=2,
+                deposit_fee_fixed=0,
+                deposit_fee_percent=0,
+            )
+            horizon_stub.add_account(
+                distribution.public_key,
+                thresholds={
+                    "low_threshold": 0,
+                    "med_threshold": 1,
+                    "high_threshold": 1,
+                },
+            )
+            assets.append(asset)
+        transactions = []
+        for i in range(count):
+            asset = assets[i % asset_count]
+            destination = Keypair.random().public_key
+            horizon_stub.add_account(
+                destination,
+                balances=[
+                    {
+                        "asset_type": "credit_alphanum12",
+                        "asset_code": asset.code,
+                        "asset_issuer": asset.issuer,
+                        "balance": "0.0000000",
+                    }
+                ],
+            )
+            transactions.append(
+                Transaction(
+                    asset=asset,
+                    stellar_account=destination,
+                    to_address=destination,
+                    kind=Transaction.KIND.deposit,
+                    status=Transaction.STATUS.pending_user_transfer_start,
+                    protocol=Transaction.PROTOCOL.sep24,
+                    amount_in=Decimal(100),
+                    amount_fee=Decimal(1),
+                    amount_out=Decimal(99),
+                )
+            )
+        return Transaction.objects.bulk_create(transactions)
+
+    return create_pending_deposits
@@ -0,0 +1,232 @@
+"""
+A local stand-in for the Horizon endpoints used by Polaris' background processes.
+
+The stub runs an aiohttp application on its own event loop in a background thread
+so both ``stellar_sdk.Server`` (used by the self-custody integration from the
+``sync_to_async`` executor) and ``stellar_sdk.ServerAsync`` (used directly by the
+commands) can reach it over HTTP, exactly as they would reach a real Horizon.
+"""
+
+import asyncio
+import random
+import threading
+import time
+from collections import Counter, defaultdict
+from typing import Dict, List, Optional
+
+from aiohttp import web
+from stellar_sdk import (
+    CreateAccount,
+    FeeBumpTransactionEnvelope,
+    TransactionEnvelope,
+)
+from stellar_sdk.exceptions import SdkError
+
+from polaris import settings
+
+# A successful TransactionResult containing a single successful payment operation
+SUCCESS_RESULT_XDR = "AAAAAAAAAGQAAAAAAAAAAQAAAAAAAAABAAAAAAAAAAA="
+
+
+class HorizonStub:
+    """
+    Implements ``GET /accounts/{account_id}``, ``GET /fee_stats``, ``GET /ledgers``,
+    ``POST /transactions`` and ``GET /transactions/{transaction_hash}``.
+
+    Every request is delayed by `latency` seconds. Transaction submissions fail with
+    a ``504 Timeout`` response, which Polaris treats as a retryable error, with
+    probability `error_rate`.
+    """
+
+    def __init__(
+        self,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        base_fee: int = 100,
+        seed: Optional[int] = None,
+    ):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.base_fee = base_fee
+        self.random = random.Random(seed)
+        self.accounts: Dict[str, Dict] = {}
+        self.transactions: Dict[str, Dict] = {}
+        self.request_counts = Counter()
+        self.request_durations = defaultdict(list)
+        self.url = None
+        self._ledger = 1000
+        self._loop = None
+        self._runner = None
+        self._thread = None
+        self._started = threading.Event()
+
+    def add_account(
+        self,
+        account_id: str,
+        balances: Optional[List[Dict]] = None,
+        signers: Optional[List[Dict]] = None,
+        thresholds: Optional[Dict] = None,
+    ):
+        self.accounts[account_id] = {
+            "id": account_id,
+            "account_id": account_id,
+            "sequence": str(self._ledger << 32),
+            "balances": (balances or [])
+            + [{"asset_type": "native", "balance": "10000.0000000"}],
+            "signers": signers
+            or [{"key": account_id, "weight": 1, "type": "ed25519_public_key"}],
+            "thresholds": thresholds
+            or {"low_threshold": 0, "med_threshold": 0, "high_threshold": 0},
+            "data": {},
+        }
+
+    def reset_counters(self):
+        self.request_counts.clear()
+        self.request_durations.clear()
+
+    def start(self) -> "HorizonStub":
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+        self._started.wait()
+        return self
+
+    def stop(self):
+        if not self._loop:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._thread.join()
+        self._loop = None
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *_args):
+        self.stop()
+
+    def _run(self):
+        self._loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self._loop)
+        self._loop.run_until_complete(self._serve())
+        self._started.set()
+        self._loop.run_forever()
+        self._loop.close()
+
+    async def _serve(self):
+        app = web.Application(middlewares=[self._instrument])
+        app.add_routes(
+            [
+                web.get("/accounts/{account_id}", self.get_account),
+                web.get("/fee_stats", self.get_fee_stats),
+                web.get("/ledgers", self.get_ledgers),
+                web.post("/transactions", self.submit_transaction),
+                web.get("/transactions/{transaction_hash}", self.get_transaction),
+            ]
+        )
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, "127.0.0.1", 0)
+        await site.start()
+        host, port = self._runner.addresses[0][:2]
+        self.url = f"http://{host}:{port}"
+
+    @web.middleware
+    async def _instrument(self, request, handler):
+        start = time.perf_counter()
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        response = await handler(request)
+        route = request.match_info.route.resource.canonical
+        self.request_counts[f"{request.method} {route}"] += 1
+        self.request_durations[f"{request.method} {route}"].append(
+            time.perf_counter() - start
+        )
+        return response
+
+    @staticmethod
+    def _problem(status: int, title: str, extras: Optional[Dict] = None):
+        body = {"type": "", "title": title, "status": status, "detail": title}
+        if extras:
+            body["extras"] = extras
+        return web.json_response(body, status=status)
+
+    async def get_account(self, request):
+        account = self.accounts.get(request.match_info["account_id"])
+        if not account:
+            return self._problem(404, "Resource Missing")
+        return web.json_response(account)
+
+    async def get_fee_stats(self, _request):
+        fee = str(self.base_fee)
+        return web.json_response(
+            {
+                "last_ledger": str(self._ledger),
+                "last_ledger_base_fee": fee,
+                "ledger_capacity_usage": "0.5",
+                "fee_charged": {"min": fee, "mode": fee, "p50": fee, "p99": fee},
+                "max_fee": {"min": fee, "mode": fee, "p50": fee, "p99": fee},
+            }
+        )
+
+    async def get_ledgers(self, _request):
+        return web.json_response(
+            {
+                "_embedded": {
+                    "records": [
+                        {
+                            "sequence": self._ledger,
+                            "base_fee_in_stroops": self.base_fee,
+                        }
+                    ]
+                }
+            }
+        )
+
+    async def submit_transaction(self, request):
+        if self.error_rate and self.random.random() < self.error_rate:
+            return self._problem(504, "Timeout")
+        xdr = (await request.post()).get("tx")
+        try:
+            envelope = TransactionEnvelope.from_xdr(
+                xdr, settings.STELLAR_NETWORK_PASSPHRASE
+            )
+        except (SdkError, ValueError):
+            try:
+                envelope = FeeBumpTransactionEnvelope.from_xdr(
+                    xdr, settings.STELLAR_NETWORK_PASSPHRASE
+                ).transaction.inner_transaction_envelope
+            except (SdkError, ValueError):
+                return self._problem(400, "Transaction Malformed")
+        transaction = envelope.transaction
+        source = self.accounts.get(transaction.source.account_id)
+        if not source or int(source["sequence"]) + 1 != transaction.sequence:
+            return self._problem(
+                400,
+                "Transaction Failed",
+                {"result_codes": {"transaction": "tx_bad_seq"}},
+            )
+        source["sequence"] = str(transaction.sequence)
+        for operation in transaction.operations:
+            if isinstance(operation, CreateAccount):
+                self.add_account(operation.destination)
+        self._ledger += 1
+        transaction_hash = envelope.hash_hex()
+        record = {
+            "id": transaction_hash,
+            "hash": transaction_hash,
+            "ledger": self._ledger,
+            "paging_token": str(self._ledger << 32),
+            "successful": True,
+            "source_account": transaction.source.account_id,
+            "envelope_xdr": xdr,
+            "result_xdr": SUCCESS_RESULT_XDR,
+            "memo_type": "none",
+        }
+        self.transactions[transaction_hash] = record
+        return web.json_response(record)
+
+    async def get_transaction(self, request):
+        record = self.transactions.get(request.match_info["transaction_hash"])
+        if not record:
+            return self._problem(404, "Resource Missing")
+        return web.json_response(record)
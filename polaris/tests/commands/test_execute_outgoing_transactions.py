@@ -0,0 +1,225 @@
+import asyncio
+import threading
+import time
+from datetime import timedelta
+from unittest.mock import patch, Mock
+
+import pytest
+from asgiref.sync import sync_to_async
+from stellar_sdk import Keypair
+
+from polaris.integrations import RailsIntegration
+from polaris.models import Asset, Transaction, utc_now
+from polaris.management.commands.execute_outgoing_transactions import Command
+
+test_module = "polaris.management.commands.execute_outgoing_transactions"
+
+
+@pytest.fixture(autouse=True)
+def reset_terminate():
+    with patch(f"{test_module}.TERMINATE", False):
+        yield
+
+
+def create_ready_withdrawals(count, **kwargs):
+    asset = Asset.objects.create(
+        code="USD", issuer=Keypair.random().public_key, significant_decimals=2
+    )
+    return [
+        Transaction.objects.create(
+            asset=asset,
+            stellar_account=Keypair.random().public_key,
+            kind=Transaction.KIND.withdrawal,
+            status=Transaction.STATUS.pending_anchor,
+            protocol=Transaction.PROTOCOL.sep24,
+            amount_in=100,
+            amount_fee=1,
+            amount_out=99,
+            **kwargs,
+        )
+        for _ in range(count)
+    ]
+
+
+def complete(transaction):
+    transaction.status = Transaction.STATUS.completed
+    transaction.save()
+
+
+@pytest.mark.django_db
+def test_claim_transactions_leases_chunk():
+    transactions = create_ready_withdrawals(3)
+
+    claimed = Command.claim_transactions(chunk_size=2, lease=60)
+
+    assert len(claimed) == 2
+    for transaction in transactions:
+        transaction.refresh_from_db()
+    claimed_ids = {t.id for t in claimed}
+    for transaction in transactions:
+        if transaction.id in claimed_ids:
+            assert transaction.pending_execution_attempt
+            assert transaction.lease_expires_at > utc_now() + timedelta(seconds=50)
+        else:
+            assert not transaction.pending_execution_attempt
+    assert [t.id for t in Command.claim_transactions(chunk_size=2, lease=60)] == [
+        t.id for t in transactions if t.id not in claimed_ids
+    ]
+
+
+@pytest.mark.django_db
+def test_claim_transactions_reclaims_expired_leases():
+    expired, active = create_ready_withdrawals(
+        2,
+        pending_execution_attempt=True,
+        lease_expires_at=utc_now() - timedelta(seconds=1),
+    )
+    active.lease_expires_at = utc_now() + timedelta(seconds=60)
+    active.save()
+
+    claimed = Command.claim_transactions(chunk_size=10, lease=60)
+
+    assert [t.id for t in claimed] == [expired.id]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_execute_outgoing_transactions_concurrently_in_chunks():
+    transactions = create_ready_withdrawals(5)
+    threads, calls = set(), []
+    # the transactions of the first chunk must be executed at the same time
+    first_chunk = threading.Barrier(2)
+    # the in-memory SQLite test database doesn't support concurrent writes
+    write_lock = threading.Lock()
+
+    def execute_outgoing_transaction(transaction):
+        threads.add(threading.get_ident())
+        calls.append(transaction)
+        if len(calls) <= 2:
+            first_chunk.wait(timeout=5)
+        with write_lock:
+            complete(transaction)
+
+    def validate_executed_transaction(transaction):
+        with write_lock:
+            return validate(transaction)
+
+    validate = Command.validate_executed_transaction
+    rri = Mock(execute_outgoing_transaction=execute_outgoing_transaction)
+    with patch(f"{test_module}.rri", rri), patch(
+        f"{test_module}.maybe_make_callback"
+    ), patch.object(
+        Command, "claim_transactions", wraps=Command.claim_transactions
+    ) as claim, patch.object(
+        Command,
+        "validate_executed_transaction",
+        side_effect=validate_executed_transaction,
+    ):
+        Command.execute_outgoing_transactions(concurrency=2, chunk_size=2)
+
+    assert claim.call_count == 3
+    assert len(threads) == 2
+    assert threading.get_ident() not in threads
+    for transaction in transactions:
+        transaction.refresh_from_db()
+        assert transaction.status == Transaction.STATUS.completed
+        assert not transaction.pending_execution_attempt
+        assert transaction.completed_at
+
+
+@pytest.mark.django_db(transaction=True)
+def test_execute_outgoing_transactions_releases_failed_claims():
+    (transaction,) = create_ready_withdrawals(1)
+    rri = Mock(execute_outgoing_transaction=Mock(side_effect=ValueError()))
+    with patch(f"{test_module}.rri", rri):
+        Command.execute_outgoing_transactions()
+
+    transaction.refresh_from_db()
+    assert transaction.status == Transaction.STATUS.pending_anchor
+    assert not transaction.pending_execution_attempt
+
+
+@pytest.mark.django_db(transaction=True)
+def test_execute_outgoing_transactions_executes_failed_transactions_once():
+    transactions = create_ready_withdrawals(5)
+    rri = Mock(execute_outgoing_transaction=Mock(side_effect=ValueError()))
+    with patch(f"{test_module}.rri", rri):
+        Command.execute_outgoing_transactions(chunk_size=2)
+
+    executed = [
+        call.args[0].id for call in rri.execute_outgoing_transaction.call_args_list
+    ]
+    assert sorted(executed) == sorted(t.id for t in transactions)
+    for transaction in transactions:
+        transaction.refresh_from_db()
+        assert transaction.status == Transaction.STATUS.pending_anchor
+        assert not transaction.pending_execution_attempt
+
+
+@pytest.mark.django_db(transaction=True)
+def test_execute_outgoing_transactions_renews_leases():
+    (transaction,) = create_ready_withdrawals(1)
+    renewed = []
+
+    def execute_outgoing_transaction(t):
+        for _ in range(100):
+            lease_expires_at = Transaction.objects.get(id=t.id).lease_expires_at
+            if lease_expires_at > t.lease_expires_at:
+                renewed.append(lease_expires_at)
+                break
+            time.sleep(0.01)
+        complete(t)
+
+    rri = Mock(execute_outgoing_transaction=execute_outgoing_transaction)
+    with patch(f"{test_module}.rri", rri), patch(f"{test_module}.maybe_make_callback"):
+        Command.execute_outgoing_transactions(lease=0.03)
+
+    assert renewed
+    transaction.refresh_from_db()
+    assert transaction.status == Transaction.STATUS.completed
+
+
+class AsyncRailsIntegration(RailsIntegration):
+    def __init__(self, error: Exception = None):
+        self.error = error
+        self.in_flight = 0
+        self.max_in_flight = 0
+
+    def execute_outgoing_transaction(self, transaction, *args, **kwargs):
+        raise AssertionError("the async hook should be awaited instead")
+
+    async def aexecute_outgoing_transaction(self, transaction, *args, **kwargs):
+        if self.error:
+            raise self.error
+        self.in_flight += 1
+        self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        await asyncio.sleep(0.01)
+        self.in_flight -= 1
+        transaction.status = Transaction.STATUS.completed
+        await sync_to_async(transaction.save)()
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_hook_awaited_with_concurrency_limit():
+    transactions = create_ready_withdrawals(6)
+    rails = AsyncRailsIntegration()
+
+    with patch(f"{test_module}.rri", rails):
+        Command.execute_outgoing_transactions(concurrency=3, chunk_size=6)
+
+    assert rails.max_in_flight == 3
+    for transaction in transactions:
+        transaction.refresh_from_db()
+        assert transaction.status == Transaction.STATUS.completed
+        assert not transaction.pending_execution_attempt
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_hook_exception_releases_transaction():
+    (transaction,) = create_ready_withdrawals(1)
+
+    with patch(f"{test_module}.rri", AsyncRailsIntegration(ValueError())):
+        Command.execute_outgoing_transactions()
+
+    transaction.refresh_from_db()
+    assert transaction.status == Transaction.STATUS.pending_anchor
+    assert not transaction.pending_execution_attempt
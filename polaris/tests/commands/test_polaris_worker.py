@@ -0,0 +1,126 @@
+import asyncio
+from unittest.mock import patch, Mock, MagicMock, AsyncMock
+
+import pytest
+
+from polaris.models import PolarisHeartbeat
+from polaris.management.commands.polaris_worker import PolarisWorker
+from polaris.management.commands.process_pending_deposits import (
+    PROCESS_PENDING_DEPOSITS_LOCK_KEY,
+)
+
+test_module = "polaris.management.commands.polaris_worker"
+execute_module = "polaris.management.commands.execute_outgoing_transactions"
+poll_module = "polaris.management.commands.poll_outgoing_transactions"
+deposits_module = "polaris.management.commands.process_pending_deposits"
+
+
+@pytest.fixture(autouse=True)
+def patch_server_and_terminate():
+    with patch(f"{test_module}.ServerAsync", MagicMock()) as server_async, patch(
+        f"{execute_module}.TERMINATE", False
+    ), patch(f"{poll_module}.TERMINATE", False):
+        yield server_async
+
+
+async def run_until_stopped(worker, after=0.1):
+    asyncio.get_running_loop().call_later(after, worker.stop)
+    await asyncio.wait_for(worker.run(install_signal_handlers=False), timeout=5)
+
+
+def test_unknown_task():
+    with pytest.raises(ValueError, match="unknown tasks: not_a_task"):
+        PolarisWorker({"not_a_task": 10})
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(f"{execute_module}.Command.execute_outgoing_transactions")
+async def test_periodic_task_runs_until_stopped(mock_execute):
+    worker = PolarisWorker(
+        {"execute_outgoing_transactions": 0},
+        task_options={"execute_outgoing_transactions": {"chunk_size": 5}},
+    )
+
+    await run_until_stopped(worker)
+
+    assert mock_execute.call_count > 1
+    mock_execute.assert_called_with(chunk_size=5)
+    assert worker.executor._shutdown
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(f"{poll_module}.Command.poll_outgoing_transactions")
+async def test_stop_sets_terminate(mock_poll):
+    from polaris.management.commands import (
+        execute_outgoing_transactions,
+        poll_outgoing_transactions,
+    )
+
+    worker = PolarisWorker({"poll_outgoing_transactions": 60})
+
+    await run_until_stopped(worker)
+
+    mock_poll.assert_called_once_with()
+    assert poll_outgoing_transactions.TERMINATE is True
+    assert execute_outgoing_transactions.TERMINATE is False
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(f"{test_module}.watch_transactions.Command.watch_transactions")
+async def test_tasks_share_server(mock_watch, patch_server_and_terminate):
+    async def watch_transactions(server):
+        await asyncio.Event().wait()
+
+    mock_watch.side_effect = watch_transactions
+    worker = PolarisWorker({"watch_transactions": None})
+
+    await run_until_stopped(worker)
+
+    patch_server_and_terminate.assert_called_once()
+    server = patch_server_and_terminate.return_value.__aenter__.return_value
+    mock_watch.assert_called_once_with(server=server)
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(f"{poll_module}.Command.poll_outgoing_transactions")
+@patch(f"{test_module}.watch_transactions.Command.watch_transactions")
+async def test_task_exception_stops_worker(mock_watch, mock_poll):
+    mock_watch.side_effect = RuntimeError("stream closed")
+    worker = PolarisWorker(
+        {"watch_transactions": None, "poll_outgoing_transactions": 60}
+    )
+
+    with pytest.raises(RuntimeError, match="stream closed"):
+        await asyncio.wait_for(worker.run(install_signal_handlers=False), timeout=5)
+
+    assert worker.executor._shutdown
+
+
+@pytest.mark.django_db(transaction=True)
+@patch(f"{deposits_module}.ProcessPendingDeposits.run_tasks", new_callable=AsyncMock)
+async def test_deposits_lock_released_on_stop(mock_run_tasks):
+    lock_held = Mock()
+
+    async def run_tasks(*_args, **_kwargs):
+        lock_held(
+            await PolarisHeartbeat.objects.filter(
+                key=PROCESS_PENDING_DEPOSITS_LOCK_KEY
+            ).aexists()
+        )
+        await asyncio.Event().wait()
+
+    mock_run_tasks.side_effect = run_tasks
+    worker = PolarisWorker(
+        {"process_pending_deposits": 10},
+        task_options={"process_pending_deposits": {"poll_options": {"chunk_size": 5}}},
+    )
+
+    await run_until_stopped(worker, after=0.5)
+
+    lock_held.assert_called_once_with(True)
+    interval, _heartbeat = mock_run_tasks.call_args.args
+    assert interval == 10
+    assert mock_run_tasks.call_args.kwargs["poll_options"] == {"chunk_size": 5}
+    assert not await PolarisHeartbeat.objects.filter(
+        key=PROCESS_PENDING_DEPOSITS_LOCK_KEY
+    ).aexists()
@@ -6,6 +6,7 @@ from unittest.mock import patch, Mock, MagicMock
 from decimal import Decimal
 
 import pytest
+from django.core.management import CommandError
 from stellar_sdk import ServerAsync
 import stellar_sdk
 from stellar_sdk.client.aiohttp_client import AiohttpClient
@@ -28,12 +29,18 @@ from stellar_sdk.memo import TextMemo
 from asgiref.sync import sync_to_async
 
 from polaris import settings
+from polaris.integrations import RailsIntegration
 from polaris.models import Asset, Transaction
 from polaris.utils import create_deposit_envelope
 from polaris.management.commands.process_pending_deposits import (
+    Command,
     ProcessPendingDeposits,
     PolarisQueueAdapter,
+    QueuedTransaction,
+    SubmissionScheduler,
     TransactionType,
+    PRIORITY_FIRST_ATTEMPT,
+    PRIORITY_RETRY,
 )
 
 from polaris.exceptions import (
@@ -801,14 +808,184 @@ async def test_queue_and_get_transaction():
         to_address=destination,
         status=Transaction.STATUS.pending_anchor,
         kind=Transaction.KIND.deposit,
+        queue=SUBMIT_TRANSACTION_QUEUE,
+        queued_at=datetime.datetime.now(datetime.timezone.utc),
         submission_status=Transaction.SUBMISSION_STATUS.ready,
     )
 
     qa = PolarisQueueAdapter([SUBMIT_TRANSACTION_QUEUE])
     qa.queue_transaction("", SUBMIT_TRANSACTION_QUEUE, transaction)
 
+    assert qa.queues[SUBMIT_TRANSACTION_QUEUE].get_nowait() == QueuedTransaction(
+        transaction.id, None, transaction.queued_at
+    )
+    qa.queue_transaction("", SUBMIT_TRANSACTION_QUEUE, transaction)
     queued_transaction = await qa.get_transaction("", SUBMIT_TRANSACTION_QUEUE)
     assert queued_transaction == transaction
+    assert queued_transaction is not transaction
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_get_transaction_skips_dequeued_transactions():
+    usd = await sync_to_async(Asset.objects.create)(
+        code="USD",
+        issuer=Keypair.random().public_key,
+        distribution_seed=Keypair.random().secret,
+    )
+    stale, ready = [
+        await sync_to_async(Transaction.objects.create)(
+            asset=usd,
+            stellar_account=Keypair.random().public_key,
+            to_address=Keypair.random().public_key,
+            status=Transaction.STATUS.pending_anchor,
+            kind=Transaction.KIND.deposit,
+            queue=SUBMIT_TRANSACTION_QUEUE,
+            queued_at=datetime.datetime.now(datetime.timezone.utc),
+            submission_status=Transaction.SUBMISSION_STATUS.ready,
+        )
+        for _ in range(2)
+    ]
+    qa = PolarisQueueAdapter([SUBMIT_TRANSACTION_QUEUE])
+    await sync_to_async(qa.populate_queues)()
+    assert list(qa.queues[SUBMIT_TRANSACTION_QUEUE].pending[0]) == [
+        usd.distribution_account
+    ]
+    assert qa.queues[SUBMIT_TRANSACTION_QUEUE].qsize() == 2
+
+    # the transaction is blocked after being queued
+    stale.queue = None
+    stale.submission_status = Transaction.SUBMISSION_STATUS.blocked
+    await sync_to_async(stale.save)()
+
+    assert await qa.get_transaction("", SUBMIT_TRANSACTION_QUEUE) == ready
+    assert qa.queues[SUBMIT_TRANSACTION_QUEUE].empty()
+
+
+def queued_entries(account, count, priority_class=PRIORITY_FIRST_ATTEMPT, **kwargs):
+    return [
+        QueuedTransaction(f"{account}{i}", account, None, priority_class, **kwargs)
+        for i in range(count)
+    ]
+
+
+def drain(scheduler):
+    entries = []
+    while not scheduler.empty():
+        entries.append(scheduler.get_nowait().id)
+    return entries
+
+
+def test_scheduler_weighted_round_robin():
+    scheduler = SubmissionScheduler(weights={"A": 2})
+    for entry in queued_entries("A", 4) + queued_entries("B", 2):
+        scheduler.put_nowait(entry)
+
+    assert drain(scheduler) == ["A0", "B0", "A1", "A2", "B1", "A3"]
+
+
+@pytest.mark.parametrize("account_weight", ["A=0", "A=-1", "A=two", "A"])
+@patch("polaris.management.commands.polaris_worker.PolarisWorker")
+def test_invalid_account_weight(mock_worker, account_weight):
+    with pytest.raises(CommandError, match="invalid --account-weight"):
+        Command().handle(account_weight=["B=2", account_weight])
+    mock_worker.assert_not_called()
+
+
+def test_scheduler_flood_does_not_delay_other_accounts():
+    scheduler = SubmissionScheduler()
+    for entry in queued_entries("A", 100) + queued_entries("B", 1):
+        scheduler.put_nowait(entry)
+
+    assert drain(scheduler)[:3] == ["A0", "B0", "A1"]
+
+
+def test_scheduler_priority_classes():
+    entries = queued_entries("A", 2) + queued_entries("R", 2, PRIORITY_RETRY)
+    fifo, prioritized = (
+        SubmissionScheduler(),
+        SubmissionScheduler(priorities=[PRIORITY_RETRY, PRIORITY_FIRST_ATTEMPT]),
+    )
+    for entry in entries:
+        fifo.put_nowait(entry)
+        prioritized.put_nowait(entry)
+
+    assert drain(fifo) == ["A0", "R0", "A1", "R1"]
+    assert drain(prioritized) == ["R0", "R1", "A0", "A1"]
+
+
+async def test_scheduler_caps_in_flight_entries_per_account():
+    scheduler = SubmissionScheduler(max_in_flight_per_account=1)
+    for entry in queued_entries("A", 2) + queued_entries("B", 1):
+        scheduler.put_nowait(entry)
+
+    assert [scheduler.get_nowait().id, scheduler.get_nowait().id] == ["A0", "B0"]
+    with pytest.raises(asyncio.QueueEmpty):
+        scheduler.get_nowait()
+    waiting = asyncio.create_task(scheduler.get())
+    await asyncio.sleep(0)
+    assert not waiting.done()
+
+    scheduler.task_done("A")
+
+    assert (await asyncio.wait_for(waiting, timeout=1)).id == "A1"
+
+
+def test_scheduler_queue_wait_stats():
+    now = datetime.datetime.now(datetime.timezone.utc)
+    scheduler = SubmissionScheduler()
+    scheduler.put_nowait(
+        QueuedTransaction("A0", "A", now - datetime.timedelta(seconds=4))
+    )
+    scheduler.put_nowait(
+        QueuedTransaction(
+            "A1", "A", now - datetime.timedelta(seconds=2), PRIORITY_RETRY
+        )
+    )
+
+    drain(scheduler)
+
+    first_attempt = scheduler.wait_stats[PRIORITY_FIRST_ATTEMPT]
+    retry = scheduler.wait_stats[PRIORITY_RETRY]
+    assert first_attempt.count == retry.count == 1
+    assert 4 <= first_attempt.mean < 5
+    assert 2 <= retry.max < 3
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_populate_queues_retries_processing_transactions():
+    usd = await sync_to_async(Asset.objects.create)(
+        code="USD", issuer=Keypair.random().public_key
+    )
+    ready, processing = [
+        await sync_to_async(Transaction.objects.create)(
+            asset=usd,
+            stellar_account=Keypair.random().public_key,
+            to_address=Keypair.random().public_key,
+            status=Transaction.STATUS.pending_anchor,
+            kind=Transaction.KIND.deposit,
+            queue=SUBMIT_TRANSACTION_QUEUE,
+            queued_at=datetime.datetime.now(datetime.timezone.utc),
+            submission_status=submission_status,
+        )
+        for submission_status in [
+            Transaction.SUBMISSION_STATUS.ready,
+            Transaction.SUBMISSION_STATUS.processing,
+        ]
+    ]
+    qa = PolarisQueueAdapter(
+        [SUBMIT_TRANSACTION_QUEUE],
+        priorities=[PRIORITY_RETRY, PRIORITY_FIRST_ATTEMPT],
+        max_in_flight_per_account=1,
+    )
+    await sync_to_async(qa.populate_queues)()
+
+    assert await qa.get_transaction("", SUBMIT_TRANSACTION_QUEUE) == processing
+    qa.transaction_done(SUBMIT_TRANSACTION_QUEUE, processing)
+    assert await qa.get_transaction("", SUBMIT_TRANSACTION_QUEUE) == ready
+    assert set(qa.queue_wait_stats(SUBMIT_TRANSACTION_QUEUE)) == {
+        PRIORITY_RETRY,
+        PRIORITY_FIRST_ATTEMPT,
+    }
 
 
 @pytest.mark.django_db(transaction=True)
@@ -845,6 +1022,37 @@ async def test_check_rails_for_ready_transactions():
         assert transaction.status == Transaction.STATUS.pending_anchor
 
 
+@pytest.mark.django_db(transaction=True)
+async def test_check_rails_for_ready_transactions_account_creation_unsupported():
+    usd = await sync_to_async(Asset.objects.create)(
+        code="USD", issuer=Keypair.random().public_key
+    )
+    destination = Keypair.random().public_key
+    transaction = await sync_to_async(Transaction.objects.create)(
+        asset=usd,
+        stellar_account=destination,
+        to_address=destination,
+        status=Transaction.STATUS.pending_user_transfer_start,
+        kind=Transaction.KIND.deposit,
+        amount_in=100,
+    )
+    qa = PolarisQueueAdapter([SUBMIT_TRANSACTION_QUEUE])
+    with patch(
+        f"{test_module}.rri.poll_pending_deposits", return_value=[transaction]
+    ), patch(f"{test_module}.rci") as mock_rci:
+        mock_rci.account_creation_supported = False
+        await ProcessPendingDeposits.check_rails_for_ready_transactions(qa)
+
+    assert qa.queues[SUBMIT_TRANSACTION_QUEUE].empty()
+    await sync_to_async(transaction.refresh_from_db)()
+    assert transaction.status == Transaction.STATUS.pending_user
+    assert (
+        transaction.submission_status == Transaction.SUBMISSION_STATUS.pending_funding
+    )
+    assert transaction.next_poll_at is None
+    assert transaction.poll_started_at is None
+
+
 @pytest.mark.django_db(transaction=True)
 async def test_check_rails_no_ready_transactions():
     with patch(
@@ -1441,3 +1649,154 @@ def test_acquire_lock_wait_for_expiration():
         >= acquire_lock_wait_time_sec
         >= datetime.timedelta(seconds=interval * 5)
     )
+
+
+@patch(f"{test_module}.rri")
+def test_get_ready_deposits_in_chunks(mock_rri):
+    usd = Asset.objects.create(code="USD", issuer=Keypair.random().public_key)
+    transactions = [
+        Transaction.objects.create(
+            asset=usd,
+            status=Transaction.STATUS.pending_user_transfer_start,
+            kind=Transaction.KIND.deposit,
+            amount_in=100,
+        )
+        for _ in range(5)
+    ]
+    chunk_sizes = []
+
+    def poll_pending_deposits(pending_deposits):
+        chunk_sizes.append(pending_deposits.count())
+        return list(pending_deposits)
+
+    mock_rri.poll_pending_deposits = poll_pending_deposits
+
+    ready = ProcessPendingDeposits.get_ready_deposits(chunk_size=2)
+
+    assert chunk_sizes == [2, 2, 1]
+    assert sorted(t.id for t in ready) == sorted(t.id for t in transactions)
+
+
+@patch(f"{test_module}.rri")
+def test_get_ready_deposits_backoff(mock_rri):
+    usd = Asset.objects.create(code="USD", issuer=Keypair.random().public_key)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    recent, old, stale = [
+        Transaction.objects.create(
+            asset=usd,
+            status=Transaction.STATUS.pending_user_transfer_start,
+            kind=Transaction.KIND.deposit,
+        )
+        for _ in range(3)
+    ]
+    Transaction.objects.filter(id=old.id).update(
+        poll_started_at=now - datetime.timedelta(hours=10)
+    )
+    Transaction.objects.filter(id=stale.id).update(
+        poll_started_at=now - datetime.timedelta(days=30)
+    )
+    mock_rri.poll_pending_deposits = Mock(return_value=[])
+
+    assert (
+        ProcessPendingDeposits.get_ready_deposits(
+            min_poll_interval=10,
+            max_poll_interval=3600 * 6,
+            backoff_factor=0.1,
+            stale_after=86400 * 7,
+            stale_poll_interval=86400,
+        )
+        == []
+    )
+
+    delays = {}
+    for t in [recent, old, stale]:
+        t.refresh_from_db()
+        delays[t.id] = (t.next_poll_at - now).total_seconds()
+    assert delays[recent.id] == pytest.approx(10, abs=5)
+    assert delays[old.id] == pytest.approx(3600, abs=5)
+    assert delays[stale.id] == pytest.approx(86400, abs=5)
+
+    # nothing is due, but the integration function is still called
+    mock_rri.poll_pending_deposits.reset_mock()
+    ProcessPendingDeposits.get_ready_deposits()
+    mock_rri.poll_pending_deposits.assert_called_once()
+    assert not mock_rri.poll_pending_deposits.call_args[0][0].exists()
+
+
+@patch(f"{test_module}.rri")
+def test_get_ready_deposits_backoff_restarts_on_status_change(mock_rri):
+    usd = Asset.objects.create(code="USD", issuer=Keypair.random().public_key)
+    now = datetime.datetime.now(datetime.timezone.utc)
+    changed, unchanged = [
+        Transaction.objects.create(
+            asset=usd,
+            status=Transaction.STATUS.pending_user_transfer_start,
+            kind=Transaction.KIND.deposit,
+        )
+        for _ in range(2)
+    ]
+    Transaction.objects.update(
+        poll_started_at=now - datetime.timedelta(hours=10),
+        next_poll_at=now - datetime.timedelta(seconds=1),
+    )
+
+    def poll_pending_deposits(pending_deposits):
+        for transaction in pending_deposits:
+            if transaction.id == changed.id:
+                transaction.status = Transaction.STATUS.pending_external
+                transaction.save()
+        return []
+
+    mock_rri.poll_pending_deposits = poll_pending_deposits
+
+    assert (
+        ProcessPendingDeposits.get_ready_deposits(
+            min_poll_interval=10, max_poll_interval=3600 * 6, backoff_factor=0.1
+        )
+        == []
+    )
+
+    changed.refresh_from_db()
+    unchanged.refresh_from_db()
+    assert changed.status == Transaction.STATUS.pending_external
+    assert changed.poll_started_at is None
+    assert changed.next_poll_at is None
+    assert unchanged.poll_started_at == now - datetime.timedelta(hours=10)
+    assert (unchanged.next_poll_at - now).total_seconds() == pytest.approx(3600, abs=5)
+
+
+class AsyncRailsIntegration(RailsIntegration):
+    def __init__(self):
+        self.chunk_sizes = []
+
+    def poll_pending_deposits(self, pending_deposits, *args, **kwargs):
+        raise AssertionError("the async hook should be awaited instead")
+
+    async def apoll_pending_deposits(self, pending_deposits, *args, **kwargs):
+        self.chunk_sizes.append(len(pending_deposits))
+        # related objects are loaded before the hook is awaited
+        assert all(t.asset.code == "USD" for t in pending_deposits)
+        return pending_deposits
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_check_rails_awaits_async_hook():
+    usd = await sync_to_async(Asset.objects.create)(
+        code="USD", issuer=Keypair.random().public_key
+    )
+    for _ in range(3):
+        await sync_to_async(Transaction.objects.create)(
+            asset=usd,
+            status=Transaction.STATUS.pending_user_transfer_start,
+            kind=Transaction.KIND.deposit,
+            amount_in=100,
+        )
+    rails = AsyncRailsIntegration()
+
+    with patch(f"{test_module}.rri", rails):
+        ready = await ProcessPendingDeposits.aget_ready_deposits(
+            rails.apoll_pending_deposits, concurrency=2, chunk_size=2
+        )
+
+    assert rails.chunk_sizes == [2, 1]
+    assert len(ready) == 3
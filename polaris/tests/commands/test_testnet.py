@@ -7,7 +7,7 @@ from django.core.management.base import CommandError
 from stellar_sdk import Keypair, Asset as SdkAsset
 from stellar_sdk.operation import Payment, ChangeTrust, SetOptions
 
-from polaris.models import Asset, Transaction, utc_now
+from polaris.models import Asset, Transaction, StreamCursor, utc_now
 from polaris.management.commands.testnet import Command
 from polaris.utils import load_account
 
@@ -43,6 +43,7 @@ def test_reset_success(mock_issue):
     pending_trust_tx = Transaction.objects.create(
         asset=usd, status=Transaction.STATUS.pending_trust
     )
+    StreamCursor.objects.create(account=usd.distribution_account, paging_token="456")
 
     def mock_input(message):
         if message == f"Seed for {usd.code} issuer (enter to skip): ":
@@ -58,6 +59,7 @@ def test_reset_success(mock_issue):
     pending_trust_tx.refresh_from_db()
     assert withdrawal.paging_token == "123"
     assert send.paging_token is None
+    assert not StreamCursor.objects.exists()
     assert pending_trust_tx.status == Transaction.STATUS.error
     mock_issue.assert_called_once_with(
         asset=usd.code,
@@ -1,11 +1,25 @@
+import asyncio
 import pytest
 from copy import deepcopy
+from unittest.mock import patch, AsyncMock, Mock, MagicMock
 
+from stellar_sdk import (
+    Account,
+    Asset as SdkAsset,
+    MuxedAccount,
+    Network,
+    TransactionBuilder,
+    xdr,
+)
 from stellar_sdk.keypair import Keypair
-from asgiref.sync import async_to_sync
+from asgiref.sync import async_to_sync, sync_to_async
 
-from polaris.models import Transaction, Asset
-from polaris.management.commands.watch_transactions import Command
+from polaris.models import Transaction, Asset, StreamCursor
+from polaris.management.commands.watch_transactions import (
+    Command,
+    PendingMemoIndex,
+    iter_payments,
+)
 
 test_module = "polaris.management.commands.watch_transactions"
 SUCCESS_PAYMENT_TRANSACTION_JSON = {
@@ -45,7 +59,7 @@ TEST_ASSET_DISTRIBUTION_PUBLIC_KEY = Keypair.from_secret(
 ).public_key
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_process_response_success(client):
     """
     Tests successful processing of the SUCCESS_PAYMENT_TRANSACTION_JSON
@@ -79,7 +93,7 @@ def test_process_response_success(client):
     assert transaction.amount_expected == 9000
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_process_response_strict_send_success(client):
     """
     Tests successful processing of the SUCCESS_PAYMENT_TRANSACTION_JSON
@@ -111,7 +125,7 @@ def test_process_response_strict_send_success(client):
     assert transaction.amount_in == 1001
 
 
-@pytest.mark.django_db
+@pytest.mark.django_db(transaction=True)
 def test_fee_bump_tx():
     asset = Asset.objects.create(
         code="SRT",
@@ -150,3 +164,470 @@ def test_process_response_unsuccessful(client, acc1_usd_withdrawal_transaction_f
         async_to_sync(Command().process_response)(json, None)
     except KeyError:
         assert False, "process_response() did not return for unsuccessful transaction"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_watch_transactions_one_stream_per_distribution_account():
+    shared_seed = Keypair.random().secret
+    for code, seed in [("USD", shared_seed), ("EUR", shared_seed), ("ETH", None)]:
+        await sync_to_async(Asset.objects.create)(
+            code=code,
+            issuer=Keypair.random().public_key,
+            distribution_seed=seed or Keypair.random().secret,
+        )
+    command = Command()
+    with patch.object(command, "_for_account", new_callable=AsyncMock) as for_account:
+        await command.watch_transactions()
+
+    accounts = [c.args[0] for c in for_account.call_args_list]
+    assert len(accounts) == 2
+    assert len(set(accounts)) == 2
+    assert Keypair.from_secret(shared_seed).public_key in accounts
+    assert command.stream_count == 2
+
+
+def create_pending_withdrawal(memo, account, **kwargs):
+    asset = Asset.objects.create(code="TEST", issuer=TEST_ASSET_ISSUER_PUBLIC_KEY)
+    return Transaction.objects.create(
+        asset=asset,
+        kind=Transaction.KIND.withdrawal,
+        status=kwargs.pop("status", Transaction.STATUS.pending_user_transfer_start),
+        memo=memo,
+        receiving_anchor_account=account,
+        **kwargs,
+    )
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_memo_index_matches_pending_memos_only():
+    account = Keypair.random().public_key
+    transaction = await sync_to_async(create_pending_withdrawal)("memo", account)
+    index = PendingMemoIndex(account)
+    await index.reload()
+
+    assert index.memos == {"memo": {str(transaction.id)}}
+    assert index.match({"successful": True, "memo": "memo"})
+    assert not index.match({"successful": False, "memo": "memo"})
+    assert not index.match({"successful": True})
+    assert not index.match({"successful": True, "memo": "other"})
+    assert (index.hits, index.misses) == (1, 1)
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_memo_index_refresh_adds_started_transactions():
+    account = Keypair.random().public_key
+    index = PendingMemoIndex(account, refresh_interval=0)
+    await index.reload()
+    response = {"successful": True, "memo": "memo"}
+    assert not index.match(response)
+
+    await sync_to_async(create_pending_withdrawal)("memo", account)
+    with patch.object(index, "reload", new_callable=AsyncMock) as reload:
+        assert await index.update() == [response]
+        reload.assert_not_called()
+    assert index.missed == []
+    assert index.match(response)
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_memo_index_reload_rechecks_missed_responses():
+    account = Keypair.random().public_key
+    transaction = await sync_to_async(create_pending_withdrawal)(
+        "memo", account, status=Transaction.STATUS.incomplete
+    )
+    index = PendingMemoIndex(account, refresh_interval=0, reload_interval=60)
+    await index.reload()
+    response = {"successful": True, "memo": "memo"}
+    unrelated = {"successful": True, "memo": "unrelated"}
+    assert not index.match(response)
+    assert not index.match(unrelated)
+
+    # Incremental refreshes don't see transactions started before the last refresh
+    transaction.status = Transaction.STATUS.pending_user_transfer_start
+    await sync_to_async(transaction.save)()
+    assert await index.update() == []
+    assert index.missed == [response, unrelated]
+
+    index.reload_interval = 0
+    assert await index.update() == [response]
+    assert index.missed == []
+
+
+def mock_server_async(responses, pages=None):
+    async def stream():
+        for response in responses:
+            yield response
+
+    server = Mock(load_account=AsyncMock())
+    endpoint = server.transactions.return_value.for_account.return_value
+    endpoint.cursor.return_value.stream = stream
+    endpoint.cursor.return_value.limit.return_value.call = AsyncMock(
+        side_effect=[{"_embedded": {"records": page}} for page in pages or [[]]]
+    )
+    server_async = MagicMock()
+    server_async.return_value.__aenter__.return_value = server
+    return server_async
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_only_processes_memo_index_hits():
+    account = Keypair.random().public_key
+    await sync_to_async(create_pending_withdrawal)("memo", account)
+    responses = [
+        {"successful": True, "memo": "memo", "paging_token": "1"},
+        {"successful": True, "memo": "unrelated", "paging_token": "2"},
+        {"successful": True, "paging_token": "3"},
+    ]
+    command = Command()
+    with patch(
+        f"{test_module}.ServerAsync", mock_server_async(responses)
+    ), patch.object(
+        command, "process_response", new_callable=AsyncMock
+    ) as process_response:
+        await command._for_account(account)
+
+    process_response.assert_awaited_once_with(responses[0], account)
+    assert command.events_processed[account] == 3
+    assert command.memo_indexes[account].misses == 1
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_resumes_from_stream_cursor():
+    account = Keypair.random().public_key
+    await sync_to_async(StreamCursor.objects.create)(account=account, paging_token="5")
+    server_async = mock_server_async([])
+    with patch(f"{test_module}.ServerAsync", server_async):
+        await Command()._for_account(account)
+
+    server = server_async.return_value.__aenter__.return_value
+    endpoint = server.transactions.return_value.for_account.return_value
+    assert [c.args for c in endpoint.cursor.call_args_list] == [("5",), ("5",)]
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_without_stream_cursor_uses_last_completed_transaction():
+    account = Keypair.random().public_key
+    await sync_to_async(create_pending_withdrawal)(
+        None,
+        account,
+        status=Transaction.STATUS.completed,
+        paging_token="7",
+    )
+    assert await Command._get_cursor(account) == "7"
+    assert await Command._get_cursor(Keypair.random().public_key) == "0"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_checkpoints_stream_cursor():
+    account = Keypair.random().public_key
+    responses = [
+        {"successful": True, "memo": None, "paging_token": str(i)} for i in range(1, 6)
+    ]
+    with patch(f"{test_module}.ServerAsync", mock_server_async(responses)), patch(
+        f"{test_module}.CURSOR_CHECKPOINT_EVENTS", 2
+    ), patch.object(Command, "_save_cursor", wraps=Command._save_cursor) as save:
+        await Command()._for_account(account)
+
+    assert [c.args[1] for c in save.call_args_list] == ["2", "4", "5"]
+    stream_cursor = await sync_to_async(StreamCursor.objects.get)(account=account)
+    assert stream_cursor.paging_token == "5"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_checkpoint_does_not_skip_missed_responses():
+    account = Keypair.random().public_key
+    responses = [
+        {"successful": True, "paging_token": "10"},
+        {"successful": True, "memo": "unknown", "paging_token": "20"},
+        {"successful": True, "paging_token": "30"},
+    ]
+    with patch(f"{test_module}.ServerAsync", mock_server_async(responses)):
+        await Command()._for_account(account)
+
+    stream_cursor = await sync_to_async(StreamCursor.objects.get)(account=account)
+    assert stream_cursor.paging_token == "19"
+
+
+@pytest.mark.django_db
+def test_process_page_matches_records_in_one_query(django_assert_num_queries):
+    asset = Asset.objects.create(
+        code="TEST",
+        issuer=TEST_ASSET_ISSUER_PUBLIC_KEY,
+        distribution_seed=TEST_ASSET_DISTRIBUTION_SEED,
+    )
+    transactions = [
+        Transaction.objects.create(
+            asset=asset,
+            stellar_account=Keypair.random().public_key,
+            amount_in=9000,
+            amount_expected=9000,
+            kind=Transaction.KIND.withdrawal,
+            status=Transaction.STATUS.pending_user_transfer_start,
+            memo=SUCCESS_PAYMENT_TRANSACTION_JSON["memo"],
+            protocol=Transaction.PROTOCOL.sep24,
+            receiving_anchor_account=TEST_ASSET_DISTRIBUTION_PUBLIC_KEY,
+        )
+        for _ in range(2)
+    ]
+    records = [
+        {"successful": True, "paging_token": "1"},
+        deepcopy(SUCCESS_PAYMENT_TRANSACTION_JSON),
+        deepcopy(SUCCESS_PAYMENT_TRANSACTION_JSON),
+        {**deepcopy(SUCCESS_PAYMENT_TRANSACTION_JSON), "memo": "unrelated"},
+    ]
+
+    # run the queries on this thread so they are counted
+    with patch(f"{test_module}.maybe_make_callback_async") as callback, patch(
+        f"{test_module}.db_sync_to_async", sync_to_async
+    ):
+        # one query for matching and one for updating the matched transactions
+        with django_assert_num_queries(2):
+            async_to_sync(Command.process_page)(
+                records, TEST_ASSET_DISTRIBUTION_PUBLIC_KEY
+            )
+
+    assert callback.call_count == 2
+    for transaction in transactions:
+        transaction.refresh_from_db()
+        assert transaction.status == Transaction.STATUS.pending_anchor
+        assert transaction.amount_in == 10000
+        assert transaction.stellar_transaction_id == records[1]["id"]
+        assert transaction.paging_token == records[1]["paging_token"]
+        assert transaction.from_address
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_for_account_catches_up_before_streaming():
+    account = Keypair.random().public_key
+    pages = [
+        [
+            {"successful": True, "paging_token": "1"},
+            {"successful": True, "paging_token": "2"},
+        ],
+        [{"successful": True, "paging_token": "3"}],
+    ]
+    server_async = mock_server_async([], pages=pages)
+    command = Command()
+    with patch(f"{test_module}.ServerAsync", server_async), patch(
+        f"{test_module}.CATCH_UP_PAGE_SIZE", 2
+    ), patch.object(command, "process_page", new_callable=AsyncMock) as process_page:
+        await command._for_account(account)
+
+    assert [c.args[0] for c in process_page.call_args_list] == pages
+    server = server_async.return_value.__aenter__.return_value
+    endpoint = server.transactions.return_value.for_account.return_value
+    assert [c.args for c in endpoint.cursor.call_args_list] == [
+        ("0",),
+        ("2",),
+        ("3",),
+    ]
+    endpoint.cursor.return_value.limit.assert_called_with(2)
+    stream_cursor = await sync_to_async(StreamCursor.objects.get)(account=account)
+    assert stream_cursor.paging_token == "3"
+    assert account in command.catch_up_rates
+
+
+def test_iter_payments():
+    assert list(
+        iter_payments(
+            SUCCESS_STRICT_SEND_PAYMENT["envelope_xdr"],
+            SUCCESS_STRICT_SEND_PAYMENT["result_xdr"],
+        )
+    ) == [
+        (
+            "GDIQG273PP6R2IBKFCKPU3P3SL7L7DS5V26FPG4K64P6JPD5A5PZ5KMC",
+            ("TEST", TEST_ASSET_ISSUER_PUBLIC_KEY),
+            "1001",
+            TEST_ASSET_ISSUER_PUBLIC_KEY,
+        )
+    ]
+
+
+def test_iter_payments_fee_bump():
+    assert list(
+        iter_payments(
+            SUCCESS_FEE_BUMP_TRANSACTION_JSON["envelope_xdr"],
+            SUCCESS_FEE_BUMP_TRANSACTION_JSON["result_xdr"],
+        )
+    ) == [
+        (
+            "GCSGSR6KQQ5BP2FXVPWRL6SWPUSFWLVONLIBJZUKTVQB5FYJFVL6XOXE",
+            ("SRT", "GCDNJUBQSX7AJWLJACMJ7I4BC3Z47BQUTMHEICZLE6MU4KQBRYG5JY6B"),
+            "10",
+            "GBGQ6SIC2WLGOQ7QO5USCOT6YMBGC64X5NRZNDQ6G7EMWTO2V7VM77IM",
+        )
+    ]
+
+
+def test_iter_payments_skips_other_operations_and_uses_operation_source():
+    source = Keypair.random().public_key
+    destination = Keypair.random().public_key
+    muxed_source = MuxedAccount(Keypair.random().public_key, 1)
+    envelope = (
+        TransactionBuilder(
+            Account(source, 1),
+            network_passphrase=Network.TESTNET_NETWORK_PASSPHRASE,
+            base_fee=100,
+        )
+        .append_change_trust_op(SdkAsset("TEST", TEST_ASSET_ISSUER_PUBLIC_KEY))
+        .append_payment_op(destination, SdkAsset.native(), "1.5", source=muxed_source)
+        .append_payment_op(destination, SdkAsset.native(), "2")
+        .set_timeout(30)
+        .build()
+    )
+    result = xdr.TransactionResult(
+        fee_charged=xdr.Int64(300),
+        result=xdr.TransactionResultResult(
+            code=xdr.TransactionResultCode.txSUCCESS,
+            results=[
+                xdr.OperationResult(
+                    code=xdr.OperationResultCode.opINNER,
+                    tr=xdr.OperationResultTr(
+                        type=xdr.OperationType.CHANGE_TRUST,
+                        change_trust_result=xdr.ChangeTrustResult(
+                            xdr.ChangeTrustResultCode.CHANGE_TRUST_SUCCESS
+                        ),
+                    ),
+                )
+            ]
+            + [
+                xdr.OperationResult(
+                    code=xdr.OperationResultCode.opINNER,
+                    tr=xdr.OperationResultTr(
+                        type=xdr.OperationType.PAYMENT,
+                        payment_result=xdr.PaymentResult(
+                            xdr.PaymentResultCode.PAYMENT_SUCCESS
+                        ),
+                    ),
+                )
+            ]
+            * 2,
+        ),
+        ext=xdr.TransactionResultExt(0),
+    )
+
+    assert list(iter_payments(envelope.to_xdr(), result.to_xdr())) == [
+        (destination, ("XLM", None), "1.5", muxed_source.account_muxed),
+        (destination, ("XLM", None), "2", source),
+    ]
+
+
+def mock_endpoint(responses, consumed):
+    async def stream():
+        for response in responses:
+            yield response
+            consumed.append(response)
+
+    return Mock(stream=stream)
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_process_stream_reads_past_slow_matches():
+    account = Keypair.random().public_key
+    await sync_to_async(create_pending_withdrawal)("slow", account)
+    index = PendingMemoIndex(account)
+    await index.reload()
+    responses = [
+        {"successful": True, "memo": "slow", "paging_token": "1"},
+        {"successful": True, "paging_token": "2"},
+        {"successful": True, "paging_token": "3"},
+    ]
+    consumed = []
+    release = asyncio.Event()
+
+    async def process_response(_response, _account):
+        await release.wait()
+
+    command = Command()
+    with patch.object(command, "process_response", process_response):
+        task = asyncio.create_task(
+            command._process_stream(mock_endpoint(responses, consumed), account, index)
+        )
+        while len(consumed) < len(responses):
+            await asyncio.sleep(0.01)
+        # the stream has been read, but the cursor waits for the slow match
+        assert command.events_processed[account] == 0
+        assert not await sync_to_async(
+            StreamCursor.objects.filter(account=account).exists
+        )()
+        release.set()
+        await task
+
+    assert command.events_processed[account] == 3
+    stream_cursor = await sync_to_async(StreamCursor.objects.get)(account=account)
+    assert stream_cursor.paging_token == "3"
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_process_stream_matches_same_memo_in_order():
+    account = Keypair.random().public_key
+    await sync_to_async(create_pending_withdrawal)("memo", account)
+    index = PendingMemoIndex(account)
+    await index.reload()
+    responses = [
+        {"successful": True, "memo": "memo", "paging_token": str(i)}
+        for i in range(1, 4)
+    ]
+    running, processed = [], []
+
+    async def process_response(response, _account):
+        running.append(response)
+        assert len(running) == 1
+        await asyncio.sleep(0.01)
+        running.remove(response)
+        processed.append(response)
+
+    command = Command()
+    with patch.object(command, "process_response", process_response):
+        await command._process_stream(mock_endpoint(responses, []), account, index)
+
+    assert processed == responses
+
+
+@pytest.mark.django_db(transaction=True)
+async def test_process_stream_rechecks_missed_response_without_further_events():
+    account = Keypair.random().public_key
+    transaction = await sync_to_async(create_pending_withdrawal)(
+        "memo", account, status=Transaction.STATUS.incomplete
+    )
+    index = PendingMemoIndex(account, refresh_interval=0.01, reload_interval=0.05)
+    await index.reload()
+    response = {"successful": True, "memo": "memo", "paging_token": "1"}
+    processed = asyncio.Event()
+
+    async def stream():
+        yield response
+        # the account receives no further transactions
+        await asyncio.Event().wait()
+
+    async def process_response(_response, _account):
+        processed.set()
+
+    command = Command()
+    with patch.object(command, "process_response", process_response):
+        task = asyncio.create_task(
+            command._process_stream(Mock(stream=stream), account, index)
+        )
+        await asyncio.sleep(0.02)
+        assert index.missed == [response]
+        # the withdrawal starts waiting for the payment already received
+        transaction.status = Transaction.STATUS.pending_user_transfer_start
+        await sync_to_async(transaction.save)()
+        await asyncio.wait_for(processed.wait(), 5)
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    assert index.missed == []
+
+
+def test_memo_index_resume_cursor():
+    index = PendingMemoIndex(Keypair.random().public_key)
+    assert index.resume_cursor("30") == "30"
+    index.missed = [{"paging_token": "20"}, {"paging_token": "25"}]
+    assert index.resume_cursor("30") == "19"
+    assert index.resume_cursor("10") == "10"
+    index.rechecking = [{"paging_token": "15"}]
+    assert index.resume_cursor("30") == "14"
+    index.resolve(index.rechecking[0])
+    assert index.resume_cursor("30") == "19"
@@ -1,3 +1,4 @@
+import os
 from unittest.mock import patch, Mock
 
 import toml
@@ -6,6 +7,7 @@ from stellar_sdk import Keypair
 from rest_framework.request import Request
 
 from polaris import settings
+from polaris.integrations import uncacheable
 from polaris.models import Asset
 
 TOML_PATH = "/.well-known/stellar.toml"
@@ -87,3 +89,63 @@ def test_toml_static_local_mode(mock_open, mock_find, client):
 
     toml_data = toml.loads(response.content.decode())
     assert toml_data == {"TEST_ATTR": 1}
+
+
+@patch(f"{TEST_MODULE}.finders.find")
+def test_toml_static_cached_until_modified(mock_find, client, tmp_path):
+    static_toml = tmp_path / "stellar.toml"
+    static_toml.write_text("TEST_ATTR=1")
+    os.utime(static_toml, (1600000000, 1600000000))
+    mock_find.return_value = str(static_toml)
+
+    response = client.get(TOML_PATH)
+    assert response.headers["Last-Modified"] == "Sun, 13 Sep 2020 12:26:40 GMT"
+    assert (
+        client.get(
+            TOML_PATH, HTTP_IF_MODIFIED_SINCE=response.headers["Last-Modified"]
+        ).status_code
+        == 304
+    )
+
+    with patch(f"{TEST_MODULE}.open") as mock_open:
+        assert client.get(TOML_PATH).content == b"TEST_ATTR=1"
+    mock_open.assert_not_called()
+
+    static_toml.write_text("TEST_ATTR=2")
+    os.utime(static_toml, (1600000060, 1600000060))
+    response = client.get(TOML_PATH)
+    assert toml.loads(response.content.decode()) == {"TEST_ATTR": 2}
+    assert response.headers["Last-Modified"] == "Sun, 13 Sep 2020 12:27:40 GMT"
+
+
+@pytest.mark.django_db
+def test_toml_generated_cached_until_assets_change(client):
+    toml_func = Mock(return_value={})
+    with patch(f"{TEST_MODULE}.registered_toml_func", toml_func):
+        usd = Asset.objects.create(
+            code="USD",
+            issuer=Keypair.random().public_key,
+            distribution_seed=Keypair.random().secret,
+        )
+        first, second = client.get(TOML_PATH), client.get(TOML_PATH)
+        assert toml_func.call_count == 1
+        assert first.content == second.content
+        assert (
+            client.get(TOML_PATH, HTTP_IF_NONE_MATCH=first.headers["ETag"]).status_code
+            == 304
+        )
+
+        usd.delete()
+        assert "ACCOUNTS" not in toml.loads(client.get(TOML_PATH).content.decode())
+        assert toml_func.call_count == 2
+
+
+@pytest.mark.django_db
+def test_toml_uncacheable_integration(client):
+    toml_func = uncacheable(Mock(return_value={}))
+    with patch(f"{TEST_MODULE}.registered_toml_func", toml_func):
+        client.get(TOML_PATH)
+        response = client.get(TOML_PATH)
+
+    assert toml_func.call_count == 2
+    assert "ETag" not in response.headers
@@ -0,0 +1,308 @@
+import asyncio
+import threading
+import time
+from unittest.mock import Mock, patch
+
+import jwt
+import pytest
+from stellar_sdk import Keypair
+
+from polaris import settings
+from polaris.sep10.cache import SingleFlightCache, TokenCache
+
+
+def test_cache_hit_until_ttl_expires():
+    cache = SingleFlightCache("test", ttl=0.05)
+    fetch = Mock(side_effect=[1, 2])
+
+    assert [cache.get("key", fetch), cache.get("key", fetch)] == [1, 1]
+    time.sleep(0.05)
+    assert cache.get("key", fetch) == 2
+    assert cache.stats() == {
+        "hits": 1,
+        "stale_hits": 0,
+        "misses": 2,
+        "hit_rate": 1 / 3,
+    }
+
+
+def test_cache_single_flight():
+    cache = SingleFlightCache("test", ttl=60)
+    fetching, release = threading.Event(), threading.Event()
+
+    def fetch():
+        fetching.set()
+        release.wait(timeout=5)
+        return "value"
+
+    fetch = Mock(side_effect=fetch)
+    results = []
+    threads = [
+        threading.Thread(target=lambda: results.append(cache.get("key", fetch)))
+        for _ in range(5)
+    ]
+    threads[0].start()
+    fetching.wait(timeout=5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.05)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert results == ["value"] * 5
+    fetch.assert_called_once()
+
+
+def test_cache_serves_stale_value_during_fetch():
+    cache = SingleFlightCache("test", ttl=0.01, max_staleness=60)
+    cache.get("key", lambda: "stale")
+    time.sleep(0.01)
+    fetching, release = threading.Event(), threading.Event()
+
+    def fetch():
+        fetching.set()
+        release.wait(timeout=5)
+        return "fresh"
+
+    refresh = threading.Thread(target=cache.get, args=("key", fetch))
+    refresh.start()
+    fetching.wait(timeout=5)
+
+    assert cache.get("key", fetch) == "stale"
+    release.set()
+    refresh.join(timeout=5)
+    assert cache.get("key", fetch) == "fresh"
+    assert cache.stats()["stale_hits"] == 1
+
+
+def test_cache_min_fetched_at():
+    cache = SingleFlightCache("test", ttl=60)
+    fetch = Mock(side_effect=[1, 2])
+
+    started = time.monotonic()
+    assert cache.get("key", fetch) == 1
+    # fetched after the request started, the value is up-to-date
+    assert cache.get("key", fetch, min_fetched_at=started) == 1
+    assert cache.get("key", fetch, min_fetched_at=time.monotonic()) == 2
+
+
+def test_cache_errors_not_cached():
+    cache = SingleFlightCache("test", ttl=60)
+    fetch = Mock(side_effect=[ValueError(), 1])
+
+    with pytest.raises(ValueError):
+        cache.get("key", fetch)
+    assert cache.get("key", fetch) == 1
+
+
+def test_cache_max_size():
+    cache = SingleFlightCache("test", ttl=60, max_size=2)
+    for key in ["a", "b", "c"]:
+        cache.get(key, lambda: key)
+
+    assert list(cache.entries) == ["b", "c"]
+
+
+def test_cache_disabled():
+    cache = SingleFlightCache("test", ttl=0)
+    fetch = Mock(side_effect=[1, 2])
+
+    assert [cache.get("key", fetch), cache.get("key", fetch)] == [1, 2]
+
+
+def test_cache_negative_ttl():
+    cache = SingleFlightCache(
+        "test", ttl=60, negative_ttl=0.05, cached_errors=(ValueError,)
+    )
+    fetch = Mock(side_effect=[ValueError(), 1])
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get("key", fetch)
+    fetch.assert_called_once()
+    time.sleep(0.05)
+    assert cache.get("key", fetch) == 1
+
+
+def test_cache_negative_ttl_other_errors_not_cached():
+    cache = SingleFlightCache(
+        "test", ttl=60, negative_ttl=60, cached_errors=(ValueError,)
+    )
+    fetch = Mock(side_effect=[KeyError(), 1])
+
+    with pytest.raises(KeyError):
+        cache.get("key", fetch)
+    assert cache.get("key", fetch) == 1
+
+
+def test_cache_refresh_in_background():
+    cache = SingleFlightCache(
+        "test", ttl=0.01, max_staleness=60, refresh_in_background=True
+    )
+    cache.get("key", lambda: "stale")
+    time.sleep(0.01)
+    release = threading.Event()
+
+    def fetch():
+        release.wait(timeout=5)
+        return "fresh"
+
+    fetch = Mock(side_effect=fetch)
+    assert [cache.get("key", fetch), cache.get("key", fetch)] == ["stale", "stale"]
+    future = cache.fetches["key"]
+    release.set()
+    future.result(timeout=5)
+
+    assert cache.get("key", fetch) == "fresh"
+    fetch.assert_called_once()
+    assert cache.stats()["stale_hits"] == 2
+
+
+async def test_cache_aget_single_flight():
+    cache = SingleFlightCache("test", ttl=60)
+    release = asyncio.Event()
+    calls = []
+
+    async def fetch():
+        calls.append(1)
+        await release.wait()
+        return "value"
+
+    gets = [asyncio.create_task(cache.aget("key", fetch)) for _ in range(5)]
+    await asyncio.sleep(0)
+    release.set()
+
+    assert await asyncio.gather(*gets) == ["value"] * 5
+    assert len(calls) == 1
+    assert await cache.aget("key", fetch) == "value"
+    assert cache.stats()["hits"] == 1
+
+
+async def test_cache_aget_refresh_in_background():
+    cache = SingleFlightCache(
+        "test", ttl=0.01, max_staleness=60, refresh_in_background=True
+    )
+
+    async def fetch_stale():
+        return "stale"
+
+    async def fetch_fresh():
+        return "fresh"
+
+    await cache.aget("key", fetch_stale)
+    await asyncio.sleep(0.01)
+
+    assert await cache.aget("key", fetch_fresh) == "stale"
+    await asyncio.wrap_future(cache.fetches["key"])
+    assert await cache.aget("key", fetch_fresh) == "fresh"
+
+
+async def test_cache_aget_cancelled_fetch():
+    cache = SingleFlightCache("test", ttl=60)
+    started = asyncio.Event()
+
+    async def fetch():
+        if not started.is_set():
+            started.set()
+            await asyncio.sleep(60)
+        return "value"
+
+    leader = asyncio.create_task(cache.aget("key", fetch))
+    await started.wait()
+    waiter = asyncio.create_task(cache.aget("key", fetch))
+    await asyncio.sleep(0)
+    leader.cancel()
+
+    # the waiter fetches the value itself once the leader is cancelled
+    assert await waiter == "value"
+    with pytest.raises(asyncio.CancelledError):
+        await leader
+
+
+async def test_cache_aget_cancelled_waiter():
+    cache = SingleFlightCache("test", ttl=60)
+    release = asyncio.Event()
+
+    async def fetch():
+        await release.wait()
+        return "value"
+
+    leader = asyncio.create_task(cache.aget("key", fetch))
+    await asyncio.sleep(0)
+    waiter = asyncio.create_task(cache.aget("key", fetch))
+    await asyncio.sleep(0)
+    waiter.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await waiter
+    release.set()
+
+    # cancelling a waiting request doesn't cancel the fetch
+    assert await leader == "value"
+
+
+def encoded_token(exp_in: float = 60) -> str:
+    now = time.time()
+    return jwt.encode(
+        {
+            "iss": "https://example.com/auth",
+            "sub": Keypair.random().public_key,
+            "iat": now,
+            "exp": now + exp_in,
+            "jti": "test",
+        },
+        settings.SERVER_JWT_KEY,
+        algorithm="HS256",
+    )
+
+
+def test_token_cache_hit():
+    cache = TokenCache()
+    encoded_jwt = encoded_token()
+
+    token = cache.get(encoded_jwt)
+
+    assert cache.get(encoded_jwt) is token
+    assert cache.stats() == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_token_cache_expired_token_validated_again():
+    cache = TokenCache()
+    encoded_jwt = encoded_token(exp_in=60)
+    token = cache.get(encoded_jwt)
+
+    with patch("polaris.sep10.cache.time.time", return_value=time.time() + 120):
+        assert cache.get(encoded_jwt) is not token
+    assert cache.stats()["misses"] == 2
+
+
+def test_token_cache_invalid_token_not_cached():
+    cache = TokenCache()
+    encoded_jwt = encoded_token()[:-1]
+
+    for _ in range(2):
+        with pytest.raises(ValueError):
+            cache.get(encoded_jwt)
+    assert cache.stats()["misses"] == 2
+    assert not cache.tokens
+
+
+def test_token_cache_max_size():
+    cache = TokenCache(max_size=2)
+    encoded_jwts = [encoded_token() for _ in range(3)]
+    for encoded_jwt in encoded_jwts:
+        cache.get(encoded_jwt)
+    # the first token was used the least recently
+    cache.get(encoded_jwts[1])
+    cache.get(encoded_jwts[0])
+
+    assert len(cache.tokens) == 2
+    assert cache.stats() == {"hits": 1, "misses": 4, "hit_rate": 0.2}
+
+
+def test_token_cache_disabled():
+    cache = TokenCache(max_size=0)
+    encoded_jwt = encoded_token()
+
+    assert cache.get(encoded_jwt) is not cache.get(encoded_jwt)
+    assert not cache.tokens
@@ -0,0 +1,174 @@
+from typing import List, Optional
+from urllib.parse import urlparse
+
+import pytest
+from stellar_sdk import Keypair, MuxedAccount, Network, TransactionEnvelope
+from stellar_sdk.sep.ed25519_public_key_signer import Ed25519PublicKeySigner
+from stellar_sdk.sep.exceptions import InvalidSep10ChallengeError
+from stellar_sdk.sep.stellar_web_authentication import (
+    build_challenge_transaction,
+    verify_challenge_transaction_signed_by_client_master_key,
+    verify_challenge_transaction_threshold,
+)
+
+from polaris import settings
+from polaris.sep10.challenge import Challenge
+
+SDK_ARGS = dict(
+    server_account_id=settings.SIGNING_KEY,
+    home_domains=settings.SEP10_HOME_DOMAINS,
+    web_auth_domain=urlparse(settings.HOST_URL).netloc,
+    network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+)
+
+
+def signed_challenge(
+    account: str,
+    signers: List[Keypair],
+    client_domain_kp: Optional[Keypair] = None,
+) -> str:
+    challenge_xdr = build_challenge_transaction(
+        server_secret=settings.SIGNING_SEED,
+        client_account_id=account,
+        home_domain=settings.SEP10_HOME_DOMAINS[0],
+        web_auth_domain=urlparse(settings.HOST_URL).netloc,
+        network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+        client_domain="test.com" if client_domain_kp else None,
+        client_signing_key=client_domain_kp.public_key if client_domain_kp else None,
+    )
+    envelope = TransactionEnvelope.from_xdr(
+        challenge_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
+    )
+    for kp in signers:
+        envelope.sign(kp)
+    return envelope.to_xdr()
+
+
+def sdk_error(func, *args, **kwargs) -> Optional[str]:
+    try:
+        func(*args, **kwargs)
+    except InvalidSep10ChallengeError as e:
+        return str(e)
+
+
+def test_challenge_attributes():
+    kp, client_domain_kp = Keypair.random(), Keypair.random()
+    muxed_account = MuxedAccount(kp.public_key, 123)
+    envelope_xdr = signed_challenge(
+        muxed_account.account_muxed, [kp, client_domain_kp], client_domain_kp
+    )
+
+    challenge = Challenge(envelope_xdr)
+
+    assert challenge.client_account_id == muxed_account.account_muxed
+    assert challenge.stellar_account == kp.public_key
+    assert challenge.client_domain == "test.com"
+    assert challenge.client_signing_key == client_domain_kp.public_key
+    assert challenge.hash == challenge.envelope.hash()
+
+
+def test_challenge_invalid():
+    challenge_xdr = build_challenge_transaction(
+        server_secret=Keypair.random().secret,
+        client_account_id=Keypair.random().public_key,
+        home_domain=settings.SEP10_HOME_DOMAINS[0],
+        web_auth_domain=urlparse(settings.HOST_URL).netloc,
+        network_passphrase=Network.TESTNET_NETWORK_PASSPHRASE,
+    )
+
+    with pytest.raises(InvalidSep10ChallengeError):
+        Challenge(challenge_xdr)
+
+
+@pytest.mark.parametrize(
+    "signed_by,signer_weights,threshold,client_domain",
+    [
+        # signed by enough signers
+        ([0, 1], [1, 1], 2, False),
+        ([0], [2, 1], 2, True),
+        # signed by signers below the threshold
+        ([0], [1, 1], 2, False),
+        # signed by no signer of the account
+        ([2], [1, 1], 1, False),
+        # signed by a signer and a key that isn't one
+        ([0, 2], [1, 1], 1, False),
+        # not signed by the client domain signing key
+        ([0], [1, 1], 1, None),
+        # no signers
+        ([0], [], 1, False),
+    ],
+)
+def test_challenge_verify_threshold_matches_sdk(
+    signed_by, signer_weights, threshold, client_domain
+):
+    keypairs = [Keypair.random() for _ in range(3)]
+    client_domain_kp = Keypair.random() if client_domain is not False else None
+    signers = [
+        Ed25519PublicKeySigner(kp.public_key, weight)
+        for kp, weight in zip(keypairs, signer_weights)
+    ]
+    envelope_xdr = signed_challenge(
+        keypairs[0].public_key,
+        [keypairs[i] for i in signed_by]
+        + ([client_domain_kp] if client_domain else []),
+        client_domain_kp,
+    )
+    expected_error = sdk_error(
+        verify_challenge_transaction_threshold,
+        envelope_xdr,
+        threshold=threshold,
+        signers=signers,
+        **SDK_ARGS,
+    )
+
+    challenge = Challenge(envelope_xdr)
+    if expected_error:
+        with pytest.raises(InvalidSep10ChallengeError) as e:
+            challenge.verify_threshold(signers, threshold)
+        assert str(e.value) == expected_error
+    else:
+        assert challenge.verify_threshold(
+            signers, threshold
+        ) == verify_challenge_transaction_threshold(
+            envelope_xdr, threshold=threshold, signers=signers, **SDK_ARGS
+        )
+
+
+@pytest.mark.parametrize("other_signer", [False, True])
+def test_challenge_verify_master_key_matches_sdk(other_signer):
+    kp = Keypair.random()
+    envelope_xdr = signed_challenge(
+        kp.public_key, [kp, Keypair.random()] if other_signer else [kp]
+    )
+    expected_error = sdk_error(
+        verify_challenge_transaction_signed_by_client_master_key,
+        envelope_xdr,
+        **SDK_ARGS,
+    )
+
+    challenge = Challenge(envelope_xdr)
+    if expected_error:
+        with pytest.raises(InvalidSep10ChallengeError) as e:
+            challenge.verify_master_key()
+        assert str(e.value) == expected_error
+    else:
+        challenge.verify_master_key()
+
+
+def test_challenge_signatures_verified_once(monkeypatch):
+    kp = Keypair.random()
+    envelope_xdr = signed_challenge(kp.public_key, [kp])
+    challenge = Challenge(envelope_xdr)
+    verify_calls = []
+    original_verify = Keypair.verify
+
+    def verify(self, data, signature):
+        verify_calls.append(self.public_key)
+        return original_verify(self, data, signature)
+
+    monkeypatch.setattr(Keypair, "verify", verify)
+    signers = [Ed25519PublicKeySigner(kp.public_key, 1)]
+    for _ in range(2):
+        challenge.verify_threshold(signers, 1)
+
+    assert sorted(verify_calls) == sorted([kp.public_key, settings.SIGNING_KEY])
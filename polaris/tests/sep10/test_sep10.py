@@ -1,9 +1,12 @@
 import os
+import asyncio
 import jwt
 import json
 import base64
+import pytest
+from functools import partial
 from urllib.parse import urlparse
-from unittest.mock import patch, Mock, MagicMock
+from unittest.mock import patch, AsyncMock, Mock, MagicMock
 from toml.decoder import TomlDecodeError
 
 from stellar_sdk import (
@@ -19,17 +22,30 @@ from stellar_sdk.sep.ed25519_public_key_signer import Ed25519PublicKeySigner
 from stellar_sdk.exceptions import ConnectionError, NotFoundError
 from stellar_sdk.sep.exceptions import StellarTomlNotFoundError
 from stellar_sdk.client.requests_client import RequestsClient
+from django.test import AsyncRequestFactory
 from stellar_sdk.sep.stellar_web_authentication import (
     read_challenge_transaction,
     build_challenge_transaction,
 )
 
 from polaris import settings
+from polaris.sep10.views import (
+    AsyncSEP10Auth,
+    SEP10Auth,
+    client_domain_cache,
+    signers_cache,
+)
 
 AUTH_PATH = "/auth"
 test_module = "polaris.sep10.views"
 
 
+@pytest.fixture(autouse=True)
+def clear_client_domain_cache():
+    yield
+    client_domain_cache.clear()
+
+
 def test_get_success(client):
     kp = Keypair.random()
     response = client.get(AUTH_PATH, {"account": kp.public_key})
@@ -457,6 +473,38 @@ def test_get_client_attribution_invalid_signing_key(mock_fetch_stellar_toml, cli
     assert content["error"] == "invalid SIGNING_KEY value on 'client_domain' TOML"
 
 
+@patch(f"{test_module}.fetch_stellar_toml")
+def test_get_client_attribution_signing_key_cached(mock_fetch_stellar_toml, client):
+    client_domain_kp = Keypair.random()
+    mock_fetch_stellar_toml.return_value = {"SIGNING_KEY": client_domain_kp.public_key}
+
+    for _ in range(2):
+        response = client.get(
+            AUTH_PATH,
+            {"account": Keypair.random().public_key, "client_domain": "test.com"},
+        )
+        assert response.status_code == 200, response.content
+
+    mock_fetch_stellar_toml.assert_called_once()
+
+
+@patch(f"{test_module}.fetch_stellar_toml")
+def test_get_client_attribution_error_cached(mock_fetch_stellar_toml, client):
+    mock_fetch_stellar_toml.side_effect = ConnectionError()
+
+    for _ in range(2):
+        response = client.get(
+            AUTH_PATH,
+            {"account": Keypair.random().public_key, "client_domain": "test.com"},
+        )
+        assert response.status_code == 400, response.content
+        assert response.json() == {
+            "error": "unable to fetch 'client_domain' SIGNING_KEY"
+        }
+
+    mock_fetch_stellar_toml.assert_called_once()
+
+
 @patch(f"{test_module}.settings.HORIZON_SERVER.load_account")
 def test_post_success_account_exists(mock_load_account, client):
     kp = Keypair.random()
@@ -888,3 +936,175 @@ def test_post_fails_account_doesnt_exist_no_client_attribution_signature(
         content["error"] == "error while validating challenge: "
         "Transaction not signed by the source account of the 'client_domain' ManageData operation"
     )
+
+
+def signed_challenge(kp):
+    challenge_xdr = build_challenge_transaction(
+        server_secret=settings.SIGNING_SEED,
+        client_account_id=kp.public_key,
+        home_domain=settings.SEP10_HOME_DOMAINS[0],
+        web_auth_domain=urlparse(settings.HOST_URL).netloc,
+        network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+    )
+    envelope = TransactionEnvelope.from_xdr(
+        challenge_xdr, network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE
+    )
+    envelope.sign(kp)
+    return envelope.to_xdr()
+
+
+def mock_account(signer_keys, threshold=1):
+    return Mock(
+        load_ed25519_public_key_signers=Mock(
+            return_value=[Ed25519PublicKeySigner(key, 1) for key in signer_keys]
+        ),
+        thresholds=Mock(med_threshold=threshold),
+    )
+
+
+@patch(f"{test_module}.settings.HORIZON_SERVER.load_account")
+def test_post_account_signers_cached(mock_load_account, client):
+    kp = Keypair.random()
+    mock_load_account.return_value = mock_account([kp.public_key])
+
+    for _ in range(2):
+        response = client.post(AUTH_PATH, {"transaction": signed_challenge(kp)})
+        assert response.status_code == 200, response.content
+
+    mock_load_account.assert_called_once_with(kp.public_key)
+
+
+@patch(f"{test_module}.settings.HORIZON_SERVER.load_account")
+def test_post_outdated_account_signers_fetched_again(mock_load_account, client):
+    kp, old_signer = Keypair.random(), Keypair.random()
+    mock_load_account.side_effect = [
+        mock_account([old_signer.public_key]),
+        mock_account([old_signer.public_key, kp.public_key]),
+    ]
+    signers_cache.get(kp.public_key, partial(SEP10Auth._load_signers, kp.public_key))
+
+    response = client.post(AUTH_PATH, {"transaction": signed_challenge(kp)})
+
+    assert response.status_code == 200, response.content
+    assert mock_load_account.call_count == 2
+
+
+@patch(f"{test_module}.settings.HORIZON_SERVER.load_account")
+def test_post_invalid_signers_fetched_once(mock_load_account, client):
+    kp = Keypair.random()
+    mock_load_account.return_value = mock_account([Keypair.random().public_key])
+
+    response = client.post(AUTH_PATH, {"transaction": signed_challenge(kp)})
+
+    assert response.status_code == 400, response.content
+    mock_load_account.assert_called_once()
+
+
+async_view = AsyncSEP10Auth.as_view()
+
+
+def test_async_view_is_async():
+    assert AsyncSEP10Auth.view_is_async
+    assert not SEP10Auth.view_is_async
+
+
+async def test_async_get_success():
+    kp = Keypair.random()
+    response = await async_view(
+        AsyncRequestFactory().get(AUTH_PATH, {"account": kp.public_key})
+    )
+
+    assert response.status_code == 200, response.data
+    challenge = read_challenge_transaction(
+        challenge_transaction=response.data["transaction"],
+        server_account_id=settings.SIGNING_KEY,
+        home_domains=urlparse(settings.HOST_URL).netloc,
+        web_auth_domain=urlparse(settings.HOST_URL).netloc,
+        network_passphrase=settings.STELLAR_NETWORK_PASSPHRASE,
+    )
+    assert challenge.client_account_id == kp.public_key
+
+
+@patch(f"{test_module}.fetch_stellar_toml_async", new_callable=AsyncMock)
+async def test_async_get_success_client_attribution(mock_fetch_stellar_toml):
+    client_domain_kp = Keypair.random()
+    mock_fetch_stellar_toml.return_value = {"SIGNING_KEY": client_domain_kp.public_key}
+    request = AsyncRequestFactory().get(
+        AUTH_PATH, {"account": Keypair.random().public_key, "client_domain": "test.com"}
+    )
+
+    response = await async_view(request)
+
+    assert response.status_code == 200, response.data
+    mock_fetch_stellar_toml.assert_awaited_once()
+    assert mock_fetch_stellar_toml.call_args[0] == ("test.com",)
+    envelope = TransactionEnvelope.from_xdr(
+        response.data["transaction"], settings.STELLAR_NETWORK_PASSPHRASE
+    )
+    client_domain_op = envelope.transaction.operations[-1]
+    assert client_domain_op.data_name == "client_domain"
+    assert client_domain_op.source.account_id == client_domain_kp.public_key
+
+
+@patch(f"{test_module}.fetch_stellar_toml_async", new_callable=AsyncMock)
+async def test_async_get_client_attribution_timeout(mock_fetch_stellar_toml):
+    mock_fetch_stellar_toml.side_effect = asyncio.TimeoutError()
+    request = AsyncRequestFactory().get(
+        AUTH_PATH, {"account": Keypair.random().public_key, "client_domain": "test.com"}
+    )
+
+    response = await async_view(request)
+
+    assert response.status_code == 400
+    assert response.data == {"error": "unable to fetch 'client_domain' SIGNING_KEY"}
+
+
+@patch(f"{test_module}.get_horizon_server_async")
+async def test_async_post_success_account_exists(mock_get_server):
+    kp = Keypair.random()
+    mock_get_server.return_value.load_account = AsyncMock(
+        return_value=mock_account([kp.public_key])
+    )
+    request = AsyncRequestFactory().post(
+        AUTH_PATH, {"transaction": signed_challenge(kp)}
+    )
+
+    response = await async_view(request)
+
+    assert response.status_code == 200, response.data
+    mock_get_server.return_value.load_account.assert_awaited_once_with(kp.public_key)
+    jwt_contents = jwt.decode(
+        response.data["token"], settings.SERVER_JWT_KEY, algorithms=["HS256"]
+    )
+    assert jwt_contents["sub"] == kp.public_key
+
+
+@patch(f"{test_module}.get_horizon_server_async")
+async def test_async_post_success_account_doesnt_exist(mock_get_server):
+    kp = Keypair.random()
+    mock_get_server.return_value.load_account = AsyncMock(
+        side_effect=NotFoundError(MagicMock())
+    )
+    request = AsyncRequestFactory().post(
+        AUTH_PATH, {"transaction": signed_challenge(kp)}
+    )
+
+    response = await async_view(request)
+
+    assert response.status_code == 200, response.data
+
+
+@patch(f"{test_module}.get_horizon_server_async")
+async def test_async_post_invalid_signers(mock_get_server):
+    kp = Keypair.random()
+    mock_get_server.return_value.load_account = AsyncMock(
+        return_value=mock_account([Keypair.random().public_key])
+    )
+    request = AsyncRequestFactory().post(
+        AUTH_PATH, {"transaction": signed_challenge(kp)}
+    )
+
+    response = await async_view(request)
+
+    assert response.status_code == 400
+    assert response.data["error"].startswith("error while validating challenge")
@@ -3,7 +3,7 @@ This module tests the `/deposit` endpoint.
 Celery tasks are called synchronously. Horizon calls are mocked for speed and correctness.
 """
 import json
-from unittest.mock import patch, Mock
+from unittest.mock import patch, AsyncMock, Mock
 from urllib.parse import quote_plus
 
 import jwt
@@ -11,11 +11,14 @@ import time
 
 
 import pytest
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory
 from stellar_sdk import Keypair, MuxedAccount
 
 from polaris import settings
 from polaris.models import Transaction, Asset
 from polaris.integrations import TransactionForm
+from polaris.sep24.deposit import AsyncDeposit
 from polaris.tests.helpers import (
     mock_check_auth_success,
     mock_check_auth_success_client_domain,
@@ -840,3 +843,72 @@ def test_deposit_client_domain_saved(client):
     assert Transaction.objects.count() == 1
     transaction = Transaction.objects.first()
     assert transaction.client_domain == "test.com"
+
+
+async_deposit = AsyncDeposit.as_view()
+
+
+def test_async_deposit_view_is_async():
+    assert AsyncDeposit.view_is_async
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("polaris.sep24.deposit.get_account_obj", Mock(side_effect=AssertionError()))
+@patch("polaris.sep24.deposit.rci", Mock(account_creation_supported=False))
+@patch("polaris.sep24.deposit.get_horizon_server_async")
+@patch("polaris.sep24.deposit.get_account_obj_async", new_callable=AsyncMock)
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+async def test_async_deposit_loads_account_from_horizon(
+    mock_get_account_obj_async, mock_get_server
+):
+    await sync_to_async(Asset.objects.create)(
+        code="USD",
+        issuer=Keypair.random().public_key,
+        sep24_enabled=True,
+        deposit_enabled=True,
+    )
+    account = Keypair.random().public_key
+    response = await async_deposit(
+        AsyncRequestFactory().post(
+            DEPOSIT_PATH, {"asset_code": "USD", "account": account}
+        )
+    )
+
+    assert response.status_code == 200, response.data
+    assert response.data["type"] == "interactive_customer_info_needed"
+    mock_get_account_obj_async.assert_awaited_once()
+    kp, server = mock_get_account_obj_async.await_args.args
+    assert kp.public_key == account
+    assert server is mock_get_server.return_value
+    t = await sync_to_async(Transaction.objects.get)()
+    assert t.to_address == account
+    assert t.status == Transaction.STATUS.incomplete
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("polaris.sep24.deposit.rci", Mock(account_creation_supported=False))
+@patch("polaris.sep24.deposit.get_horizon_server_async", Mock())
+@patch(
+    "polaris.sep24.deposit.get_account_obj_async",
+    AsyncMock(side_effect=RuntimeError()),
+)
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+async def test_async_deposit_unfunded_account():
+    await sync_to_async(Asset.objects.create)(
+        code="USD",
+        issuer=Keypair.random().public_key,
+        sep24_enabled=True,
+        deposit_enabled=True,
+    )
+    response = await async_deposit(
+        AsyncRequestFactory().post(
+            DEPOSIT_PATH,
+            {"asset_code": "USD", "account": Keypair.random().public_key},
+        )
+    )
+
+    assert response.status_code == 400
+    assert response.data == {
+        "error": "public key 'account' must be a funded Stellar account"
+    }
+    assert not await sync_to_async(Transaction.objects.exists)()
@@ -58,3 +58,32 @@ def test_info_endpoint(client, usd_asset_factory, eth_asset_factory):
     expected_response = json.loads(_get_expected_response())
     assert content == expected_response
     assert response.status_code == 200
+
+
+@pytest.mark.django_db
+def test_info_endpoint_conditional_request(client, usd_asset_factory):
+    usd_asset_factory()
+
+    response = client.get(f"/sep24/info")
+    etag = response.headers["ETag"]
+    assert response.headers["Cache-Control"] == "no-cache"
+
+    response = client.get(f"/sep24/info", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 304
+    assert not response.content
+    assert response.headers["ETag"] == etag
+
+
+@pytest.mark.django_db
+def test_info_endpoint_cache_invalidated_on_asset_save(client, usd_asset_factory):
+    usd = usd_asset_factory()
+    response = client.get(f"/sep24/info")
+    etag = response.headers["ETag"]
+
+    usd.deposit_fee_fixed = 10
+    usd.save()
+
+    response = client.get(f"/sep24/info", HTTP_IF_NONE_MATCH=etag)
+    assert response.status_code == 200
+    assert response.headers["ETag"] != etag
+    assert json.loads(response.content)["deposit"]["USD"]["fee_fixed"] == 10.0
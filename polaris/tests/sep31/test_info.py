@@ -61,6 +61,23 @@ def test_success_response(client, usd_asset_factory):
     assert body == {"receive": {asset.code: {}}}
 
 
+@pytest.mark.django_db
+def test_unsupported_lang_responses_not_cached(client, usd_asset_factory):
+    usd_asset_factory(protocols=[Transaction.PROTOCOL.sep31])
+    integration = Mock(info=Mock(side_effect=ValueError()))
+
+    with patch(
+        "polaris.sep31.info.registered_sep31_receiver_integration", integration
+    ):
+        responses = [client.get(endpoint + "?lang=xx") for _ in range(2)]
+        integration.info.side_effect = None
+        integration.info.return_value = success_info_response.info()
+        responses += [client.get(endpoint + "?lang=en") for _ in range(2)]
+
+    assert [r.status_code for r in responses] == [400, 400, 200, 200]
+    assert integration.info.call_count == 3
+
+
 ###
 # test validate_info_response
 ###
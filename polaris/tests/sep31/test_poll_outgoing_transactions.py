@@ -1,11 +1,12 @@
+import asyncio
 import pytest
-from datetime import datetime
+from datetime import datetime, timedelta, timezone
 from unittest.mock import Mock, patch
 
+from polaris.integrations import RailsIntegration
 from polaris.models import Transaction
 from polaris.management.commands.poll_outgoing_transactions import Command
 
-
 mock_return_passed_transactions = Mock(poll_outgoing_transactions=lambda x: list(x))
 
 
@@ -57,3 +58,167 @@ def test_bad_integration_return_value(acc1_usd_deposit_transaction_factory):
     transaction.refresh_from_db()
     assert transaction.status == Transaction.STATUS.pending_external
     assert not transaction.completed_at
+
+
+@pytest.mark.django_db
+@patch("polaris.management.commands.poll_outgoing_transactions.rri")
+def test_incomplete_transaction_not_polled_until_due(
+    mock_rri, acc1_usd_deposit_transaction_factory
+):
+    mock_rri.poll_outgoing_transactions.return_value = []
+    transaction = acc1_usd_deposit_transaction_factory(
+        protocol=Transaction.PROTOCOL.sep31
+    )
+    transaction.status = Transaction.STATUS.pending_external
+    transaction.save()
+    transaction.poll_started_at = datetime.now(timezone.utc) - timedelta(hours=10)
+    transaction.save()
+    before = datetime.now(timezone.utc)
+    Command.poll_outgoing_transactions(
+        min_poll_interval=30, max_poll_interval=86400, backoff_factor=0.1
+    )
+    transaction.refresh_from_db()
+    assert transaction.status == Transaction.STATUS.pending_external
+    # 10% of the 10 hours the transaction has been polled for
+    assert (transaction.next_poll_at - before).total_seconds() == pytest.approx(
+        3600, abs=5
+    )
+
+    Command.poll_outgoing_transactions()
+    mock_rri.poll_outgoing_transactions.assert_called_once()
+
+    transaction.next_poll_at = datetime.now(timezone.utc) - timedelta(seconds=1)
+    transaction.save()
+    Command.poll_outgoing_transactions()
+    assert mock_rri.poll_outgoing_transactions.call_count == 2
+
+
+@pytest.mark.django_db
+@patch(
+    "polaris.management.commands.poll_outgoing_transactions.rri",
+    Mock(poll_outgoing_transactions=Mock(return_value=[])),
+)
+def test_poll_interval_bounds(acc1_usd_deposit_transaction_factory):
+    new, old = [
+        acc1_usd_deposit_transaction_factory(protocol=Transaction.PROTOCOL.sep31)
+        for _ in range(2)
+    ]
+    new.status = old.status = Transaction.STATUS.pending_external
+    new.save()
+    old.save()
+    old.poll_started_at = datetime.now(timezone.utc) - timedelta(days=30)
+    old.save()
+    before = datetime.now(timezone.utc)
+    Command.poll_outgoing_transactions(
+        min_poll_interval=30, max_poll_interval=600, backoff_factor=0.1
+    )
+    new.refresh_from_db()
+    old.refresh_from_db()
+    assert (new.next_poll_at - before).total_seconds() == pytest.approx(30, abs=5)
+    assert (old.next_poll_at - before).total_seconds() == pytest.approx(600, abs=5)
+
+
+@pytest.mark.django_db
+@patch(
+    "polaris.management.commands.poll_outgoing_transactions.rri",
+    Mock(poll_outgoing_transactions=Mock(return_value=[])),
+)
+def test_backoff_starts_when_transaction_reaches_pending_external(
+    acc1_usd_deposit_transaction_factory,
+):
+    transaction = acc1_usd_deposit_transaction_factory(
+        protocol=Transaction.PROTOCOL.sep31
+    )
+    transaction.started_at = datetime.now(timezone.utc) - timedelta(hours=10)
+    transaction.save()
+    transaction = Transaction.objects.get(id=transaction.id)
+    transaction.status = Transaction.STATUS.pending_external
+    transaction.save()
+    before = datetime.now(timezone.utc)
+    Command.poll_outgoing_transactions(
+        min_poll_interval=30, max_poll_interval=86400, backoff_factor=0.1
+    )
+    transaction.refresh_from_db()
+    assert transaction.poll_started_at >= before
+    assert (transaction.next_poll_at - before).total_seconds() == pytest.approx(
+        30, abs=5
+    )
+
+
+@pytest.mark.django_db
+def test_status_change_clears_next_poll(acc1_usd_deposit_transaction_factory):
+    transaction = acc1_usd_deposit_transaction_factory(
+        protocol=Transaction.PROTOCOL.sep31
+    )
+    transaction.status = Transaction.STATUS.pending_external
+    transaction.save()
+    transaction = Transaction.objects.get(id=transaction.id)
+    transaction.poll_started_at = datetime.now(timezone.utc) - timedelta(hours=10)
+    transaction.next_poll_at = datetime.now(timezone.utc) + timedelta(hours=1)
+    transaction.save()
+    transaction.status = Transaction.STATUS.completed
+    transaction.save(update_fields=["status"])
+    transaction.refresh_from_db()
+    assert transaction.next_poll_at is None
+    assert transaction.poll_started_at is None
+
+
+@pytest.mark.django_db
+def test_polls_in_chunks(acc1_usd_deposit_transaction_factory):
+    transactions = [
+        acc1_usd_deposit_transaction_factory(protocol=Transaction.PROTOCOL.sep31)
+        for _ in range(5)
+    ]
+    for t in transactions:
+        t.status = Transaction.STATUS.pending_external
+        t.save()
+    chunk_sizes = []
+
+    def poll(chunk):
+        chunk_sizes.append(chunk.count())
+        return list(chunk)
+
+    with patch(
+        "polaris.management.commands.poll_outgoing_transactions.rri",
+        Mock(poll_outgoing_transactions=poll),
+    ):
+        Command.poll_outgoing_transactions(chunk_size=2)
+    assert chunk_sizes == [2, 2, 1]
+    assert Transaction.objects.filter(
+        status=Transaction.STATUS.completed
+    ).count() == len(transactions)
+
+
+class AsyncRailsIntegration(RailsIntegration):
+    def __init__(self):
+        self.chunks = []
+
+    async def apoll_outgoing_transactions(self, transactions, *args, **kwargs):
+        self.chunks.append(transactions)
+        await asyncio.sleep(0)
+        return transactions[:1]
+
+
+@pytest.mark.django_db(transaction=True)
+def test_async_hook_awaited_per_chunk(acc1_usd_deposit_transaction_factory):
+    transactions = [
+        acc1_usd_deposit_transaction_factory(protocol=Transaction.PROTOCOL.sep31)
+        for _ in range(4)
+    ]
+    for t in transactions:
+        t.status = Transaction.STATUS.pending_external
+        t.save()
+    rails = AsyncRailsIntegration()
+
+    with patch("polaris.management.commands.poll_outgoing_transactions.rri", rails):
+        Command.poll_outgoing_transactions(chunk_size=2, concurrency=2)
+
+    assert [len(chunk) for chunk in rails.chunks] == [2, 2]
+    assert all(isinstance(t, Transaction) for t in rails.chunks[0])
+    assert Transaction.objects.filter(status=Transaction.STATUS.completed).count() == 2
+    assert (
+        Transaction.objects.filter(
+            status=Transaction.STATUS.pending_external, next_poll_at__isnull=False
+        ).count()
+        == 2
+    )
@@ -4,9 +4,11 @@ from decimal import Decimal
 
 import pytest
 import json
-from unittest.mock import patch, Mock
+from unittest.mock import patch, AsyncMock, Mock
 from typing import Dict
 
+from asgiref.sync import sync_to_async
+from django.test import AsyncRequestFactory
 from django.utils.translation.trans_real import get_languages, reset_cache
 from stellar_sdk import Keypair, MuxedAccount
 from rest_framework.request import Request
@@ -21,6 +23,7 @@ from polaris.tests.helpers import (
     TEST_MUXED_ACCOUNT,
 )
 from polaris.integrations import DepositIntegration
+from polaris.sep6.deposit import AsyncDeposit
 from polaris.sep10.token import SEP10Token
 
 DEPOSIT_PATH = "/sep6/deposit"
@@ -1714,3 +1717,72 @@ def test_deposit_no_offchain_asset_indicative_quote(mock_process_sep6_request, c
     content = response.json()
     assert response.status_code == 400, content
     assert content == {"error": "invalid 'source_asset'"}
+
+
+async_deposit = AsyncDeposit.as_view()
+
+
+def test_async_deposit_view_is_async():
+    assert AsyncDeposit.view_is_async
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("polaris.sep6.deposit.get_account_obj", Mock(side_effect=AssertionError()))
+@patch("polaris.sep6.deposit.rci", Mock(account_creation_supported=False))
+@patch("polaris.sep6.deposit.get_horizon_server_async")
+@patch("polaris.sep6.deposit.get_account_obj_async", new_callable=AsyncMock)
+@patch("polaris.sep6.deposit.rdi.process_sep6_request")
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+async def test_async_deposit_loads_account_from_horizon(
+    mock_process_sep6_request, mock_get_account_obj_async, mock_get_server
+):
+    await sync_to_async(Asset.objects.create)(
+        code="USD",
+        issuer=Keypair.random().public_key,
+        sep6_enabled=True,
+        deposit_enabled=True,
+    )
+    mock_process_sep6_request.return_value = {"how": "test"}
+    account = Keypair.random().public_key
+    response = await async_deposit(
+        AsyncRequestFactory().get(
+            DEPOSIT_PATH, {"asset_code": "USD", "account": account}
+        )
+    )
+
+    assert response.status_code == 200, response.data
+    mock_get_account_obj_async.assert_awaited_once()
+    kp, server = mock_get_account_obj_async.await_args.args
+    assert kp.public_key == account
+    assert server is mock_get_server.return_value
+    assert await sync_to_async(Transaction.objects.count)() == 1
+
+
+@pytest.mark.django_db(transaction=True)
+@patch("polaris.sep6.deposit.rci", Mock(account_creation_supported=False))
+@patch("polaris.sep6.deposit.get_horizon_server_async", Mock())
+@patch(
+    "polaris.sep6.deposit.get_account_obj_async",
+    AsyncMock(side_effect=RuntimeError()),
+)
+@patch("polaris.sep6.deposit.rdi.process_sep6_request")
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+async def test_async_deposit_unfunded_account(mock_process_sep6_request):
+    await sync_to_async(Asset.objects.create)(
+        code="USD",
+        issuer=Keypair.random().public_key,
+        sep6_enabled=True,
+        deposit_enabled=True,
+    )
+    response = await async_deposit(
+        AsyncRequestFactory().get(
+            DEPOSIT_PATH,
+            {"asset_code": "USD", "account": Keypair.random().public_key},
+        )
+    )
+
+    assert response.status_code == 400
+    assert response.data == {
+        "error": "public key 'account' must be a funded Stellar account"
+    }
+    mock_process_sep6_request.assert_not_called()
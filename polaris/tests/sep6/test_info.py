@@ -1,7 +1,8 @@
 import pytest
 import json
-from unittest.mock import patch
+from unittest.mock import patch, Mock
 
+from polaris.integrations import uncacheable
 from polaris.models import Transaction
 
 
@@ -240,3 +241,29 @@ def test_unsupported_lang(client, usd_asset_factory):
     response = client.get(INFO_PATH + "?lang=es")
     assert response.status_code == 200, response.content
     assert response.headers.get("Content-Language") == "en"
+
+
+@pytest.mark.django_db
+def test_info_integration_results_cached(client, usd_asset_factory):
+    usd_asset_factory(protocols=[Transaction.PROTOCOL.sep6])
+    info_integration = Mock(side_effect=good_info_integration)
+
+    with patch("polaris.sep6.info.registered_info_func", info_integration):
+        first, second = client.get(INFO_PATH), client.get(INFO_PATH)
+        client.get(INFO_PATH + "?lang=en")
+
+    assert first.content == second.content
+    assert first.headers["ETag"] == second.headers["ETag"]
+    info_integration.assert_called_once()
+
+
+@pytest.mark.django_db
+def test_uncacheable_info_integration(client, usd_asset_factory):
+    usd_asset_factory(protocols=[Transaction.PROTOCOL.sep6])
+    info_integration = uncacheable(Mock(side_effect=good_info_integration))
+
+    with patch("polaris.sep6.info.registered_info_func", info_integration):
+        responses = [client.get(INFO_PATH), client.get(INFO_PATH)]
+
+    assert info_integration.call_count == 2
+    assert all("ETag" not in response.headers for response in responses)
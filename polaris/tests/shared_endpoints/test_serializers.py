@@ -0,0 +1,110 @@
+import datetime
+import itertools
+from decimal import Decimal
+from unittest.mock import patch
+
+import pytest
+from django.utils import translation
+from rest_framework.renderers import JSONRenderer
+from stellar_sdk import Keypair
+
+from polaris.models import Asset, Quote, Transaction
+from polaris.shared.serializers import (
+    TransactionSerializer,
+    TransactionValuesSerializer,
+)
+
+AMOUNTS = [
+    None,
+    Decimal("0"),
+    Decimal("0.0000005"),
+    Decimal("0.0000015"),
+    Decimal("1.005"),
+    Decimal("123456.1234567"),
+]
+
+
+def create_transactions():
+    assets = [
+        Asset.objects.create(
+            code="USD",
+            issuer=Keypair.random().public_key,
+            significant_decimals=significant_decimals,
+        )
+        for significant_decimals in [0, 2, 7]
+    ]
+    started_at = datetime.datetime(2022, 1, 1, tzinfo=datetime.timezone.utc)
+    transactions = []
+    for i, (kind, protocol, status, quote_fee_asset) in enumerate(
+        itertools.product(
+            list(Transaction.KIND),
+            [Transaction.PROTOCOL.sep6, Transaction.PROTOCOL.sep24],
+            [Transaction.STATUS.completed, Transaction.STATUS.pending_user],
+            [False, None, "stellar:USD"],
+        )
+    ):
+        asset = assets[i % len(assets)]
+        quote = None
+        if quote_fee_asset is not False:
+            quote = Quote.objects.create(
+                stellar_account="test source address",
+                type=Quote.TYPE.firm,
+                sell_asset=f"stellar:{asset.code}:{asset.issuer}",
+                buy_asset="iso4217:BRL",
+                sell_amount=100,
+            )
+        transactions.append(
+            Transaction(
+                stellar_account="test source address",
+                asset=asset,
+                quote=quote,
+                kind=kind,
+                status=status,
+                status_eta=i if i % 2 else None,
+                amount_in=AMOUNTS[i % len(AMOUNTS)],
+                amount_out=AMOUNTS[(i + 1) % len(AMOUNTS)],
+                amount_fee=AMOUNTS[(i + 2) % len(AMOUNTS)],
+                fee_asset=quote_fee_asset or None,
+                started_at=started_at + datetime.timedelta(microseconds=i * 1001),
+                completed_at=(
+                    started_at + datetime.timedelta(hours=i)
+                    if status == Transaction.STATUS.completed
+                    else None
+                ),
+                stellar_transaction_id=f"{i:064x}" if i % 3 else None,
+                external_transaction_id=str(i) if i % 4 else None,
+                from_address=Keypair.random().public_key if i % 2 else None,
+                to_address=Keypair.random().public_key,
+                receiving_anchor_account=Keypair.random().public_key,
+                memo=str(i) if i % 3 else None,
+                memo_type=Transaction.MEMO_TYPES.id,
+                more_info_url=f"https://example.com/more_info?id={i}",
+                refunded=bool(i % 5 == 0),
+                claimable_balance_id=f"{i:072x}" if i % 2 else None,
+                protocol=protocol,
+            )
+        )
+    Transaction.objects.bulk_create(transactions)
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize(
+    "use_more_info_url,lang", [(False, "en"), (True, "en"), (False, "pt")]
+)
+def test_values_serializer_matches_transaction_serializer(use_more_info_url, lang):
+    create_transactions()
+    qset = Transaction.objects.order_by("-started_at", "-id")
+    renderer = JSONRenderer()
+
+    with patch(
+        "polaris.shared.serializers.settings.SEP6_USE_MORE_INFO_URL",
+        use_more_info_url,
+    ), translation.override(lang):
+        expected = renderer.render(TransactionSerializer(qset, many=True).data)
+        rendered = renderer.render(
+            TransactionValuesSerializer.serialize(
+                qset.values(*TransactionValuesSerializer.fields)
+            )
+        )
+
+    assert rendered == expected
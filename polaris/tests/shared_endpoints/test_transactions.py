@@ -1,9 +1,15 @@
 """This module tests the `/transactions` endpoint."""
+import datetime
 import json
 import urllib
 from unittest.mock import patch
 
 import pytest
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from stellar_sdk import Keypair
+
+from polaris.models import Asset, Quote, Transaction
 from polaris.tests.helpers import (
     mock_check_auth_success,
     sep10,
@@ -241,6 +247,75 @@ def test_paging_id(
     assert content.get("transactions")[0]["kind"] == "deposit"
 
 
+@pytest.mark.django_db
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+def test_paging_id_same_started_at(client, acc2_eth_deposit_transaction_factory):
+    """Paging through transactions started at the same time returns each once."""
+    transactions = [
+        acc2_eth_deposit_transaction_factory("test source address") for _ in range(5)
+    ]
+    Transaction.objects.filter(id__in=[t.id for t in transactions]).update(
+        started_at=transactions[0].started_at
+    )
+
+    ids = []
+    paging_id = ""
+    for _ in range(len(transactions)):
+        response = client.get(
+            (
+                f"{endpoint}?asset_code={transactions[0].asset.code}"
+                f"&limit=2&paging_id={paging_id}"
+            ),
+            follow=True,
+        )
+        content = json.loads(response.content)
+        assert response.status_code == 200
+        if not content["transactions"]:
+            break
+        ids.extend(t["id"] for t in content["transactions"])
+        paging_id = ids[-1]
+
+    assert sorted(ids) == sorted(str(t.id) for t in transactions)
+
+
+@pytest.mark.django_db
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+def test_invalid_paging_id(
+    client,
+    acc2_eth_deposit_transaction_factory,
+    acc2_eth_withdrawal_transaction_factory,
+):
+    """Fails if the `paging_id` isn't a transaction of the account."""
+    deposit = acc2_eth_deposit_transaction_factory("test source address")
+    withdrawal = acc2_eth_withdrawal_transaction_factory(client_address)
+
+    for paging_id in [withdrawal.id, "not-a-uuid"]:
+        response = client.get(
+            f"{endpoint}?asset_code={deposit.asset.code}&paging_id={paging_id}",
+            follow=True,
+        )
+        assert response.status_code == 400
+        assert json.loads(response.content) == {"error": "invalid paging_id"}
+
+
+@pytest.mark.django_db
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+@patch("polaris.shared.endpoints.polaris_settings.MAX_TRANSACTIONS_PAGE_SIZE", 2)
+def test_max_page_size(client, acc2_eth_deposit_transaction_factory):
+    """At most `MAX_TRANSACTIONS_PAGE_SIZE` transactions are returned."""
+    deposit = acc2_eth_deposit_transaction_factory("test source address")
+    for _ in range(2):
+        acc2_eth_deposit_transaction_factory("test source address")
+
+    for query in ["", "&limit=3"]:
+        response = client.get(
+            f"{endpoint}?asset_code={deposit.asset.code}{query}", follow=True
+        )
+        content = json.loads(response.content)
+        assert response.status_code == 200
+        assert len(content["transactions"]) == 2
+
+
 @pytest.mark.django_db
 def test_kind_filter(
     client,
@@ -442,3 +517,66 @@ def test_transactions_no_jwt(client, acc2_eth_withdrawal_transaction_factory):
     content = json.loads(response.content)
     assert response.status_code == 403
     assert content == {"error": "JWT must be passed as 'Authorization' header"}
+
+
+@pytest.mark.django_db
+@pytest.mark.parametrize("protocol", ["sep6", "sep24"])
+@patch("polaris.sep10.utils.check_auth", mock_check_auth_success)
+@patch("polaris.shared.endpoints.polaris_settings.MAX_TRANSACTIONS_PAGE_SIZE", 500)
+def test_transactions_query_count(client, protocol):
+    """The number of queries made doesn't depend on the number of transactions."""
+    assets = [
+        Asset.objects.create(
+            code="USD",
+            issuer=Keypair.random().public_key,
+            significant_decimals=significant_decimals,
+            sep6_enabled=True,
+            sep24_enabled=True,
+        )
+        for significant_decimals in [2, 7]
+    ]
+    started_at = datetime.datetime.now(datetime.timezone.utc)
+    transactions = []
+    for i in range(500):
+        asset = assets[i % 2]
+        quote = None
+        if i % 3 == 0:
+            quote = Quote.objects.create(
+                stellar_account="test source address",
+                type=Quote.TYPE.firm,
+                sell_asset=f"stellar:{asset.code}:{asset.issuer}",
+                buy_asset="iso4217:BRL",
+                sell_amount=100,
+            )
+        transactions.append(
+            Transaction(
+                stellar_account="test source address",
+                asset=asset,
+                quote=quote,
+                kind=Transaction.KIND.deposit if i % 2 else Transaction.KIND.withdrawal,
+                status=Transaction.STATUS.completed,
+                amount_in=100,
+                amount_out=98,
+                amount_fee=2,
+                fee_asset=f"stellar:{asset.code}:{asset.issuer}" if quote else None,
+                protocol=protocol,
+                started_at=started_at - datetime.timedelta(seconds=i),
+            )
+        )
+    Transaction.objects.bulk_create(transactions)
+
+    with CaptureQueriesContext(connection) as queries:
+        response = client.get(
+            f"/{protocol}/transactions",
+            {"asset_code": "USD", "account": "test source address"},
+            follow=True,
+        )
+    content = json.loads(response.content)
+
+    assert response.status_code == 200
+    assert len(content["transactions"]) == 500
+    assert content["transactions"][0]["amount_in"] == "100.00"
+    assert content["transactions"][0]["amount_in_asset"] == transactions[0].fee_asset
+    assert content["transactions"][1]["amount_in"] == "100.0000000"
+    # the asset_code validation and the transactions
+    assert len(queries) == 2, [q["sql"] for q in queries.captured_queries]
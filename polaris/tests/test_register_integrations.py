@@ -1,5 +1,5 @@
 import pytest
-from unittest.mock import NonCallableMock
+from unittest.mock import Mock, NonCallableMock
 from polaris import integrations
 from polaris.integrations import (
     register_integrations,
@@ -8,6 +8,7 @@ from polaris.integrations import (
     SEP31ReceiverIntegration,
     CustomerIntegration,
     RailsIntegration,
+    get_async_hook,
 )
 
 
@@ -60,3 +61,27 @@ def test_invalid_integration_params():
     ]:
         with pytest.raises(TypeError):
             register_integrations(**{kwarg: NonCallableMock()})
+
+
+class AsyncRailsIntegration(RailsIntegration):
+    async def apoll_pending_deposits(self, pending_deposits, *args, **kwargs):
+        return []
+
+
+def test_get_async_hook():
+    rails = AsyncRailsIntegration()
+    assert (
+        get_async_hook(rails, "poll_pending_deposits") == rails.apoll_pending_deposits
+    )
+    assert get_async_hook(rails, "poll_outgoing_transactions") is None
+    assert get_async_hook(RailsIntegration(), "poll_pending_deposits") is None
+    assert get_async_hook(Mock(), "execute_outgoing_transaction") is None
+
+
+def test_sync_async_hook_raises_type_error():
+    class BadRailsIntegration(RailsIntegration):
+        def aexecute_outgoing_transaction(self, transaction, *args, **kwargs):
+            pass
+
+    with pytest.raises(TypeError):
+        register_integrations(rails=BadRailsIntegration())
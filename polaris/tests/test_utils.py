@@ -1,6 +1,9 @@
+import asyncio
 import base64
 import json
+import threading
 import pytest
+from datetime import timedelta
 from unittest.mock import patch, Mock
 from secrets import token_bytes
 from requests.exceptions import RequestException
@@ -201,3 +204,62 @@ def test_maybe_make_callback_postmessage(mock_log_error, mock_make_callback):
     utils.maybe_make_callback(mock_transaction)
     mock_make_callback.assert_not_called()
     mock_log_error.assert_not_called()
+
+
+def test_iter_chunks():
+    assert list(utils.iter_chunks(iter(range(5)), 2)) == [[0, 1], [2, 3], [4]]
+    assert list(utils.iter_chunks([], 2)) == []
+
+
+@pytest.mark.parametrize(
+    "age,expected",
+    [(0, 10), (1000, 100), (10**6, 3600), (2 * 10**6, 86400)],
+)
+def test_next_poll_delay(age, expected):
+    delay = utils.next_poll_delay(
+        timedelta(seconds=age),
+        min_poll_interval=10,
+        max_poll_interval=3600,
+        backoff_factor=0.1,
+        stale_after=10**6,
+        stale_poll_interval=86400,
+    )
+    assert delay == timedelta(seconds=expected)
+
+
+@pytest.fixture
+def db_executor():
+    utils.shutdown_db_executor()
+    yield
+    utils.shutdown_db_executor()
+
+
+@patch.object(settings, "DB_THREAD_POOL_SIZE", 2)
+@patch(f"{test_module}.close_old_connections")
+async def test_db_sync_to_async_runs_in_parallel(mock_close, db_executor):
+    barrier = threading.Barrier(2)
+
+    def query():
+        barrier.wait(timeout=5)
+        return threading.current_thread().name
+
+    names = await asyncio.gather(
+        utils.db_sync_to_async(query)(), utils.db_sync_to_async(query)()
+    )
+
+    assert len(set(names)) == 2
+    assert all(name.startswith("polaris-db") for name in names)
+    assert mock_close.call_count == 2
+
+
+@patch.object(settings, "DB_THREAD_POOL_SIZE", 1)
+@patch(f"{test_module}.close_old_connections")
+async def test_db_sync_to_async_closes_connections_on_error(mock_close, db_executor):
+    with pytest.raises(ValueError):
+        await utils.db_sync_to_async(Mock(side_effect=ValueError()))()
+
+    mock_close.assert_called_once_with()
+    executor = utils.get_db_executor()
+    assert executor._max_workers == 1
+    utils.shutdown_db_executor()
+    assert utils.get_db_executor() is not executor
@@ -1,16 +1,36 @@
 """This module defines helpers for various endpoints."""
+import asyncio
 import base64
+import contextvars
+import functools
 import json
 import codecs
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
 from urllib.parse import urlparse
 import uuid
-from datetime import datetime, timezone
+import weakref
+from datetime import datetime, timedelta, timezone
+from itertools import islice
 from logging import getLogger
-from typing import Optional, Union, Tuple, Dict
+from typing import (
+    Optional,
+    Union,
+    Tuple,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Callable,
+    Awaitable,
+)
 from decimal import Decimal
 
 import aiohttp
+import django.db.transaction
+from asgiref.sync import sync_to_async
+from django.db import close_old_connections
 from django.utils.translation import gettext as _
 from django.core.exceptions import ObjectDoesNotExist
 from django.utils.translation import gettext
@@ -25,7 +45,9 @@ from stellar_sdk import (
     IdMemo,
     HashMemo,
     Keypair,
+    ServerAsync,
 )
+from stellar_sdk.client.aiohttp_client import AiohttpClient
 from stellar_sdk.exceptions import (
     NotFoundError,
     Ed25519PublicKeyInvalidError,
@@ -390,6 +412,175 @@ async def maybe_make_callback_async(
                 logger.error(f"Callback request returned {callback_resp.status}")
 
 
+_db_executor: Optional[ThreadPoolExecutor] = None
+_db_executor_lock = threading.Lock()
+
+
+def get_db_executor() -> ThreadPoolExecutor:
+    """
+    Returns the thread pool used by :func:`db_sync_to_async`, creating it with
+    ``DB_THREAD_POOL_SIZE`` threads if necessary.
+    """
+    global _db_executor
+    with _db_executor_lock:
+        if _db_executor is None:
+            _db_executor = ThreadPoolExecutor(
+                max_workers=settings.DB_THREAD_POOL_SIZE,
+                thread_name_prefix="polaris-db",
+            )
+        return _db_executor
+
+
+def shutdown_db_executor():
+    """
+    Waits for the calls in progress on the :func:`db_sync_to_async` thread pool
+    to complete and shuts it down. A new pool is created on the next call.
+    """
+    global _db_executor
+    with _db_executor_lock:
+        executor, _db_executor = _db_executor, None
+    if executor:
+        executor.shutdown()
+
+
+def db_sync_to_async(func: Callable) -> Callable[..., Awaitable]:
+    """
+    Like ``asgiref.sync.sync_to_async()``, but calls `func` on a dedicated pool
+    of ``DB_THREAD_POOL_SIZE`` threads instead of the single thread shared by all
+    thread-sensitive calls, so database queries made by independent tasks run in
+    parallel.
+
+    Each thread uses its own database connection, which is closed after the call
+    if it is unusable or has exceeded ``CONN_MAX_AGE``, as Django does at the end
+    of each request. Functions using a connection across calls, such as reading
+    a ``QuerySet.iterator()``, must use ``sync_to_async()`` instead.
+    """
+
+    def call(*args, **kwargs):
+        try:
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        context = contextvars.copy_context()
+        return await asyncio.get_running_loop().run_in_executor(
+            get_db_executor(), functools.partial(context.run, call, *args, **kwargs)
+        )
+
+    return wrapper
+
+
+def iter_chunks(rows: Iterable, chunk_size: int) -> Iterator[List]:
+    """
+    Yields lists of at most `chunk_size` items from `rows`, such as the iterator
+    returned by ``QuerySet.iterator()``.
+    """
+    rows = iter(rows)
+    while True:
+        chunk = list(islice(rows, chunk_size))
+        if not chunk:
+            return
+        yield chunk
+
+
+async def gather_chunks(
+    rows: Iterable,
+    chunk_size: int,
+    concurrency: int,
+    process: Callable[[List], Awaitable],
+) -> List:
+    """
+    Reads chunks of at most `chunk_size` items from `rows`, an iterator that may
+    make database queries, and awaits `process` for up to `concurrency` chunks at
+    a time. Returns the results in chunk order.
+
+    No further chunks are read once a call to `process` returns ``None``.
+    """
+    chunks = iter_chunks(rows, chunk_size)
+    semaphore = asyncio.Semaphore(concurrency)
+    tasks = []
+
+    async def run(chunk):
+        try:
+            return await process(chunk)
+        finally:
+            semaphore.release()
+
+    while True:
+        await semaphore.acquire()
+        if any(t.done() and t.result() is None for t in tasks):
+            semaphore.release()
+            break
+        # the iterator's cursor must be read on the thread that opened it
+        chunk = await sync_to_async(next)(chunks, None)
+        if chunk is None:
+            semaphore.release()
+            break
+        tasks.append(asyncio.create_task(run(chunk)))
+    return list(await asyncio.gather(*tasks))
+
+
+def next_poll_delay(
+    age: timedelta,
+    min_poll_interval: int,
+    max_poll_interval: int,
+    backoff_factor: float,
+    stale_after: Optional[int] = None,
+    stale_poll_interval: Optional[int] = None,
+) -> timedelta:
+    """
+    Returns how long to wait before polling a transaction of the given `age` again.
+
+    The delay is `age` multiplied by `backoff_factor`, bounded by
+    `min_poll_interval` and `max_poll_interval` seconds. If `stale_after` is set,
+    transactions older than `stale_after` seconds are polled every
+    `stale_poll_interval` seconds instead.
+    """
+    if stale_after is not None and age.total_seconds() > stale_after:
+        return timedelta(seconds=stale_poll_interval or max_poll_interval)
+    delay = age.total_seconds() * backoff_factor
+    return timedelta(seconds=min(max(delay, min_poll_interval), max_poll_interval))
+
+
+def schedule_next_polls(rows: Iterable[Tuple[str, str]], **backoff):
+    """
+    Updates :attr:`~polaris.models.Transaction.next_poll_at` for each
+    ``(id, status)`` pair in `rows`, the status being the one the transaction was
+    polled in. `backoff` is passed to :func:`next_poll_delay` with the time since
+    the transaction was first polled in its current status, and
+    :attr:`~polaris.models.Transaction.poll_started_at` is set for transactions
+    polled for the first time.
+
+    Transactions whose status changed while being polled are skipped, so they are
+    polled again from their new status.
+    """
+    polled_statuses = dict(rows)
+    now = datetime.now(timezone.utc)
+    transactions = []
+    with django.db.transaction.atomic():
+        for transaction_id, status, poll_started_at in (
+            Transaction.objects.select_for_update()
+            .filter(id__in=polled_statuses)
+            .values_list("id", "status", "poll_started_at")
+        ):
+            if status != polled_statuses[transaction_id]:
+                continue
+            poll_started_at = poll_started_at or now
+            delay = next_poll_delay(now - poll_started_at, **backoff)
+            transactions.append(
+                Transaction(
+                    id=transaction_id,
+                    next_poll_at=now + delay,
+                    poll_started_at=poll_started_at,
+                )
+            )
+        Transaction.objects.bulk_update(
+            transactions, ["next_poll_at", "poll_started_at"]
+        )
+
+
 def validate_patch_request_fields(fields: Dict, transaction: Transaction):
     try:
         required_info_updates = json.loads(transaction.required_info_updates)
@@ -600,3 +791,22 @@ def get_quote_and_offchain_source_asset(
             sell_amount=amount,
         )
     return quote, source_asset
+
+
+_horizon_servers: "weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, ServerAsync]" = (
+    weakref.WeakKeyDictionary()
+)
+
+
+def get_horizon_server_async() -> ServerAsync:
+    """
+    Returns a ``ServerAsync`` for ``HORIZON_URI`` shared by the coroutines of the
+    running event loop, so connections to Horizon are reused across requests.
+    """
+    loop = asyncio.get_running_loop()
+    server = _horizon_servers.get(loop)
+    if server is None:
+        server = _horizon_servers[loop] = ServerAsync(
+            settings.HORIZON_URI, client=AiohttpClient()
+        )
+    return server